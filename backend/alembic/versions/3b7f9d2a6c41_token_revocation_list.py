@@ -0,0 +1,64 @@
+"""'token revocation list'
+
+Revision ID: 3b7f9d2a6c41
+Revises: 9a4f2e6b8c13
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7f9d2a6c41"
+down_revision: Union[str, Sequence[str], None] = "9a4f2e6b8c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table("revoked_tokens",
+    sa.Column("jti", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("expires_at", sa.Float(), nullable=False),
+    sa.Column("revoked_at", sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+    sa.PrimaryKeyConstraint("jti")
+    )
+    op.create_index(op.f("ix_revoked_tokens_expires_at"), "revoked_tokens", ["expires_at"], unique=False)
+    op.create_index(op.f("ix_revoked_tokens_revoked_at"), "revoked_tokens", ["revoked_at"], unique=False)
+    op.create_table("user_token_generations",
+    sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("generation", sa.Integer(), nullable=False),
+    sa.Column("updated_at", sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+    sa.PrimaryKeyConstraint("user_id")
+    )
+    op.create_index(op.f("ix_user_token_generations_updated_at"), "user_token_generations", ["updated_at"],
+                    unique=False)
+    op.drop_index(op.f("ix_tokens_user_id"), table_name="tokens")
+    op.drop_index(op.f("ix_tokens_access_token"), table_name="tokens")
+    op.drop_table("tokens")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table("tokens",
+    sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("access_token", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("token_type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+    sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(op.f("ix_tokens_access_token"), "tokens", ["access_token"], unique=False)
+    op.create_index(op.f("ix_tokens_user_id"), "tokens", ["user_id"], unique=False)
+    op.drop_index(op.f("ix_user_token_generations_updated_at"), table_name="user_token_generations")
+    op.drop_table("user_token_generations")
+    op.drop_index(op.f("ix_revoked_tokens_revoked_at"), table_name="revoked_tokens")
+    op.drop_index(op.f("ix_revoked_tokens_expires_at"), table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,31 @@
+"""'rule cost classes'
+
+Revision ID: 5e9b3c7d1a48
+Revises: c4d2a8e6f913
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e9b3c7d1a48"
+down_revision: Union[str, Sequence[str], None] = "c4d2a8e6f913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rules are analyzed when their plan is compiled
+    op.add_column("rules", sa.Column("cost_class", sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("rules") as batch_op:
+        batch_op.drop_column("cost_class")
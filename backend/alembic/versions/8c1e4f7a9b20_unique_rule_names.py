@@ -0,0 +1,27 @@
+"""'unique rule names'
+
+Revision ID: 8c1e4f7a9b20
+Revises: 3b7f9d2a6c41
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1e4f7a9b20"
+down_revision: Union[str, Sequence[str], None] = "3b7f9d2a6c41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_rules_validation_id_name", "rules", ["validation_id", "name"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_rules_validation_id_name", table_name="rules")
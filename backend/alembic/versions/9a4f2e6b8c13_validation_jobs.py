@@ -0,0 +1,38 @@
+"""'validation jobs'
+
+Revision ID: 9a4f2e6b8c13
+Revises: e83562c1f726
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4f2e6b8c13"
+down_revision: Union[str, Sequence[str], None] = "e83562c1f726"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table("validation_jobs",
+    sa.Column("job_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("data", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column("updated_at", sa.Float(), nullable=False),
+    sa.Column("finished_at", sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint("job_id")
+    )
+    op.create_index(op.f("ix_validation_jobs_finished_at"), "validation_jobs", ["finished_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_validation_jobs_finished_at"), table_name="validation_jobs")
+    op.drop_table("validation_jobs")
@@ -0,0 +1,31 @@
+"""'validation versions'
+
+Revision ID: c4d2a8e6f913
+Revises: 8c1e4f7a9b20
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d2a8e6f913"
+down_revision: Union[str, Sequence[str], None] = "8c1e4f7a9b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("validations", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index(op.f("ix_validations_event_type"), "validations", ["event_type"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_validations_event_type"), table_name="validations")
+    with op.batch_alter_table("validations") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import resource
+import time
+from multiprocessing.queues import Queue
+from typing import Callable
+
+Reader = Callable[[], tuple[int, int]]
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _run(read: Reader, results: Queue) -> None:
+    baseline = current_rss()
+    started = time.perf_counter()
+    rows, nbytes = read()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((rows, nbytes, elapsed, max(peak - baseline, 0)))
+
+
+def measure(name: str, read: Reader) -> dict[str, float]:
+    """
+    Run `read` in a forked process, so that its peak memory is not hidden by earlier runs,
+    and print its throughput. `read` returns the rows and bytes it produced.
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=_run, args=(read, results))
+    process.start()
+    rows, nbytes, elapsed, peak = results.get()
+    process.join()
+
+    print(
+        f"{name:>8}: {elapsed:8.3f}s  {rows / elapsed:12,.0f} rows/s  {nbytes / elapsed / 2**20:8.1f} MiB/s  "
+        f"result {nbytes / 2**20:8.1f} MiB  peak RSS +{peak / 2**20:8.1f} MiB"
+    )
+    return {"rows": rows, "bytes": nbytes, "elapsed": elapsed, "peak_rss": peak}
@@ -0,0 +1,107 @@
+"""
+Compare the streaming Arrow reader with the pandas path it replaced for DB table fetches.
+
+    python -m bench.arrow_reader --rows 1000000
+    python -m bench.arrow_reader --table customers
+
+Without `--table` the rows are synthetic and only the conversion is measured; with it both
+readers fetch the table from the configured MySQL database.
+"""
+import argparse
+import asyncio
+import datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+
+from src.db.arrow_reader import MySQLColumn, rows_to_batch
+from . import measure
+
+COLUMNS = [
+    MySQLColumn(name="id", data_type="bigint", column_type="bigint unsigned"),
+    MySQLColumn(name="code", data_type="varchar", column_type="varchar(32)"),
+    MySQLColumn(name="amount", data_type="decimal", column_type="decimal(12,2)", precision=12, scale=2),
+    MySQLColumn(name="quantity", data_type="int", column_type="int"),
+    MySQLColumn(name="created_at", data_type="datetime", column_type="datetime"),
+]
+
+
+def synthetic_rows(rows: int) -> Iterator[tuple[Any, ...]]:
+    start = datetime.datetime(2024, 1, 1)
+    for index in range(rows):
+        yield (
+            index,
+            f"CODE-{index % 5000:05d}",
+            Decimal(index % 100_000) / 100,
+            index % 1000 if index % 17 else None,
+            start + datetime.timedelta(seconds=index),
+        )
+
+
+def chunks(rows: Iterator[tuple[Any, ...]], size: int) -> Iterator[list[tuple[Any, ...]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_pandas(rows: int) -> tuple[int, int]:
+    frame = pd.DataFrame(list(synthetic_rows(rows)), columns=[column.name for column in COLUMNS])
+    return len(frame), int(frame.memory_usage(deep=True).sum())
+
+
+def read_arrow(rows: int, chunk_size: int) -> tuple[int, int]:
+    names = [column.name for column in COLUMNS]
+    types = [column.arrow_type for column in COLUMNS]
+    batches = [rows_to_batch(chunk, names, types) for chunk in chunks(synthetic_rows(rows), chunk_size)]
+    table = pa.Table.from_batches(batches)
+    return table.num_rows, table.nbytes
+
+
+async def read_table_pandas(table_name: str) -> tuple[int, int]:
+    from sqlalchemy import text
+
+    from src.db import connection
+    from src.services import DbService
+
+    async with connection() as conn:
+        result = await conn.execute(text(f"SELECT * FROM {DbService.quote(table_name)}"))
+        frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    return len(frame), int(frame.memory_usage(deep=True).sum())
+
+
+async def read_table_arrow(table_name: str) -> tuple[int, int]:
+    from src.services import DbService
+
+    table = await DbService().fetch_table(table_name)
+    return table.num_rows, table.nbytes
+
+
+def run_async(read: Callable[[str], Awaitable[tuple[int, int]]], table_name: str) -> Callable[[], tuple[int, int]]:
+    return lambda: asyncio.run(read(table_name))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000, help="Synthetic rows to convert")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per record batch")
+    parser.add_argument("--table", help="Fetch this MySQL table instead of converting synthetic rows")
+    args = parser.parse_args()
+
+    if args.table:
+        measure("pandas", run_async(read_table_pandas, args.table))
+        measure("arrow", run_async(read_table_arrow, args.table))
+        return
+
+    measure("pandas", lambda: read_pandas(args.rows))
+    measure("arrow", lambda: read_arrow(args.rows, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare typed Arrow ingestion of sheet tabs and CSV exports with the pandas object-column path.
+
+    python -m bench.ingestion --rows 500000
+
+The synthetic tab mixes integer, decimal, boolean, date, code (leading zeros) and text columns,
+formatted the way the Sheets API returns them. Each reader runs in its own process.
+"""
+import argparse
+import csv
+import datetime
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from src.services.ingestion_service import IngestionService, SchemaCache
+from . import measure
+
+HEADERS = ["id", "code", "amount", "active", "day", "name"]
+
+
+def synthetic_values(rows: int) -> list[list[str]]:
+    start = datetime.date(2024, 1, 1)
+    values = [list(HEADERS)]
+    for index in range(rows):
+        values.append([
+            str(index),
+            f"{index % 10000:05d}",
+            f"{index % 100000 / 100:.2f}",
+            "TRUE" if index % 3 else "FALSE",
+            (start + datetime.timedelta(days=index % 3650)).isoformat(),
+            f"name {index % 7919}",
+        ])
+    return values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows of the synthetic tab")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per record batch")
+    args = parser.parse_args()
+
+    values = synthetic_values(args.rows)
+
+    def sheet_pandas(values: list[list[str]]) -> tuple[int, int]:
+        frame = pd.DataFrame(values[1:], columns=values[0])
+        return len(frame), int(frame.memory_usage(deep=True).sum())
+
+    def sheet_arrow(values: list[list[str]], schemas: SchemaCache) -> tuple[int, int]:
+        table = IngestionService(schemas=schemas, batch_size=args.batch_size, infer_types=True).from_rows("tab", values)
+        return table.num_rows, table.nbytes
+
+    warm = SchemaCache(max_size=1)
+    sheet_arrow(values, warm)
+
+    print(f"Sheet tab, {args.rows} rows")
+    measure("pandas", partial(sheet_pandas, values))
+    measure("arrow", partial(sheet_arrow, values, SchemaCache(max_size=1)))
+    measure("cached", partial(sheet_arrow, values, warm))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "tab.csv"
+        with path.open("w", newline="") as file:
+            csv.writer(file).writerows(values)
+        # The CSV measurements shouldn't count the rows held for the sheet ones
+        del values
+
+        def csv_pandas() -> tuple[int, int]:
+            frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+            return len(frame), int(frame.memory_usage(deep=True).sum())
+
+        def csv_arrow(schemas: SchemaCache) -> tuple[int, int]:
+            table = IngestionService(schemas=schemas, batch_size=args.batch_size, infer_types=True).from_csv(path)
+            return table.num_rows, table.nbytes
+
+        warm = SchemaCache(max_size=1)
+        csv_arrow(warm)
+
+        print(f"CSV export, {path.stat().st_size / 2**20:.1f} MiB")
+        measure("pandas", csv_pandas)
+        measure("arrow", lambda: csv_arrow(SchemaCache(max_size=1)))
+        measure("cached", lambda: csv_arrow(warm))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Measure password verification throughput of concurrent logins, with Argon2 run inline on the
+event loop and offloaded to the bounded password hashing pool.
+
+    python -m bench.login --logins 200 --concurrency 50
+
+Alongside the logins a heartbeat task stands in for health checks: its worst delay is how long
+the event loop was blocked. Logins turned away by the pool (429) are counted, not retried.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+
+from src.conf import settings
+from src.services.password_hasher import PasswordHasher, password_hasher
+
+PASSWORD = "correct horse battery staple"
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """The worst delay of a timer on the event loop until `stop` is set."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(name: str, verify, logins: int, concurrency: int, hashed: str) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    rejected = 0
+
+    async def login() -> None:
+        nonlocal rejected
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await verify(PASSWORD, hashed)
+            except HTTPException:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(
+        f"{name:>8}: {elapsed:8.3f}s  {len(latencies) / elapsed:8.1f} logins/s  "
+        f"p50 {quantiles[49] * 1000:8.1f} ms  p99 {quantiles[98] * 1000:8.1f} ms  "
+        f"loop blocked up to {worst_lag * 1000:8.1f} ms  rejected {rejected}"
+    )
+
+
+async def compare(logins: int, concurrency: int, workers: int, queue_size: int) -> None:
+    password_hash: PasswordHash = password_hasher.password_hash
+    hashed = password_hash.hash(PASSWORD)
+
+    async def inline(password: str, hashed_password: str) -> bool:
+        return password_hash.verify(password, hashed_password)
+
+    pooled = PasswordHasher(password_hash, workers=workers, queue_size=queue_size)
+    try:
+        print(f"{logins} logins, {concurrency} concurrent, {workers} hashing threads, queue of {queue_size}")
+        await run("inline", inline, logins, concurrency, hashed)
+        await run("pool", pooled.verify, logins, concurrency, hashed)
+    finally:
+        pooled.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Logins to run")
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once")
+    parser.add_argument("--workers", type=int, default=settings.auth.hash_workers, help="Password hashing threads")
+    parser.add_argument("--queue-size", type=int, default=settings.auth.hash_queue_size,
+                        help="Password operations that may wait for a thread")
+    args = parser.parse_args()
+
+    asyncio.run(compare(args.logins, args.concurrency, args.workers, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
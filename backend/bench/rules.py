@@ -0,0 +1,96 @@
+"""
+Measure uploads of large rule sets: query validation and analysis, the bulk upsert of a first
+upload and of a re-upload (every rule replaced), against inserting the rules one statement at a time.
+
+    python -m bench.rules --rules 10000
+
+Each run stores into a fresh Sqlite database set up like the auth store.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import SQLModel
+
+from src.conf import settings
+from src.db import sqlite_client
+from src.db.sqlite_client import SqliteClient, get_session, sqlite_pragmas
+from src.rules.api import check_rules
+from src.rules.crud import RuleCRUD
+from src.rules.models import Rule, RuleCreate
+from src.validations.models import Validation
+
+
+def synthetic_rules(count: int, version: int = 0) -> list[RuleCreate]:
+    return [
+        RuleCreate(
+            name=f"rule_{index}",
+            error_message=f"Rule {index} failed (v{version})",
+            query=f"SELECT * FROM orders_{index % 50} o LEFT JOIN customers c ON o.customer_id = c.id "
+                  f"WHERE c.id IS NULL AND o.amount > {index}",
+        )
+        for index in range(count)
+    ]
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name:>10}: {elapsed:8.3f}s  {count / elapsed:10,.0f} rules/s")
+
+
+async def insert_one_by_one(event_type: str, rules: list[RuleCreate]) -> None:
+    async with get_session() as session:
+        validation = Validation(event_type=event_type)
+        session.add(validation)
+        await session.flush()
+        for rule in rules:
+            session.add(Rule(validation_id=validation.id, name=rule.name, error_message=rule.error_message,
+                             query=rule.query))
+            await session.flush()
+        await session.commit()
+
+
+async def compare(count: int) -> None:
+    rules = synthetic_rules(count)
+    print(f"{count} rules")
+
+    started = time.perf_counter()
+    rejected, analyses = check_rules(rules)
+    report("validate", count, time.perf_counter() - started)
+    assert not rejected, rejected[:3]
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = SqliteClient(f"sqlite+aiosqlite:///{Path(directory) / 'rules.sqlite3'}", pragmas=sqlite_pragmas(),
+                              read_pool_size=settings.sqlite.read_pool_size)
+        sqlite_client.client = client
+        async with client.write_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        started = time.perf_counter()
+        await insert_one_by_one("one_by_one", rules)
+        report("one by one", count, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        results = await RuleCRUD.upsert_many("bulk", rules, analyses=analyses)
+        report("bulk", count, time.perf_counter() - started)
+        assert all(result.status == "created" for result in results)
+
+        started = time.perf_counter()
+        results = await RuleCRUD.upsert_many("bulk", synthetic_rules(count, version=1))
+        report("re-upload", count, time.perf_counter() - started)
+        assert all(result.status == "updated" for result in results)
+
+        await client.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=10_000, help="Rules per upload")
+    args = parser.parse_args()
+
+    asyncio.run(compare(args.rules))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Load the Sqlite auth store with concurrent user lookups and writes, with the default engine
+("before": one pool shared by readers and writers, no pragmas) and the tuned client ("after":
+WAL, the Sqlite settings' pragmas, one writer connection and a pool of read-only ones).
+
+    python -m bench.sqlite_store --operations 5000 --concurrency 64 --write-ratio 0.2
+
+Reads are `UserCRUD.get_by_email` (a login); writes alternate between `UserCRUD.update_one` and
+a `RevocationCRUD.save` of one revoked token (a logout). Each run uses a fresh database file.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel
+
+from src.auth.crud import RevocationCRUD
+from src.auth.models import RevokedToken
+from src.conf import settings
+from src.db import sqlite_client
+from src.db.sqlite_client import SqliteClient, sqlite_pragmas
+from src.users.crud import UserCRUD
+from src.users.models import UserCreate, UserUpdate
+
+
+async def run(name: str, client: SqliteClient, users: int, operations: int, concurrency: int,
+              write_ratio: float) -> None:
+    sqlite_client.client = client
+    async with client.write_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    created = [await UserCRUD.create(UserCreate(name=f"user {index}", email=f"user{index}@example.com",
+                                                password="hash"))
+               for index in range(users)]
+
+    rng = random.Random(0)
+    semaphore = asyncio.Semaphore(concurrency)
+    reads: list[float] = []
+    writes: list[float] = []
+    failed = 0
+
+    async def operation(index: int) -> None:
+        nonlocal failed
+        user = created[rng.randrange(users)]
+        write = rng.random() < write_ratio
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if not write:
+                    await UserCRUD.get_by_email(user.email)
+                elif index % 2:
+                    await UserCRUD.update_one(user.id, UserUpdate(name=f"user {index}"))
+                else:
+                    now = time.time()
+                    await RevocationCRUD.save(
+                        tokens=[RevokedToken(jti=f"token-{index}", user_id=user.id, expires_at=now + 1800,
+                                             revoked_at=now)],
+                        generations=[], now=now,
+                    )
+            except OperationalError:
+                failed += 1
+                return
+            (writes if write else reads).append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(operation(index) for index in range(operations)))
+    elapsed = time.perf_counter() - started
+    await client.dispose()
+
+    def percentiles(latencies: list[float]) -> str:
+        if len(latencies) < 2:
+            return "          n/a"
+        quantiles = statistics.quantiles(latencies, n=100)
+        return f"p50 {quantiles[49] * 1000:7.1f} ms  p99 {quantiles[98] * 1000:7.1f} ms"
+
+    print(
+        f"{name:>8}: {elapsed:8.3f}s  {(len(reads) + len(writes)) / elapsed:8.0f} ops/s  "
+        f"reads {percentiles(reads)}  writes {percentiles(writes)}  failed {failed}"
+    )
+
+
+async def compare(users: int, operations: int, concurrency: int, write_ratio: float) -> None:
+    print(f"{operations} operations over {users} users, {concurrency} concurrent, {write_ratio:.0%} writes")
+    with tempfile.TemporaryDirectory() as directory:
+        before = f"sqlite+aiosqlite:///{Path(directory) / 'before.sqlite3'}"
+        await run("before", SqliteClient(before, single_writer=False), users, operations, concurrency, write_ratio)
+
+        after = f"sqlite+aiosqlite:///{Path(directory) / 'after.sqlite3'}"
+        await run("after", SqliteClient(after, pragmas=sqlite_pragmas(), read_pool_size=settings.sqlite.read_pool_size),
+                  users, operations, concurrency, write_ratio)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="Users in the store")
+    parser.add_argument("--operations", type=int, default=5000, help="Operations to run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Operations in flight at once")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of the operations that write")
+    args = parser.parse_args()
+
+    asyncio.run(compare(args.users, args.operations, args.concurrency, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
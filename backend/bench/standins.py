@@ -0,0 +1,180 @@
+"""
+Local stand-ins for the services a validation reads from, for tests and benchmarks: an HTTP server that
+answers the Google Sheets and Drive requests of `GoogleSheetsService`, and a `DbService` that
+reads its tables from a DuckDB database file instead of MySQL.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Hashable, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import duckdb
+import pyarrow as pa
+import sqlglot
+
+from src.db import MySQLColumn
+from src.rules.pushdown import TableProjection
+from src.services.db_service import DbService
+from src.services.table_cache import TableSnapshotCache
+
+# MySQL data types of the DuckDB column types the stand-in tables use
+MYSQL_TYPES = {"BIGINT": "bigint", "INTEGER": "int", "DOUBLE": "double", "BOOLEAN": "tinyint", "DATE": "date"}
+
+
+def tab_rows(*values: list) -> bytes:
+    """The JSON of a tab of orders (id and amount columns) with the given rows."""
+    return json.dumps([["id", "amount"], *values]).encode()
+
+
+def value_range(title: str, values_json: bytes) -> bytes:
+    """A Sheets API ValueRange of a tab, from the JSON array of its rows."""
+    return b'{"range":' + json.dumps(f"'{title}'!A1").encode() + b',"majorDimension":"ROWS","values":' \
+        + values_json + b"}"
+
+
+class SheetsStandIn(object):
+    """
+    Serves spreadsheets like the Google Sheets and Drive APIs do, for `GoogleSheetsService`
+    pointed at `sheets_url` and `drive_url`. Tabs are given as the JSON of their rows and are
+    served as is, with an ETag, so the stand-in costs next to nothing per request.
+
+    Every spreadsheet ID serves the same tabs, at `version`. `set_tab` edits a tab and bumps
+    the version, and `requests` lists the requests served, as (API, resource, status) tuples.
+    """
+
+    def __init__(self, tabs: dict[str, bytes]) -> None:
+        self.tabs: dict[str, bytes] = {}
+        self.etags: dict[str, str] = {}
+        self.version = 1
+        self.requests: list[tuple[str, str, int]] = []
+        for title, values in tabs.items():
+            self.set_tab(title, values, bump=False)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sheets-stand-in", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def sheets_url(self) -> str:
+        return f"{self.url}/sheets"
+
+    @property
+    def drive_url(self) -> str:
+        return f"{self.url}/drive"
+
+    def set_tab(self, title: str, values_json: bytes, bump: bool = True) -> None:
+        self.tabs[title] = value_range(title, values_json)
+        self.etags[title] = f'"{hashlib.sha256(self.tabs[title]).hexdigest()}"'
+        if bump:
+            self.version += 1
+
+    def start(self) -> "SheetsStandIn":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle's algorithm would hold the body back
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                parts = url.path.strip("/").split("/")
+                query = parse_qs(url.query)
+
+                if parts[0] == "drive" and parts[1:2] == ["files"]:
+                    self.reply(200, json.dumps({"version": str(stand_in.version)}).encode())
+                elif parts[0] == "sheets" and len(parts) == 4 and parts[3] == "values:batchGet":
+                    titles = [self.title(value) for value in query.get("ranges", [])]
+                    bodies = [stand_in.tabs[title] for title in titles if title in stand_in.tabs]
+                    self.reply(200, b'{"valueRanges":[' + b",".join(bodies) + b"]}")
+                elif parts[0] == "sheets" and len(parts) == 5 and parts[3] == "values":
+                    title = self.title(unquote(parts[4]))
+                    if title not in stand_in.tabs:
+                        self.reply(400, b'{"error":{"message":"Unable to parse range"}}')
+                    elif self.headers.get("If-None-Match") == stand_in.etags[title]:
+                        self.reply(304, b"")
+                    else:
+                        self.reply(200, stand_in.tabs[title], etag=stand_in.etags[title])
+                elif parts[0] == "sheets" and len(parts) == 3:
+                    sheets = [{"properties": {"title": title}} for title in stand_in.tabs]
+                    self.reply(200, json.dumps({"sheets": sheets}).encode())
+                else:
+                    self.reply(404, b'{"error":{"message":"Not found"}}')
+
+            @staticmethod
+            def title(a1_range: str) -> str:
+                title = a1_range.split("!")[0]
+                if title.startswith("'") and title.endswith("'"):
+                    title = title[1:-1].replace("''", "'")
+                return title
+
+            def reply(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+                parts = urlsplit(self.path).path.strip("/").split("/")
+                stand_in.requests.append((parts[0], unquote(parts[-1]), status))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        return Handler
+
+
+class DuckDBDbService(DbService):
+    """
+    A `DbService` whose tables live in a DuckDB database file rather than MySQL. Table
+    projections are fetched with the statements built for MySQL, transpiled to DuckDB, and
+    tables never change, so their snapshots are always current.
+    """
+
+    def __init__(self, path: Path, cache: Optional[TableSnapshotCache] = None) -> None:
+        super().__init__(cache=cache)
+        self.database = duckdb.connect(str(path), read_only=True)
+
+    async def get_table_names(self, schema: str = "backend") -> list[str]:
+        return [row[0] for row in self.database.cursor().execute("SHOW TABLES").fetchall()]
+
+    async def get_table_version(self, table_name: str) -> Hashable:
+        return "stand-in", table_name
+
+    async def get_table_columns(self, table_name: str) -> list[MySQLColumn]:
+        rows = self.database.cursor().execute(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ? "
+            "ORDER BY ordinal_position",
+            [table_name],
+        ).fetchall()
+        return [
+            MySQLColumn(name=name, data_type=MYSQL_TYPES.get(data_type, "varchar"),
+                        column_type=MYSQL_TYPES.get(data_type, "varchar(255)"))
+            for name, data_type in rows
+        ]
+
+    async def fetch_table(self, table_name: str, projection: Optional[TableProjection] = None) -> pa.Table:
+        columns = await self.get_table_columns(table_name)
+        statement = sqlglot.transpile(self.select_statement(table_name, columns, projection),
+                                      read="mysql", write="duckdb")[0]
+        return await asyncio.to_thread(lambda: self.database.cursor().execute(statement).fetch_arrow_table())
+
+    def close(self) -> None:
+        self.database.close()
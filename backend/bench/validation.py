@@ -0,0 +1,393 @@
+"""
+Benchmark `ValidationService` end to end on synthetic data: a sheet tab of orders served by a
+local stand-in for Google Sheets, customers and products reference tables in a DuckDB stand-in
+for MySQL, and a rule set of a given complexity stored in a fresh rules database.
+
+    python -m bench.validation --scale 1k --scale 100k --complexity simple --complexity mixed
+    python manage.py bench --scale 10m --rules 200 --concurrency 4
+
+A scenario is one scale and one rule set. Each runs in a process of its own: one validation
+downloads the sheet and fetches the tables ("cold"), then `--iterations` validations run with
+at most `--concurrency` at once, with the sheet cache and table snapshots warm and the result
+cache off. Its throughput, p50/p99 latency and peak RSS are compared with those of the same
+scenario in the baseline file, which is written when it doesn't exist or with `--update-baseline`.
+
+At a scale of N rows, customers have N rows and products N / 10, and the sheet tab has N rows
+up to the 10 million cells a Google spreadsheet can hold. The data only depends on `--seed`.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import duckdb
+
+from .standins import SheetsStandIn
+
+# Next to the benchmark, wherever it is run from
+BASELINE = Path(__file__).with_name("validation_baseline.json")
+
+SHEET_CELL_LIMIT = 10_000_000
+
+ORDER_COLUMNS = ["id", "customer_id", "product_id", "quantity", "unit_price", "amount", "status", "created_at",
+                 "email"]
+
+# Lower is better for these metrics, higher for the others. Peak RSS is in bytes, printed in MiB
+LOWER_IS_BETTER = {"cold_seconds", "p50_seconds", "p99_seconds", "mean_seconds", "peak_rss"}
+
+COMPARED_METRICS = ["throughput", "rows_per_second", "cold_seconds", "p50_seconds", "p99_seconds", "peak_rss"]
+
+RULE_TEMPLATES: dict[str, list[str]] = {
+    # Filters of the sheet tab alone, which fused scans evaluate together
+    "simple": [
+        "SELECT * FROM orders WHERE amount < -{k}",
+        "SELECT * FROM orders WHERE quantity > {k} + 100",
+        "SELECT * FROM orders WHERE status NOT IN ('new', 'paid', 'shipped', 'cancelled')",
+        "SELECT * FROM orders WHERE abs(unit_price * quantity - amount) > 0.01 * ({k} + 1)",
+        "SELECT * FROM orders WHERE email NOT LIKE '%@%'",
+        "SELECT * FROM orders WHERE quantity = 0 AND id > {k}",
+    ],
+    # Checks of the sheet tab against the MySQL reference tables
+    "joins": [
+        "SELECT o.* FROM orders o LEFT JOIN customers c ON o.customer_id = c.id WHERE c.id IS NULL",
+        "SELECT o.id FROM orders o JOIN products p ON o.product_id = p.id WHERE p.discontinued AND o.quantity > {k}",
+        "SELECT o.id FROM orders o JOIN products p ON o.product_id = p.id WHERE abs(o.unit_price - p.price) > {k} + 1",
+        "SELECT o.id FROM orders o JOIN customers c ON o.customer_id = c.id WHERE NOT c.active AND o.status = 'new'",
+    ],
+    # Aggregations and window functions over the sheet tab
+    "aggregates": [
+        "SELECT id, count(*) AS copies FROM orders GROUP BY id HAVING count(*) > 1",
+        "SELECT customer_id, sum(amount) AS total FROM orders GROUP BY customer_id HAVING sum(amount) > 100000 + {k}",
+        "SELECT * FROM (SELECT id, amount, avg(amount) OVER (PARTITION BY product_id) AS average FROM orders) "
+        "WHERE amount > 50 * average + {k}",
+        "SELECT c.country, count(*) AS orders FROM orders o JOIN customers c ON o.customer_id = c.id "
+        "GROUP BY c.country HAVING count(*) < 0",
+    ],
+}
+RULE_TEMPLATES["mixed"] = [template for templates in RULE_TEMPLATES.values() for template in templates]
+
+
+def parse_scale(value: str) -> int:
+    """Rows of a scale such as 1000, 10k or 10m."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower()
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def scale_name(rows: int) -> str:
+    for suffix, size in (("m", 1_000_000), ("k", 1_000)):
+        if rows >= size and rows % size == 0:
+            return f"{rows // size}{suffix}"
+    return str(rows)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """The nearest-rank percentile `q` (0 to 1) of the values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def synthetic_rules(complexity: str, count: int) -> list[dict[str, str]]:
+    templates = RULE_TEMPLATES[complexity]
+    return [
+        {
+            "name": f"{complexity}_{index % len(templates)}_{index}",
+            "error_message": f"Rule {index} of the {complexity} rule set failed",
+            "query": templates[index % len(templates)].format(k=index // len(templates)),
+        }
+        for index in range(count)
+    ]
+
+
+def sheet_rows(rows: int) -> int:
+    return min(rows, SHEET_CELL_LIMIT // len(ORDER_COLUMNS) - 1)
+
+
+def create_reference_tables(path: Path, rows: int, seed: int) -> None:
+    """Write the customers and products tables MySQL stands for into a DuckDB database file."""
+    with duckdb.connect(str(path)) as conn:
+        conn.execute(f"""
+            CREATE TABLE customers AS
+            SELECT i AS id, 'customer ' || i AS name,
+                   ['US', 'GB', 'DE', 'FR', 'IL', 'JP'][CAST(hash(i, {seed}) % 6 AS INTEGER) + 1] AS country,
+                   hash(i, {seed}, 'active') % 20 <> 0 AS active,
+                   DATE '2020-01-01' + CAST(hash(i, {seed}) % 1500 AS INTEGER) AS created_at
+            FROM range({rows}) t(i)
+        """)
+        conn.execute(f"""
+            CREATE TABLE products AS
+            SELECT i AS id, 'SKU-' || lpad(CAST(i AS VARCHAR), 8, '0') AS sku,
+                   CAST(1 + hash(i, {seed}) % 50000 / 100 AS DOUBLE) AS price,
+                   hash(i, {seed}, 'discontinued') % 50 = 0 AS discontinued
+            FROM range({max(rows // 10, 100)}) t(i)
+        """)
+
+
+def sheet_values(rows: int, customers: int, products: int, seed: int) -> bytes:
+    """
+    The JSON rows of the orders tab, as the Sheets API formats them. About 1 in 1000 orders
+    is invalid in some way: an unknown customer, a wrong amount, a duplicate ID and so on.
+    """
+    with duckdb.connect() as conn:
+        conn.execute(f"""
+            CREATE TABLE orders AS
+            SELECT CASE WHEN h % 1000 = 1 THEN i - 1 ELSE i END AS id,
+                   CASE WHEN h % 1000 = 2 THEN {customers} + i ELSE hash(i, {seed}, 'c') % {customers} END AS customer_id,
+                   hash(i, {seed}, 'p') % {products} AS product_id,
+                   CASE WHEN h % 1000 = 3 THEN 0 ELSE 1 + h % 20 END AS quantity,
+                   CAST(1 + hash(hash(i, {seed}, 'p') % {products}, {seed}) % 50000 / 100 AS DOUBLE) AS unit_price,
+                   ['new', 'paid', 'shipped', 'cancelled'][CAST(h % 4 AS INTEGER) + 1] AS status,
+                   h
+            FROM (SELECT i, hash(i, {seed}) AS h FROM range({rows}) t(i))
+        """)
+        values = conn.execute("""
+            SELECT to_json(list([
+                CAST(id AS VARCHAR), CAST(customer_id AS VARCHAR), CAST(product_id AS VARCHAR),
+                CAST(quantity AS VARCHAR), printf('%.2f', unit_price),
+                printf('%.2f', CASE WHEN h % 1000 = 4 THEN -unit_price ELSE unit_price * quantity END),
+                CASE WHEN h % 1000 = 5 THEN 'lost' ELSE status END,
+                CAST(DATE '2024-01-01' + CAST(h % 700 AS INTEGER) AS VARCHAR),
+                CASE WHEN h % 1000 = 6 THEN 'nobody' ELSE 'customer' || customer_id || '@example.com' END
+            ] ORDER BY id, h))
+            FROM orders
+        """).fetchone()[0]
+    return b"[" + json.dumps(ORDER_COLUMNS).encode() + b"," + values.encode()[1:]
+
+
+def environment() -> dict[str, Any]:
+    """What the results depend on besides the code: the host, library versions and settings."""
+    import pyarrow
+    import sqlglot
+
+    from src.conf import settings
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "duckdb": duckdb.__version__,
+        "pyarrow": pyarrow.__version__,
+        "sqlglot": sqlglot.__version__,
+        "settings": {
+            "duckdb": settings.duckdb.model_dump(mode="json"),
+            "validation": settings.validation.model_dump(mode="json"),
+            "mysql_snapshot_cache_bytes": settings.mysql.snapshot_cache_bytes,
+        },
+    }
+
+
+async def run_validations(config: dict[str, Any]) -> dict[str, Any]:
+    from sqlmodel import SQLModel
+
+    from src.conf import settings
+    from src.db import sqlite_client
+    from src.db.sqlite_client import SqliteClient, sqlite_pragmas
+    from src.rules.crud import RuleCRUD
+    from src.rules.models import RuleCreate
+    from src.services.google_sheets_service import GoogleSheetsService
+    from src.services.result_cache import ResultCache
+    from src.services.sheet_cache import SheetCache
+    from src.services.table_cache import TableSnapshotCache
+    from src.services.tracing import peak_rss
+    from src.services.validation_service import ValidationService
+    from .standins import DuckDBDbService
+
+    directory = Path(config["directory"])
+    settings.google_sheets.sheets_url = config["sheets_url"]
+    settings.google_sheets.drive_url = config["drive_url"]
+
+    client = SqliteClient(f"sqlite+aiosqlite:///{directory / 'rules.sqlite3'}", pragmas=sqlite_pragmas(),
+                          read_pool_size=settings.sqlite.read_pool_size)
+    sqlite_client.client = client
+    async with client.write_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    event_type = config["scenario"]
+    await RuleCRUD.upsert_many(event_type, [RuleCreate(**rule) for rule in config["rules"]])
+
+    service = ValidationService()
+    service.google_sheets_service = GoogleSheetsService(cache=SheetCache(directory / "sheets"))
+    service.db_service = DuckDBDbService(Path(config["database"]),
+                                         cache=TableSnapshotCache(settings.mysql.snapshot_cache_bytes))
+    # Repeated validations of unchanged data would all be answered from the result cache
+    service.result_cache = ResultCache(max_entries=1, max_bytes=1)
+    url = "https://docs.google.com/spreadsheets/d/benchmark"
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(config["concurrency"])
+
+    async def validate() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await service.validate_async(event_type, url)
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        response = await service.validate_async(event_type, url)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await asyncio.gather(*(validate() for _ in range(config["iterations"])))
+        elapsed = time.perf_counter() - started
+    finally:
+        service.db_service.close()
+        await client.dispose()
+
+    return {
+        "rows": config["rows"],
+        "sheet_rows": config["sheet_rows"],
+        "rules": len(config["rules"]),
+        "failed_rules": len(response.errors),
+        "iterations": config["iterations"],
+        "concurrency": config["concurrency"],
+        "cold_seconds": cold,
+        "throughput": config["iterations"] / elapsed,
+        "rows_per_second": config["sheet_rows"] * config["iterations"] / elapsed,
+        "mean_seconds": sum(latencies) / len(latencies),
+        "p50_seconds": percentile(latencies, 0.5),
+        "p99_seconds": percentile(latencies, 0.99),
+        "peak_rss": peak_rss(),
+    }
+
+
+def run_scenario(config: dict[str, Any], results: Any) -> None:
+    """The main function of a scenario's process."""
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    try:
+        results.put(asyncio.run(run_validations(config)))
+    except Exception as exc:
+        results.put({"error": repr(exc)})
+        raise
+
+
+def measure(scenario: str, rows: int, complexity: str, args: argparse.Namespace) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        database = Path(directory) / "mysql.duckdb"
+        create_reference_tables(database, rows, args.seed)
+        stand_in = SheetsStandIn({"orders": sheet_values(sheet_rows(rows), rows, max(rows // 10, 100), args.seed)})
+        stand_in.start()
+        print(f"{scenario}: generated the data in {time.perf_counter() - started:.1f}s", flush=True)
+
+        config = {
+            "scenario": scenario, "directory": directory, "database": str(database),
+            "sheets_url": stand_in.sheets_url, "drive_url": stand_in.drive_url,
+            "rows": rows, "sheet_rows": sheet_rows(rows), "rules": synthetic_rules(complexity, args.rules),
+            "iterations": args.iterations, "concurrency": args.concurrency,
+        }
+        # A fresh interpreter per scenario, so that its peak RSS and caches are its own
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(target=run_scenario, args=(config, results), name=f"bench-{scenario}")
+        process.start()
+        try:
+            result = results.get()
+        finally:
+            process.join()
+            stand_in.close()
+
+    if "error" in result:
+        raise RuntimeError(f"Scenario {scenario} failed: {result['error']}")
+    print(
+        f"{scenario}: cold {result['cold_seconds']:.3f}s, {result['throughput']:.2f} validations/s "
+        f"({result['rows_per_second']:,.0f} rows/s), p50 {result['p50_seconds']:.3f}s, "
+        f"p99 {result['p99_seconds']:.3f}s, peak RSS {result['peak_rss'] / 2**20:.0f} MiB, "
+        f"{result['failed_rules']} of {result['rules']} rules failed",
+        flush=True,
+    )
+    return result
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Print the changes of every scenario against the baseline, and return the regressions."""
+    if current["environment"] != baseline.get("environment"):
+        print("The baseline was recorded in another environment (host, versions or settings), "
+              "differences are not only due to the code")
+
+    regressions = []
+    for scenario, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            print(f"{scenario}: not in the baseline")
+            continue
+        if previous.get("failed_rules") != result["failed_rules"]:
+            regressions.append(f"{scenario}: {result['failed_rules']} rules failed, "
+                               f"{previous.get('failed_rules')} in the baseline")
+
+        print(f"{scenario}:")
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), result[metric]
+            if not before:
+                continue
+            change = after / before - 1
+            worse = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            unit = 2**20 if metric == "peak_rss" else 1
+            print(f"  {metric:>16}: {before / unit:14,.3f} -> {after / unit:14,.3f}  {change:+7.1%}"
+                  f"{'  REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append(f"{scenario}: {metric} {change:+.1%}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", action="append", help="Rows of the data, e.g. 1k or 10m (repeatable)")
+    parser.add_argument("--complexity", action="append", choices=sorted(RULE_TEMPLATES),
+                        help="The kind of rules (repeatable, default mixed)")
+    parser.add_argument("--rules", type=int, default=50, help="Rules per rule set")
+    parser.add_argument("--iterations", type=int, default=20, help="Warm validations per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="Validations running at once")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--baseline", type=Path, default=BASELINE,
+                        help="The baseline file results are compared with, next to this module by default")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 when a metric regressed")
+    args = parser.parse_args(argv)
+
+    scales = [parse_scale(scale) for scale in args.scale or ["1k", "10k", "100k"]]
+    current: dict[str, Any] = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "seed": args.seed,
+        "environment": environment(),
+        "scenarios": {},
+    }
+    for rows in scales:
+        for complexity in args.complexity or ["mixed"]:
+            scenario = f"{scale_name(rows)}-{complexity}-{args.rules}"
+            current["scenarios"][scenario] = measure(scenario, rows, complexity, args)
+
+    regressions = []
+    if args.baseline.exists():
+        regressions = compare(current, json.loads(args.baseline.read_text()), args.tolerance)
+    if args.update_baseline or not args.baseline.exists():
+        if args.baseline.exists():
+            # Scenarios that were not run keep their baseline
+            current["scenarios"] = {**json.loads(args.baseline.read_text()).get("scenarios", {}),
+                                    **current["scenarios"]}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline written to {args.baseline}")
+
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
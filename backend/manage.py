@@ -15,6 +15,18 @@ def test() -> None:
 
 
 
+@cli.command(
+    name="bench",
+    help="Benchmark validations end to end, see `python manage.py bench --help`.",
+    context_settings={"allow_extra_args": True, "ignore_unknown_options": True},
+    add_help_option=False,
+)
+def bench(ctx: typer.Context) -> None:
+    from bench.validation import main
+
+    main(ctx.args)
+
+
 @cli.command(name="shell", help="Run the Python shell.")
 def shell() -> None:
     import IPython
@@ -29,6 +41,13 @@ def worker() -> None:
     main()
 
 
+@cli.command(name="worker", help="Run a validation job worker.")
+def validation_worker() -> None:
+    from src.jobs.worker import main
+
+    main()
+
+
 if __name__ == "__main__":
     import sys
     from pathlib import Path
@@ -1,12 +1,12 @@
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from jwt.exceptions import InvalidTokenError
 
 from .auth_bearer import JWTBearer
-from .crud import TokenCRUD
-from .models import LoginRequest, TokenData, TokenCreate, TokenShow, LoginResponse
+from .models import LoginRequest, TokenData, TokenShow, LoginResponse
+from .revocation import revocation_list
 from ..conf import settings
 from ..services import AuthServiceDep, AuthService
 from ..users.crud import UserCRUD
@@ -16,21 +16,24 @@ from loguru import logger
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
-async def get_current_user(token: Annotated[str, Depends(JWTBearer())]):
+async def get_current_user(request: Request, token: Annotated[str, Depends(JWTBearer())]):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = AuthService.decode_jwt(token)
+        # JWTBearer has verified the token already
+        payload = getattr(request.state, "token_claims", None) or AuthService.decode_jwt(token)
         email = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(id=payload.get("uid"), email=email)
     except InvalidTokenError as e:
         raise credentials_exception from e
-    user = await UserCRUD.get_by_email(email=token_data.email)
+    if payload.get("disabled"):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    user = await UserCRUD.get_cached(user_id=token_data.id, email=token_data.email)
     if user is None:
         raise credentials_exception
     return user
@@ -51,8 +54,11 @@ async def login_for_access_token(form_data: LoginRequest, auth_service: AuthServ
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token = await TokenCRUD.get_by_user_id(user_id=user.id)
-    return token.to_show()
+    access_token_expires = timedelta(minutes=settings.auth.expires_in_minutes)
+    access_token = auth_service.create_access_token(
+        data=await auth_service.user_claims(user), expires_delta=access_token_expires
+    )
+    return TokenShow(access_token=access_token, token_type="bearer")
 
 
 @router.get("/me", response_model=User)
@@ -66,20 +72,19 @@ async def verify_token(current_user: Annotated[User, Depends(get_current_active_
 
 
 @router.post("/refresh-token", response_model=TokenShow)
-async def refresh_token(current_user: Annotated[User, Depends(get_current_active_user)],
+async def refresh_token(request: Request, current_user: Annotated[User, Depends(get_current_active_user)],
                         auth_service: AuthServiceDep) -> TokenShow:
     access_token_expires = timedelta(minutes=settings.auth.expires_in_minutes)
     access_token = auth_service.create_access_token(
-        data={"sub": str(current_user.email)}, expires_delta=access_token_expires
+        data=await auth_service.user_claims(current_user), expires_delta=access_token_expires
     )
-    await TokenCRUD.delete_by_user_id(user_id=current_user.id)
-    token = await TokenCRUD.create(TokenCreate(access_token=access_token, user_id=current_user.id, token_type="bearer"))
-    return token.to_show()
+    revocation_list.revoke(request.state.token_claims)
+    return TokenShow(access_token=access_token, token_type="bearer")
 
 
 @router.post("/logout")
-async def logout(current_user: Annotated[User, Depends(get_current_active_user)]) -> dict:
-    await TokenCRUD.delete_by_user_id(user_id=current_user.id)
+async def logout(request: Request, current_user: Annotated[User, Depends(get_current_active_user)]) -> dict:
+    revocation_list.revoke(request.state.token_claims)
     return {"detail": "Logout successful"}
 
 
@@ -91,16 +96,15 @@ async def register_user(user: UserCreate, auth_service: AuthServiceDep) -> Login
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    hashed_password = auth_service.get_password_hash(user.password)
+    hashed_password = await auth_service.get_password_hash(user.password)
     user.password = hashed_password
     user = await UserCRUD.create(user)
     access_token_expires = timedelta(minutes=settings.auth.expires_in_minutes)
     access_token = auth_service.create_access_token(
-        data={"sub": str(user.email)}, expires_delta=access_token_expires
+        data=await auth_service.user_claims(user), expires_delta=access_token_expires
     )
 
-    token = await TokenCRUD.create(TokenCreate(access_token=access_token, user_id=user.id, token_type="bearer"))
-    return LoginResponse(user=user.to_show(), access_token=token.access_token, token_type=token.token_type)
+    return LoginResponse(user=user.to_show(), access_token=access_token, token_type="bearer")
 
 
 @router.post("/login", response_model=LoginResponse)
@@ -116,12 +120,10 @@ async def login_user(form_data: LoginRequest, auth_service: AuthServiceDep) -> L
         )
     access_token_expires = timedelta(minutes=settings.auth.expires_in_minutes)
     access_token = auth_service.create_access_token(
-        data={"sub": str(user.email)}, expires_delta=access_token_expires
+        data=await auth_service.user_claims(user), expires_delta=access_token_expires
     )
-    await TokenCRUD.delete_by_user_id(user_id=user.id)
 
-    token = await TokenCRUD.create(TokenCreate(access_token=access_token, user_id=user.id, token_type="bearer"))
-    return LoginResponse(user=user.to_show(), access_token=token.access_token, token_type=token.token_type)
+    return LoginResponse(user=user.to_show(), access_token=access_token, token_type="bearer")
 
 
 @router.post("/change-password", response_model=UserShow)
@@ -129,6 +131,8 @@ async def change_password(
         current_user: Annotated[User, Depends(get_current_active_user)],
         new_password: str,
         auth_service: AuthServiceDep) -> UserShow:
-    hashed_password = auth_service.get_password_hash(new_password)
+    hashed_password = await auth_service.get_password_hash(new_password)
     user = await UserCRUD.update_one(current_user.id, UserUpdate(password=hashed_password))
+    # Sign out every session of the user, including this one
+    revocation_list.revoke_user(current_user.id)
     return user.to_show()
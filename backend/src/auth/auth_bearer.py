@@ -1,10 +1,17 @@
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jwt.exceptions import InvalidTokenError
 
+from .revocation import revocation_list
 from ..services import AuthService
 
 
 class JWTBearer(HTTPBearer):
+    """
+    Verifies the bearer token of a request, once, and checks it against the revocation list:
+    its claims are kept in `request.state.token_claims` for the dependencies that need them.
+    """
+
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
 
@@ -13,8 +20,14 @@ class JWTBearer(HTTPBearer):
         if credentials:
             if not credentials.scheme.lower() == "bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
-            if not AuthService.is_token_valid(credentials.credentials):
-                raise HTTPException(status_code=403, detail="Invalid token or expired token.")
+            try:
+                claims = AuthService.decode_jwt(credentials.credentials)
+            except InvalidTokenError as exc:
+                raise HTTPException(status_code=403, detail="Invalid token or expired token.") from exc
+            await revocation_list.start()
+            if revocation_list.is_revoked(claims):
+                raise HTTPException(status_code=403, detail="Token has been revoked.")
+            request.state.token_claims = claims
             return credentials.credentials
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
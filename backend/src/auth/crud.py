@@ -1,49 +1,44 @@
-from typing import Optional
-
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
 from sqlmodel import select, delete
 
-from .models import TokenCreate, Token
+from .models import RevokedToken, UserTokenGeneration
 from ..db.sqlite_client import get_session
 
 
-class TokenCRUD(object):
+class RevocationCRUD(object):
 
     @staticmethod
-    async def create(token: TokenCreate) -> Token:
-
-        db_token = Token.from_create(token)
+    async def save(tokens: list[RevokedToken], generations: list[UserTokenGeneration], now: float) -> None:
+        """Write a batch of revocations and drop the entries of expired tokens, in one transaction."""
         async with get_session() as session:
-            session.add(db_token)
+            if tokens:
+                statement = insert(RevokedToken).values([token.model_dump() for token in tokens])
+                await session.execute(statement.on_conflict_do_nothing(index_elements=["jti"]))
+            if generations:
+                statement = insert(UserTokenGeneration).values([generation.model_dump() for generation in generations])
+                await session.execute(statement.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={
+                        # Another process may have bumped the generation further
+                        "generation": func.max(UserTokenGeneration.generation, statement.excluded.generation),
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                ))
+            await session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
             await session.commit()
-            await session.refresh(db_token)
-            return db_token
 
     @staticmethod
-    async def get_by_user_id(user_id: str) -> Optional[Token]:
-        async with get_session() as session:
-            statement = select(Token).where(Token.user_id == user_id)
+    async def get_tokens_since(revoked_at: float, now: float) -> list[RevokedToken]:
+        async with get_session(readonly=True) as session:
+            statement = select(RevokedToken).where(RevokedToken.revoked_at >= revoked_at,
+                                                   RevokedToken.expires_at >= now)
             result = await session.execute(statement)
-            return result.scalar_one_or_none()
-
+            return result.scalars().all()
 
     @staticmethod
-    async def get_all() -> list[Token]:
-        async with get_session() as session:
-            statement = select(Token)
+    async def get_generations_since(updated_at: float) -> list[UserTokenGeneration]:
+        async with get_session(readonly=True) as session:
+            statement = select(UserTokenGeneration).where(UserTokenGeneration.updated_at >= updated_at)
             result = await session.execute(statement)
             return result.scalars().all()
-
-
-    @staticmethod
-    async def delete_by_user_id(user_id: str) -> None:
-        async with get_session() as session:
-            statement = delete(Token).where(Token.user_id == user_id)
-            await session.execute(statement)
-            await session.commit()
-
-    @staticmethod
-    async def delete_one(token_id: str) -> None:
-        async with get_session() as session:
-            statement = delete(Token).where(Token.id == token_id)
-            await session.execute(statement)
-            await session.commit()
@@ -1,7 +1,6 @@
-from typing import Optional, Self
+from typing import Optional
 
 from python_sdk.domain.base import BaseModel
-from python_sdk.utils import Crypto
 from sqlmodel import Field, SQLModel
 
 from ..users.models import UserShow
@@ -31,37 +30,29 @@ class TokenShow(BaseModel):
     token_type: str = Field(..., title="Token Type", description="The type of the token.")
 
 
-class TokenCreate(BaseModel):
-    access_token: str = Field(..., title="Access Token", description="The access token string.")
-    token_type: str = Field(..., title="Token Type", description="The type of the token.")
-    user_id: str = Field(..., title="User ID", description="The user's ID.")
-
+class RevokedToken(SQLModel, table=True):
 
-class Token(SQLModel, table=True):
-
-    __tablename__ = "tokens"
-    id: str = Field(default_factory=Crypto.uuidv7, primary_key=True, title="Token ID",
-                    description="The unique identifier for the token.")
-    access_token: str = Field(..., title="Access Token", description="The access token string.", index=True)
-    token_type: str = Field(..., title="Token Type", description="The type of the token.")
-    user_id: str = Field(
+    __tablename__ = "revoked_tokens"
+    jti: str = Field(..., primary_key=True, title="Token ID", description="The ID (jti claim) of the revoked token.")
+    user_id: str = Field(..., title="User ID", description="The ID of the token's user.", foreign_key="users.id")
+    expires_at: float = Field(
         ...,
-        title="User ID",
-        description="The user's ID.",
-        foreign_key="users.id",
+        title="Expires At",
+        description="When the token expires (UNIX time), after which it needs no revocation entry.",
         index=True,
     )
+    revoked_at: float = Field(..., title="Revoked At", description="When the token was revoked (UNIX time).", index=True)
 
-    def to_show(self) -> TokenShow:
-        return TokenShow(
-            access_token=self.access_token,
-            token_type=self.token_type
-        )
-
-    @classmethod
-    def from_create(cls, token_create: TokenCreate) -> Self:
-        return cls(
-            access_token=token_create.access_token,
-            token_type=token_create.token_type,
-            user_id=token_create.user_id
-        )
+
+class UserTokenGeneration(SQLModel, table=True):
+
+    __tablename__ = "user_token_generations"
+    user_id: str = Field(..., primary_key=True, title="User ID", description="The user's ID.", foreign_key="users.id")
+    generation: int = Field(
+        default=0,
+        title="Token Generation",
+        description="The user's token generation, tokens issued for an earlier generation are revoked.",
+    )
+    updated_at: float = Field(
+        ..., title="Updated At", description="When the generation was last bumped (UNIX time).", index=True
+    )
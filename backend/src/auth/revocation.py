@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..conf import settings
+from .crud import RevocationCRUD
+from .models import RevokedToken, UserTokenGeneration
+
+
+class RevocationList(object):
+    """
+    The revoked access tokens, checked on every authenticated request without a DB lookup.
+
+    A single token is revoked by its ID (the `jti` claim) until it expires; all the tokens of a
+    user are revoked by bumping the user's generation, as tokens carry the generation they were
+    issued for (the `gen` claim). Checks and revocations only touch memory: changes are written
+    to SQLite in one batch every `flush_interval` seconds, and the same sync picks up the
+    revocations of other processes, so a revocation takes up to that long to apply elsewhere.
+    """
+
+    # Re-read rows a little older than the last sync, in case their transaction committed late
+    SYNC_OVERLAP = 5.0
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self.tokens: dict[str, float] = {}
+        self.generations: dict[str, int] = {}
+        self._pending_tokens: dict[str, RevokedToken] = {}
+        self._pending_users: set[str] = set()
+        self._synced_at: Optional[float] = None
+        self._started = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Load the revocations on first use and keep syncing them in the background."""
+        if self._task is not None and not self._task.done():
+            return
+        async with self._started:
+            if self._task is None or self._task.done():
+                if self._synced_at is None:
+                    await self.sync()
+                self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.sync()
+
+    def is_revoked(self, claims: dict) -> bool:
+        if claims.get("jti") in self.tokens:
+            return True
+        return claims.get("gen", 0) < self.generations.get(claims.get("uid"), 0)
+
+    def generation(self, user_id: str) -> int:
+        return self.generations.get(user_id, 0)
+
+    def revoke(self, claims: dict) -> None:
+        """Revoke one token, by the claims it was issued with."""
+        jti = claims.get("jti")
+        if jti is None or jti in self.tokens:
+            return
+        self.tokens[jti] = float(claims["exp"])
+        self._pending_tokens[jti] = RevokedToken(jti=jti, user_id=claims["uid"], expires_at=float(claims["exp"]),
+                                                 revoked_at=time.time())
+
+    def revoke_user(self, user_id: str) -> None:
+        """Revoke every token issued so far for a user."""
+        self.generations[user_id] = self.generation(user_id) + 1
+        self._pending_users.add(user_id)
+
+    async def sync(self) -> None:
+        """Write the pending revocations, drop expired ones and load those of other processes."""
+        now = time.time()
+        tokens, self._pending_tokens = self._pending_tokens, {}
+        users, self._pending_users = self._pending_users, set()
+        try:
+            await RevocationCRUD.save(
+                tokens=list(tokens.values()),
+                generations=[UserTokenGeneration(user_id=user_id, generation=self.generations[user_id], updated_at=now)
+                             for user_id in users],
+                now=now,
+            )
+            since = self._synced_at - self.SYNC_OVERLAP if self._synced_at is not None else 0.0
+            revoked = await RevocationCRUD.get_tokens_since(since, now)
+            bumped = await RevocationCRUD.get_generations_since(since)
+        except SQLAlchemyError as exc:
+            logger.warning(f"Syncing the token revocation list failed, retrying in {self.flush_interval}s: {exc}")
+            self._pending_tokens = {**tokens, **self._pending_tokens}
+            self._pending_users |= users
+            return
+
+        for token in revoked:
+            self.tokens[token.jti] = token.expires_at
+        for generation in bumped:
+            self.generations[generation.user_id] = max(self.generation(generation.user_id), generation.generation)
+        self.tokens = {jti: expires_at for jti, expires_at in self.tokens.items() if expires_at >= now}
+        self._synced_at = now
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.sync()
+
+
+revocation_list: RevocationList = RevocationList(flush_interval=settings.auth.revocation_flush_interval)
@@ -1,8 +1,10 @@
 import logging
+import os
 from pathlib import Path
+from typing import Literal
 from zoneinfo import ZoneInfo
 
-from pydantic import Field, MySQLDsn, PositiveInt, SecretStr
+from pydantic import Field, MySQLDsn, NonNegativeFloat, NonNegativeInt, PositiveFloat, PositiveInt, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from python_sdk.conf.app_settings import BooleanField, PathField, base_model_config
 from python_sdk.conf.app_settings import Settings as _Settings
@@ -29,6 +31,54 @@ class AuthSettings(BaseSettings):
         description="The token expiration time in minutes",
     )
 
+    user_cache_ttl: NonNegativeFloat = Field(
+        default=30.0,
+        title="The user cache TTL",
+        description="Seconds an authenticated user is served from the in-process cache (0 disables the cache)",
+    )
+
+    user_cache_size: PositiveInt = Field(
+        default=10_000,
+        title="The user cache size",
+        description="The maximum number of users in the in-process cache",
+    )
+
+    revocation_flush_interval: PositiveFloat = Field(
+        default=1.0,
+        title="The revocation list flush interval",
+        description="Seconds between writes of revoked tokens to the database, and reads of other processes' ones",
+    )
+
+    argon2_time_cost: PositiveInt = Field(
+        default=3,
+        title="The Argon2 time cost",
+        description="The number of Argon2 iterations of new password hashes",
+    )
+
+    argon2_memory_cost: PositiveInt = Field(
+        default=65536,
+        title="The Argon2 memory cost",
+        description="The KiB of memory Argon2 uses per password hash",
+    )
+
+    argon2_parallelism: PositiveInt = Field(
+        default=4,
+        title="The Argon2 parallelism",
+        description="The number of Argon2 lanes per password hash",
+    )
+
+    hash_workers: PositiveInt = Field(
+        default=4,
+        title="The password hashing workers",
+        description="The number of threads hashing and verifying passwords off the event loop",
+    )
+
+    hash_queue_size: NonNegativeInt = Field(
+        default=64,
+        title="The password hashing queue size",
+        description="The number of password operations that may wait for a worker before requests get a 429",
+    )
+
 
 class APISettings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -66,6 +116,27 @@ class MySQLSettings(BaseSettings):
                                          description="The connection timeout in seconds")
     isolation_level: str = Field(default="READ COMMITTED", title="The isolation level",
                                  description="The isolation level")
+    snapshot_cache_bytes: NonNegativeInt = Field(
+        default=512 * 1024 * 1024,
+        title="The table snapshot cache size",
+        description="The memory budget in bytes for cached reference table snapshots (0 disables the cache)",
+    )
+    snapshot_freshness_interval: NonNegativeFloat = Field(
+        default=5.0,
+        title="The table snapshot freshness interval",
+        description="Seconds a cached table snapshot is trusted before its freshness is checked again",
+    )
+    checksum_ttl: NonNegativeFloat = Field(
+        default=60.0,
+        title="The table checksum TTL",
+        description="Seconds the checksum of a table whose update time MySQL does not track is reused as its "
+                    "version before the table is checksummed again",
+    )
+    fetch_chunk_size: PositiveInt = Field(
+        default=10_000,
+        title="The fetch chunk size",
+        description="Rows read from the server-side cursor per Arrow record batch when fetching a table",
+    )
 
     @property
     def dsn(self) -> MySQLDsn:
@@ -84,12 +155,253 @@ class SqliteSettings(BaseSettings):
         description="The Sqlite database file path",
     )
 
+    journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"] = Field(
+        default="WAL",
+        title="The journal mode",
+        description="The Sqlite journal mode, WAL lets readers run alongside the writer",
+    )
+
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(
+        default="NORMAL",
+        title="The synchronous mode",
+        description="How often Sqlite syncs to disk, NORMAL is durable across application crashes in WAL mode",
+    )
+
+    mmap_size: NonNegativeInt = Field(
+        default=256 * 2**20,
+        title="The mmap size",
+        description="The bytes of the database file Sqlite reads through a memory map (0 disables it)",
+    )
+
+    busy_timeout: NonNegativeInt = Field(
+        default=5000,
+        title="The busy timeout",
+        description="Milliseconds a connection waits for a lock held by another process before failing",
+    )
+
+    read_pool_size: PositiveInt = Field(
+        default=8,
+        title="The read pool size",
+        description="The number of read-only connections; writes share a single connection",
+    )
+
 
     @property
     def url(self) -> str:
         return f"sqlite+aiosqlite:///{self.path}"
 
 
+class DuckDBSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        **base_model_config,
+        env_prefix="duckdb_",
+        cli_prefix="duckdb_",
+    )
+    workers: PositiveInt = Field(
+        default_factory=lambda: os.cpu_count() or 1,
+        title="The worker connections",
+        description="The number of pooled DuckDB connections (concurrent validations)",
+    )
+    threads: PositiveInt = Field(
+        default_factory=lambda: os.cpu_count() or 1,
+        title="The DuckDB threads",
+        description="The number of threads DuckDB may use for a single query",
+    )
+    memory_limit: str | None = Field(
+        default=None,
+        title="The memory limit",
+        description="The DuckDB memory limit (e.g. '4GB'), defaults to DuckDB's own limit",
+    )
+    acquire_timeout: PositiveInt = Field(
+        default=60,
+        title="The acquire timeout",
+        description="Seconds to wait for a free DuckDB connection",
+    )
+    materialize_min_scans: NonNegativeInt = Field(
+        default=0,
+        title="The materialization threshold",
+        description="Materialize a registered table when at least this many rules scan it (0 disables)",
+    )
+
+
+class ValidationSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        **base_model_config,
+        env_prefix="validation_",
+        cli_prefix="validation_",
+    )
+    rule_parallelism: PositiveInt = Field(
+        default_factory=lambda: os.cpu_count() or 1,
+        title="The rule parallelism",
+        description="The maximum number of rules executed concurrently",
+    )
+    rule_timeout: PositiveFloat = Field(
+        default=30.0,
+        title="The rule timeout",
+        description="Seconds a single rule may run before it is interrupted",
+    )
+    expensive_rule_parallelism: PositiveInt = Field(
+        default=1,
+        title="The expensive rule parallelism",
+        description="The maximum number of expensive rules (see rule cost classes) of a validation executed "
+                    "concurrently, on top of the other rules",
+    )
+    reject_pathological_rules: BooleanField = Field(
+        default=True,
+        title="Reject pathological rules",
+        description="Refuse to store or run rules whose analysis finds a cartesian product",
+    )
+    evaluation_mode: Literal["exists", "count"] = Field(
+        default="exists",
+        title="The evaluation mode",
+        description="Probe each rule for its first invalid row ('exists') or count its invalid rows ('count')",
+    )
+    fuse_rules: BooleanField = Field(
+        default=True,
+        title="Fuse rules",
+        description="Evaluate rules that filter the same table with a single scan of the table",
+    )
+    rule_plan_cache_size: PositiveInt = Field(
+        default=128,
+        title="The rule plan cache size",
+        description="The maximum number of event types whose compiled rules are cached",
+    )
+    rule_plan_cache_ttl: PositiveFloat = Field(
+        default=300.0,
+        title="The rule plan cache TTL",
+        description="Seconds a compiled rule plan is reused before the rules are reloaded",
+    )
+    rule_version_check_interval: NonNegativeFloat = Field(
+        default=1.0,
+        title="The rule version check interval",
+        description="Seconds between checks that a cached rule plan is still the current version of the rules",
+    )
+    detail_sample_size: PositiveInt = Field(
+        default=20,
+        title="The detail sample size",
+        description="The maximum number of invalid rows returned per rule in detail mode",
+    )
+    worker_processes: NonNegativeInt = Field(
+        default=0,
+        title="The worker processes",
+        description="Processes rules are evaluated in, next to the API process (0 evaluates them in the API process)",
+    )
+    worker_tasks: PositiveInt = Field(
+        default=1,
+        title="The validations per worker",
+        description="The maximum number of validations a worker process evaluates at once",
+    )
+    result_cache: Literal["none", "memory", "sqlite"] = Field(
+        default="memory",
+        title="The result cache",
+        description="Where validation results are cached by input fingerprint ('none' disables the cache)",
+    )
+    result_cache_path: PathField = Field(
+        default_factory=lambda: Path("./result_cache.sqlite3"),
+        title="The result cache file",
+        description="The SQLite file of the 'sqlite' result cache, which processes on a host can share",
+    )
+    result_cache_entries: PositiveInt = Field(
+        default=1024,
+        title="The result cache entries",
+        description="The maximum number of cached validation results",
+    )
+    result_cache_bytes: PositiveInt = Field(
+        default=64 * 1024 * 1024,
+        title="The result cache size",
+        description="The maximum total size in bytes of the cached validation results",
+    )
+
+
+class GoogleSheetsSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        **base_model_config,
+        env_prefix="google_sheets_",
+        cli_prefix="google_sheets_",
+    )
+    api_key: SecretStr | None = Field(
+        default=None,
+        title="The API key",
+        description="The Google API key used to read spreadsheets",
+    )
+    sheets_url: str = Field(
+        default="https://sheets.googleapis.com/v4",
+        title="The Sheets API URL",
+        description="The base URL of the Google Sheets API",
+    )
+    drive_url: str = Field(
+        default="https://www.googleapis.com/drive/v3",
+        title="The Drive API URL",
+        description="The base URL of the Google Drive API, used to read spreadsheet revisions",
+    )
+    timeout: PositiveFloat = Field(
+        default=30.0,
+        title="The request timeout",
+        description="Seconds to wait for a Google API response",
+    )
+    cache_dir: PathField = Field(
+        default_factory=lambda: Path("./.cache/sheets"),
+        title="The sheet cache directory",
+        description="The directory where downloaded sheet tabs are cached as Arrow IPC files",
+    )
+
+
+class IngestionSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        **base_model_config,
+        env_prefix="ingestion_",
+        cli_prefix="ingestion_",
+    )
+    infer_types: BooleanField = Field(
+        default=True,
+        title="Infer column types",
+        description="Convert sheet and CSV columns to typed Arrow columns instead of keeping them as strings",
+    )
+    batch_size: PositiveInt = Field(
+        default=10_000,
+        title="The ingestion batch size",
+        description="Rows parsed and converted per record batch",
+    )
+    schema_cache_size: PositiveInt = Field(
+        default=1024,
+        title="The schema cache size",
+        description="The maximum number of tabs and files whose inferred schema is cached",
+    )
+
+
+class JobsSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        **base_model_config,
+        env_prefix="jobs_",
+        cli_prefix="jobs_",
+    )
+    broker_url: str | None = Field(
+        default=None,
+        title="The broker URL",
+        description="The redis://, amqp:// or kafka:// URL of the job broker; jobs run in the API process when unset",
+    )
+    queue: str = Field(
+        default="validation.jobs",
+        title="The job queue",
+        description="The queue, list or topic validation jobs are published to",
+    )
+    result_ttl: PositiveFloat = Field(
+        default=3600.0,
+        title="The job result TTL",
+        description="Seconds a finished job's result is kept for polling",
+    )
+    max_wait: PositiveFloat = Field(
+        default=30.0,
+        title="The maximum wait",
+        description="The longest a job status request may wait for the job to finish, in seconds",
+    )
+    poll_interval: PositiveFloat = Field(
+        default=0.5,
+        title="The job poll interval",
+        description="Seconds between reads of the job store while a status request waits for a job to finish",
+    )
+
+
 class Settings(_Settings):
     model_config = SettingsConfigDict(**base_model_config)
     env: str = Field(
@@ -112,6 +424,11 @@ class Settings(_Settings):
     mysql: MySQLSettings = MySQLSettings()
     sqlite: SqliteSettings = SqliteSettings()
     auth: AuthSettings = AuthSettings()
+    duckdb: DuckDBSettings = DuckDBSettings()
+    validation: ValidationSettings = ValidationSettings()
+    google_sheets: GoogleSheetsSettings = GoogleSheetsSettings()
+    ingestion: IngestionSettings = IngestionSettings()
+    jobs: JobsSettings = JobsSettings()
 
     @property
     def timezone(self) -> ZoneInfo:
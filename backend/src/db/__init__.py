@@ -1 +1,2 @@
+from .arrow_reader import ArrowReader, MySQLColumn, ReadStats, reader
 from .mysql_client import connection, engine
@@ -0,0 +1,203 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Optional, Sequence
+
+import pyarrow as pa
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..conf import settings
+from .mysql_client import engine
+
+MYSQL_ARROW_TYPES: dict[str, pa.DataType] = {
+    "tinyint": pa.int8(),
+    "smallint": pa.int16(),
+    "mediumint": pa.int32(),
+    "int": pa.int32(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "year": pa.int16(),
+    "float": pa.float32(),
+    "double": pa.float64(),
+    "real": pa.float64(),
+    "date": pa.date32(),
+    "datetime": pa.timestamp("us"),
+    "timestamp": pa.timestamp("us"),
+    "time": pa.duration("us"),
+    "char": pa.string(),
+    "varchar": pa.string(),
+    "tinytext": pa.string(),
+    "text": pa.string(),
+    "mediumtext": pa.string(),
+    "longtext": pa.string(),
+    "enum": pa.string(),
+    "set": pa.string(),
+    "json": pa.string(),
+    "binary": pa.binary(),
+    "varbinary": pa.binary(),
+    "tinyblob": pa.binary(),
+    "blob": pa.binary(),
+    "mediumblob": pa.binary(),
+    "longblob": pa.binary(),
+    "bit": pa.binary(),
+}
+
+UNSIGNED_ARROW_TYPES: dict[str, pa.DataType] = {
+    "tinyint": pa.uint8(),
+    "smallint": pa.uint16(),
+    "mediumint": pa.uint32(),
+    "int": pa.uint32(),
+    "integer": pa.uint32(),
+    "bigint": pa.uint64(),
+}
+
+
+@dataclass(slots=True)
+class MySQLColumn:
+    name: str
+    data_type: str
+    column_type: str
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+
+    @property
+    def arrow_type(self) -> Optional[pa.DataType]:
+        """The Arrow type of the column, or None when it has to be inferred from the data."""
+        if self.data_type == "decimal" and self.precision is not None:
+            return pa.decimal128(self.precision, self.scale or 0)
+        if "unsigned" in self.column_type and self.data_type in UNSIGNED_ARROW_TYPES:
+            return UNSIGNED_ARROW_TYPES[self.data_type]
+        return MYSQL_ARROW_TYPES.get(self.data_type)
+
+
+@dataclass(slots=True)
+class ReadStats:
+    rows: int = 0
+    bytes: int = 0
+    batches: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+
+def to_array(values: Sequence[Any], arrow_type: Optional[pa.DataType]) -> pa.Array:
+    """
+    The values as an array of `arrow_type`, or else of the type Arrow infers from them,
+    or else of their string representations.
+    """
+    for candidate in dict.fromkeys([arrow_type, None]):
+        try:
+            return pa.array(values, type=candidate)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            continue
+    return pa.array([None if value is None else str(value) for value in values], type=pa.large_string())
+
+
+def rows_to_batch(rows: Sequence[Sequence[Any]], names: list[str],
+                  types: list[Optional[pa.DataType]]) -> pa.RecordBatch:
+    """Convert a chunk of DB rows to a record batch, column by column."""
+    columns = list(zip(*rows, strict=True)) if rows else [() for _ in names]
+    arrays = [to_array(values, arrow_type) for values, arrow_type in zip(columns, types, strict=True)]
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def unified_schema(schemas: list[pa.Schema]) -> pa.Schema:
+    """
+    A schema every batch of a result casts to, column by column: columns that held only NULLs
+    take the type of the other batches, numbers widen (int to float...) and columns whose
+    types can't be reconciled become large strings.
+    """
+    fields = []
+    for index, name in enumerate(schemas[0].names):
+        try:
+            fields.append(pa.unify_schemas([pa.schema([schema.field(index)]) for schema in schemas],
+                                           promote_options="permissive").field(0))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            fields.append(pa.field(name, pa.large_string()))
+    return pa.schema(fields)
+
+
+class ArrowReader(object):
+    """
+    Streams query results from MySQL into Arrow record batches.
+
+    Rows are read through a server-side cursor `chunk_size` rows at a time and converted
+    to typed columns right away, so no more than one chunk of Python row objects is alive
+    at once. Column types come from the MySQL schema where it is known.
+    """
+
+    def __init__(self, engine: AsyncEngine, chunk_size: Optional[int] = None) -> None:
+        self.engine = engine
+        self.chunk_size = chunk_size or settings.mysql.fetch_chunk_size
+
+    async def get_columns(self, table_name: str) -> list[MySQLColumn]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE "
+                    "FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name "
+                    "ORDER BY ORDINAL_POSITION"
+                ),
+                {"table_name": table_name},
+            )
+            return [
+                MySQLColumn(name=row[0], data_type=row[1].lower(), column_type=row[2].lower(),
+                            precision=row[3], scale=row[4])
+                for row in result.all()
+            ]
+
+    async def stream(self, statement: str, columns: Optional[list[MySQLColumn]] = None,
+                     stats: Optional[ReadStats] = None) -> AsyncGenerator[pa.RecordBatch]:
+        """
+        Yield the rows of `statement` as record batches, at least one. `columns` provides the MySQL types
+        of the selected columns by name; columns it doesn't describe, and values that don't fit
+        their MySQL type, get the type Arrow infers from each chunk (see `to_array`), so batches
+        can differ in those (see `unified_schema`).
+        """
+        known = {column.name.lower(): column.arrow_type for column in columns or []}
+        stats = stats if stats is not None else ReadStats()
+
+        async with self.engine.connect() as conn:
+            result = await conn.stream(text(statement))
+            names = list(result.keys())
+            types = [known.get(name.lower()) for name in names]
+
+            empty = True
+            async for rows in result.partitions(self.chunk_size):
+                batch = rows_to_batch(rows, names, types)
+                empty = False
+
+                stats.rows += batch.num_rows
+                stats.bytes += batch.nbytes
+                stats.batches += 1
+                yield batch
+
+            if empty:
+                # Keep the schema of an empty result, so that rules can still query the table
+                yield rows_to_batch([], names, [arrow_type or pa.string() for arrow_type in types])
+
+        stats.elapsed = time.perf_counter() - stats.started_at
+
+    async def read(self, statement: str, columns: Optional[list[MySQLColumn]] = None) -> pa.Table:
+        stats = ReadStats()
+        batches = [batch async for batch in self.stream(statement, columns, stats)]
+        logger.debug(
+            f"Read {stats.rows} rows ({stats.bytes} bytes) in {stats.batches} batches in {stats.elapsed:.3f}s: "
+            f"{stats.rows_per_sec:.0f} rows/s, {stats.bytes_per_sec:.0f} bytes/s"
+        )
+        if any(batch.schema != batches[0].schema for batch in batches):
+            schema = unified_schema([batch.schema for batch in batches])
+            return pa.Table.from_batches([batch.cast(schema) for batch in batches], schema=schema)
+        return pa.Table.from_batches(batches)
+
+
+reader: ArrowReader = ArrowReader(engine)
@@ -0,0 +1,179 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Optional
+from uuid import uuid4
+
+import duckdb
+import pandas as pd
+from loguru import logger
+
+from ..conf import settings
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def data_size(data: Any) -> tuple[int, int]:
+    """Return the (rows, bytes) held in memory by a DataFrame or Arrow table."""
+    if isinstance(data, pd.DataFrame):
+        return len(data), int(data.memory_usage(deep=True).sum())
+    return data.num_rows, data.nbytes
+
+
+@dataclass(slots=True)
+class RegisteredTable:
+    name: str
+    rows: int
+    bytes: int
+    materialized: bool = False
+
+
+@dataclass(slots=True)
+class RegistrationReport:
+    tables: list[RegisteredTable] = field(default_factory=list)
+
+    @property
+    def bytes_registered(self) -> int:
+        return sum(table.bytes for table in self.tables)
+
+    @property
+    def bytes_materialized(self) -> int:
+        return sum(table.bytes for table in self.tables if table.materialized)
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes that would have been copied into DuckDB storage had every table been materialized."""
+        return self.bytes_registered - self.bytes_materialized
+
+
+class DuckDBContext(object):
+    """
+    An isolated DuckDB namespace bound to a single validation.
+
+    Every context owns a private schema on a pooled connection, so tables and views
+    registered by concurrent validations never collide. Everything registered through
+    the context is torn down by `DuckDBPool.context` when the validation finishes.
+    """
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, schema: str) -> None:
+        self.conn = conn
+        self.schema = schema
+        self.views: dict[str, Any] = {}
+        self.report = RegistrationReport()
+        self.cursors: list[duckdb.DuckDBPyConnection] = []
+
+    def setup(self) -> None:
+        self.conn.execute(f"CREATE SCHEMA {quote_identifier(self.schema)}")
+        self._use_schema(self.conn)
+
+    def register(self, name: str, data: Any, materialize: bool = False) -> None:
+        """
+        Expose a DataFrame or Arrow table to DuckDB as a view over the caller's memory.
+        With `materialize`, the rows are also copied into a table of the context's schema,
+        which is faster to scan repeatedly but doubles the memory held for it.
+        """
+        self.conn.register(name, data)
+        self.views[name] = data
+        rows, size = data_size(data)
+        self.report.tables.append(RegisteredTable(name=name, rows=rows, bytes=size))
+
+        if materialize:
+            self.materialize(name)
+
+    def materialize(self, name: str) -> None:
+        """Copy a registered view into a table of the context's schema and drop the view."""
+        self.conn.execute(
+            f"CREATE TABLE {quote_identifier(self.schema)}.{quote_identifier(name)} "
+            f"AS SELECT * FROM {quote_identifier(name)}"
+        )
+        self.conn.unregister(name)
+        self.views.pop(name, None)
+        for table in self.report.tables:
+            if table.name == name:
+                table.materialized = True
+
+    def execute(self, query: str, parameters: Optional[list[Any]] = None) -> duckdb.DuckDBPyConnection:
+        return self.conn.execute(query, parameters)
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Open a child cursor that sees the same schema and registered views.
+        Registered views are connection-local in DuckDB, so they are re-registered on the cursor.
+        """
+        cursor = self.conn.cursor()
+        self._use_schema(cursor)
+        for name, data in self.views.items():
+            cursor.register(name, data)
+        self.cursors.append(cursor)
+        return cursor
+
+    def teardown(self) -> None:
+        for cursor in self.cursors:
+            cursor.close()
+        self.cursors.clear()
+
+        for name in self.views:
+            self.conn.unregister(name)
+        self.views.clear()
+
+        self.conn.execute("RESET search_path")
+        self.conn.execute(f"DROP SCHEMA IF EXISTS {quote_identifier(self.schema)} CASCADE")
+
+    def _use_schema(self, conn: duckdb.DuckDBPyConnection) -> None:
+        conn.execute(f"SET search_path = '{self.schema},main'")
+
+
+class DuckDBPool(object):
+    """
+    A fixed-size pool of connections to one in-memory DuckDB database.
+
+    Each validation checks out a connection for its whole lifetime and works inside its
+    own `DuckDBContext`, which bounds the number of validations running in DuckDB at once.
+    """
+
+    def __init__(self, size: int, threads: int, memory_limit: Optional[str] = None) -> None:
+        config: dict[str, Any] = {"threads": threads}
+        if memory_limit:
+            config["memory_limit"] = memory_limit
+
+        self.size = size
+        self.database = duckdb.connect(database=":memory:", config=config)
+        self._idle: asyncio.Queue[duckdb.DuckDBPyConnection] = asyncio.Queue(maxsize=size)
+        for _ in range(size):
+            self._idle.put_nowait(self.database.cursor())
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize()
+
+    @asynccontextmanager
+    async def context(self, timeout: Optional[float] = None) -> AsyncGenerator[DuckDBContext]:
+        timeout = timeout or settings.duckdb.acquire_timeout
+        conn = await asyncio.wait_for(self._idle.get(), timeout=timeout)
+        ctx = DuckDBContext(conn, schema=f"v_{uuid4().hex}")
+
+        try:
+            ctx.setup()
+            yield ctx
+        finally:
+            try:
+                ctx.teardown()
+            except duckdb.Error as exc:
+                logger.warning(f"DuckDB context {ctx.schema} teardown failed, replacing connection: {exc}")
+                conn.close()
+                conn = self.database.cursor()
+            self._idle.put_nowait(conn)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self.database.close()
+
+
+pool: DuckDBPool = DuckDBPool(
+    size=settings.duckdb.workers,
+    threads=settings.duckdb.threads,
+    memory_limit=settings.duckdb.memory_limit,
+)
@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
@@ -8,21 +9,98 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..conf import settings
 
-engine: AsyncEngine = create_async_engine(
+
+def sqlite_pragmas() -> dict[str, Any]:
+    return {
+        "journal_mode": settings.sqlite.journal_mode,
+        "synchronous": settings.sqlite.synchronous,
+        "mmap_size": settings.sqlite.mmap_size,
+        "busy_timeout": settings.sqlite.busy_timeout,
+    }
+
+
+class SqliteClient(object):
+    """
+    The Sqlite auth store, with one writer and many readers.
+
+    SQLite allows a single writer at a time, so writes go through a pool of one connection
+    and queue in the pool instead of failing with "database is locked"; its transactions
+    begin IMMEDIATE, taking the write lock up front rather than failing to upgrade a read
+    lock. Reads use their own read-only connections, which WAL mode lets run alongside the
+    writer. Every connection is set up with `pragmas`.
+    """
+
+    def __init__(self, url: str, pragmas: Optional[dict[str, Any]] = None, read_pool_size: int = 8,
+                 single_writer: bool = True) -> None:
+        self.pragmas = pragmas or {}
+        self.single_writer = single_writer
+        if single_writer:
+            self.write_engine = self._create_engine(url, pool_size=1, readonly=False)
+            self.read_engine = self._create_engine(url, pool_size=read_pool_size, readonly=True)
+        else:
+            self.write_engine = self.read_engine = create_async_engine(
+                url=url, poolclass=AsyncAdaptedQueuePool, echo=settings.debug, future=True,
+            )
+            event.listen(self.write_engine.sync_engine, "connect", self._set_pragmas)
+
+    def _create_engine(self, url: str, pool_size: int, readonly: bool) -> AsyncEngine:
+        engine = create_async_engine(
+            url=url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=0,
+            echo=settings.debug,
+            future=True,
+        )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def connect(dbapi_connection: Any, _: Any) -> None:
+            # Let SQLAlchemy emit BEGIN itself, see the "begin" listener
+            dbapi_connection.isolation_level = None
+            self._set_pragmas(dbapi_connection, _)
+            if readonly:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA query_only = ON")
+                cursor.close()
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def begin(conn: Any) -> None:
+            conn.exec_driver_sql("BEGIN" if readonly else "BEGIN IMMEDIATE")
+
+        return engine
+
+    def _set_pragmas(self, dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in self.pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    @asynccontextmanager
+    async def session(self, readonly: bool = False) -> AsyncGenerator[AsyncSession]:
+        async with AsyncSession(self.read_engine if readonly else self.write_engine) as session:
+            yield session
+
+    async def dispose(self) -> None:
+        await self.write_engine.dispose()
+        if self.read_engine is not self.write_engine:
+            await self.read_engine.dispose()
+
+
+client: SqliteClient = SqliteClient(
     url=settings.sqlite.url,
-    poolclass=AsyncAdaptedQueuePool,
-    echo=settings.debug,
-    future=True,
+    pragmas=sqlite_pragmas(),
+    read_pool_size=settings.sqlite.read_pool_size,
 )
 
 
 async def init_db():
-    async with engine.begin() as conn:
+    async with client.write_engine.begin() as conn:
         # Use run_sync for synchronous table creation
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
 @asynccontextmanager
-async def get_session() -> AsyncGenerator[AsyncSession]:
-    async with AsyncSession(engine) as session:
+async def get_session(readonly: bool = False) -> AsyncGenerator[AsyncSession]:
+    """A session on the writer connection, or on a read-only one when `readonly` is set."""
+    async with client.session(readonly=readonly) as session:
         yield session
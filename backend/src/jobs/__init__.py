@@ -0,0 +1,3 @@
+from .client import JobClient, job_client
+from .models import JobStatus, ValidationJob
+from .store import JobStore
@@ -0,0 +1,49 @@
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+# Brokers are typed loosely: each one comes from an optional faststream extra
+Broker = Any
+
+
+def create_broker(url: str) -> Broker:
+    """A faststream broker for a redis://, amqp:// or kafka:// URL."""
+    scheme = urlparse(url).scheme
+    if scheme in ("redis", "rediss", "unix"):
+        from faststream.redis import RedisBroker
+        return RedisBroker(url)
+    if scheme in ("amqp", "amqps"):
+        from faststream.rabbit import RabbitBroker
+        return RabbitBroker(url)
+    if scheme == "kafka":
+        from faststream.confluent import KafkaBroker
+        return KafkaBroker(urlparse(url).netloc)
+    raise ValueError(f"Unsupported job broker URL scheme: {scheme}")
+
+
+def _kind(broker: Broker) -> str:
+    return type(broker).__module__.split(".")[1]
+
+
+def subscribe(broker: Broker, name: str, handler: Callable[..., Any], exclusive: bool = False) -> None:
+    """
+    Consume the messages published to `name` with `handler`. Messages are spread over the
+    consumers of a shared destination (one per worker), while an `exclusive` destination
+    belongs to a single process and goes away with it where the broker allows.
+    """
+    kind = _kind(broker)
+    if kind == "redis":
+        broker.subscriber(list=name)(handler)
+    elif kind == "rabbit":
+        from faststream.rabbit import RabbitQueue
+        broker.subscriber(RabbitQueue(name, durable=not exclusive, auto_delete=exclusive))(handler)
+    elif kind == "confluent":
+        broker.subscriber(name, group_id=name, auto_offset_reset="earliest")(handler)
+    else:
+        broker.subscriber(name)(handler)
+
+
+async def publish(broker: Broker, message: Any, name: str) -> None:
+    if _kind(broker) == "redis":
+        await broker.publish(message, list=name)
+    else:
+        await broker.publish(message, name)
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from ..conf import settings
+from .broker import Broker, create_broker, publish, subscribe
+from .models import JobStatus, ValidationJob
+from .store import JobStore
+from .worker import run_job
+
+
+class JobClient(object):
+    """
+    Submits validation jobs and tracks their statuses for the API.
+
+    With a broker (a URL, or a `broker` to use as is), jobs are published to the job queue
+    and run by the workers (`manage.py worker`), which report statuses to a queue shared by
+    the API processes: whichever process receives a status writes it to the job store, which
+    every process reads. A broker URL is connected when the API starts (see `src.main`), so
+    each process consumes statuses before it submits anything. Without a broker, jobs run as
+    background tasks of the API process itself.
+    """
+
+    def __init__(self, broker_url: Optional[str] = None, queue: Optional[str] = None,
+                 store: Optional[JobStore] = None, broker: Optional[Broker] = None) -> None:
+        self.broker_url = broker_url
+        self.queue = queue or settings.jobs.queue
+        self.store: JobStore = store or JobStore(ttl=settings.jobs.result_ttl,
+                                                 poll_interval=settings.jobs.poll_interval)
+        self.statuses = f"{self.queue}.statuses"
+        self.broker: Optional[Broker] = broker
+        if broker is not None:
+            subscribe(broker, self.statuses, self.on_status)
+        self._started = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> Optional[Broker]:
+        """Connect to the broker and consume the statuses, unless jobs run in process."""
+        async with self._started:
+            if self.broker is None and self.broker_url:
+                broker = create_broker(self.broker_url)
+                subscribe(broker, self.statuses, self.on_status)
+                await broker.start()
+                self.broker = broker
+                logger.info(f"Connected to the job broker, statuses are reported to {self.statuses}")
+            return self.broker
+
+    async def close(self) -> None:
+        if self.broker is not None and self.broker_url:
+            await self.broker.stop()
+            self.broker = None
+
+    async def submit(self, event_type: str, url: str, detail: bool = False, debug: bool = False) -> JobStatus:
+        job = ValidationJob(event_type=event_type, url=url, detail=detail, debug=debug, reply_to=self.statuses)
+        status = JobStatus(job_id=job.job_id, status="queued", submitted_at=job.submitted_at)
+        await self.store.put(status)
+
+        if self.broker_url or self.broker is not None:
+            await publish(await self.start(), job, self.queue)
+        else:
+            task = asyncio.create_task(run_job(job, self.on_status))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return status
+
+    async def get(self, job_id: str, wait: float = 0) -> Optional[JobStatus]:
+        return await self.store.wait(job_id, min(wait, settings.jobs.max_wait))
+
+    async def on_status(self, status: JobStatus) -> None:
+        await self.store.put(status)
+
+
+job_client: JobClient = JobClient(broker_url=settings.jobs.broker_url)
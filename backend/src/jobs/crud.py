@@ -0,0 +1,41 @@
+from typing import Optional
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import delete, select
+
+from .models import JobRecord
+from ..db.sqlite_client import get_session
+
+
+class JobCRUD(object):
+
+    @staticmethod
+    async def save(record: JobRecord, expired_before: float) -> None:
+        """
+        Write a job status, unless the job already finished (a late "running" report must not
+        overwrite the result), and drop the jobs that finished before `expired_before`.
+        """
+        async with get_session() as session:
+            statement = insert(JobRecord).values(record.model_dump())
+            await session.execute(statement.on_conflict_do_update(
+                index_elements=["job_id"],
+                set_={
+                    "status": statement.excluded.status,
+                    "data": statement.excluded.data,
+                    "updated_at": statement.excluded.updated_at,
+                    "finished_at": statement.excluded.finished_at,
+                },
+                where=JobRecord.finished_at.is_(None),
+            ))
+            await session.execute(delete(JobRecord).where(JobRecord.finished_at < expired_before))
+            await session.commit()
+
+    @staticmethod
+    async def get(job_id: str, expired_before: float) -> Optional[JobRecord]:
+        async with get_session(readonly=True) as session:
+            statement = select(JobRecord).where(JobRecord.job_id == job_id)
+            record = (await session.execute(statement)).scalars().first()
+            if record is None or (record.finished_at is not None and record.finished_at < expired_before):
+                return None
+            return record
+
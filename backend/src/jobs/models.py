@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from pydantic import Field
+from python_sdk.domain.base import BaseModel
+from python_sdk.utils import Crypto
+from sqlmodel import Field as SQLField, SQLModel
+
+from ..validations.models import ValidateResponse
+
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ValidationJob(BaseModel):
+    job_id: str = Field(default_factory=Crypto.uuidv7, title="Job ID", description="The unique identifier of the job.")
+
+    event_type: str = Field(..., title="Event Type", description="The type of event to validate.")
+
+    url: str = Field(..., title="URL", description="The URL to validate the event against.")
+
+    detail: bool = Field(default=False, title="Detail",
+                         description="Whether to return a sample of the invalid rows of each failed rule.")
+
+    debug: bool = Field(default=False, title="Debug",
+                        description="Whether to return the time spent in each stage and on each rule.")
+
+    reply_to: str = Field(default="", title="Reply To",
+                          description="The queue the job statuses are reported to.")
+
+    submitted_at: datetime = Field(default_factory=utcnow, title="Submitted At",
+                                   description="When the job was submitted.")
+
+
+class JobStatus(BaseModel):
+    job_id: str = Field(..., title="Job ID", description="The unique identifier of the job.")
+
+    status: JobState = Field(..., title="Status", description="The state of the job.")
+
+    result: Optional[ValidateResponse] = Field(default=None, title="Result",
+                                               description="The validation result, once the job is done.")
+
+    error: Optional[str] = Field(default=None, title="Error", description="Why the job failed, if it did.")
+
+    submitted_at: datetime = Field(default_factory=utcnow, title="Submitted At",
+                                   description="When the job was submitted.")
+
+    finished_at: Optional[datetime] = Field(default=None, title="Finished At",
+                                            description="When the job finished.")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobRecord(SQLModel, table=True):
+
+    __tablename__ = "validation_jobs"
+    job_id: str = SQLField(..., primary_key=True, title="Job ID", description="The unique identifier of the job.")
+    status: str = SQLField(..., title="Status", description="The state of the job.")
+    data: str = SQLField(..., title="Data", description="The job status, as JSON.")
+    updated_at: float = SQLField(..., title="Updated At", description="When the status was recorded (UNIX time).")
+    finished_at: Optional[float] = SQLField(
+        default=None,
+        title="Finished At",
+        description="When the job finished (UNIX time), after which it is kept for the result TTL.",
+        index=True,
+    )
@@ -0,0 +1,52 @@
+import asyncio
+import time
+import weakref
+from typing import Optional
+
+from .crud import JobCRUD
+from .models import JobRecord, JobStatus
+
+
+class JobStore(object):
+    """
+    The statuses of the validation jobs, kept in SQLite so that every API process (and a
+    restarted one) answers for every job, whichever process submitted it.
+
+    Status requests can wait for a job to finish (long polling): a waiter is woken as soon as
+    its own process records the status, and reads the store again every `poll_interval`
+    seconds for statuses recorded by other processes. The event of a job lives as long as
+    someone waits on it. Finished jobs are forgotten `ttl` seconds after they finish.
+    """
+
+    def __init__(self, ttl: float, poll_interval: float) -> None:
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._events: weakref.WeakValueDictionary[str, asyncio.Event] = weakref.WeakValueDictionary()
+
+    async def put(self, status: JobStatus) -> None:
+        now = time.time()
+        await JobCRUD.save(
+            JobRecord(job_id=status.job_id, status=status.status, data=status.model_dump_json(), updated_at=now,
+                      finished_at=now if status.finished else None),
+            expired_before=now - self.ttl,
+        )
+        event = self._events.pop(status.job_id, None) if status.finished else None
+        if event is not None:
+            event.set()
+
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        record = await JobCRUD.get(job_id, expired_before=time.time() - self.ttl)
+        return JobStatus.model_validate_json(record.data) if record is not None else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobStatus]:
+        """The status of the job once it finishes, or after `timeout` seconds, whichever comes first."""
+        deadline = time.monotonic() + timeout
+        status = await self.get(job_id)
+        while status is not None and not status.finished and (remaining := deadline - time.monotonic()) > 0:
+            event = self._events.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, self.poll_interval))
+            except TimeoutError:
+                pass
+            status = await self.get(job_id)
+        return status
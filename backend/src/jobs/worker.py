@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from faststream import FastStream
+from loguru import logger
+
+from ..conf import settings
+from .broker import Broker, create_broker, publish, subscribe
+from .models import JobStatus, ValidationJob, utcnow
+
+Reporter = Callable[[JobStatus], Awaitable[None]]
+
+
+async def run_job(job: ValidationJob, report: Reporter) -> JobStatus:
+    """Run a validation job, reporting its status when it starts and when it finishes."""
+    from ..services.validation_service import get_validation_service
+
+    await report(JobStatus(job_id=job.job_id, status="running", submitted_at=job.submitted_at))
+    try:
+        result = await get_validation_service().validate_async(event_type=job.event_type, url=job.url,
+                                                               detail=job.detail, debug=job.debug)
+        status = JobStatus(job_id=job.job_id, status="done", result=result,
+                           submitted_at=job.submitted_at, finished_at=utcnow())
+    except Exception as exc:
+        logger.exception(f"Validation job {job.job_id} failed")
+        status = JobStatus(job_id=job.job_id, status="failed", error=str(exc),
+                           submitted_at=job.submitted_at, finished_at=utcnow())
+
+    await report(status)
+    return status
+
+
+def register_worker(broker: Broker, queue: str) -> None:
+    """Run the validation jobs published to `queue`, reporting their statuses to the queue each job names."""
+
+    async def handle(job: ValidationJob) -> None:
+        logger.info(f"Running validation job {job.job_id} for event type {job.event_type}")
+
+        async def report(status: JobStatus) -> None:
+            if job.reply_to:
+                await publish(broker, status, job.reply_to)
+
+        await run_job(job, report)
+
+    subscribe(broker, queue, handle)
+
+
+def create_app(broker_url: str, queue: str) -> FastStream:
+    broker = create_broker(broker_url)
+    register_worker(broker, queue)
+    return FastStream(broker)
+
+
+def main() -> None:
+    if not settings.jobs.broker_url:
+        raise SystemExit("Set jobs_broker_url to run a validation worker")
+    asyncio.run(create_app(settings.jobs.broker_url, settings.jobs.queue).run())
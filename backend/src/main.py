@@ -1,8 +1,13 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from python_sdk.application.api import API
 
 from .conf import settings
+from .jobs import job_client
 from .router import router
 
 api = API(
@@ -12,6 +17,22 @@ api = API(
     init_postgres=True,
 )
 
+# The SDK may have a lifespan of its own, the job client starts within it
+sdk_lifespan = api.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    async with sdk_lifespan(app):
+        await job_client.start()
+        try:
+            yield
+        finally:
+            await job_client.close()
+
+
+api.router.lifespan_context = lifespan
+
 api.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
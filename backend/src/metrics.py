@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from starlette.responses import Response
+
+from .services.tracing import multiprocess_dir
+
+router = APIRouter(prefix="", tags=["Health"])
+
+
+def registry() -> CollectorRegistry:
+    """
+    The metrics to export: those of this process, or those every process of the service wrote
+    to the directory of `PROMETHEUS_MULTIPROC_DIR` when it is set. Validation workers inherit it
+    from the API; job workers (`manage.py worker`) must be started with the same directory, which
+    should be emptied before the service starts.
+    """
+    if not multiprocess_dir():
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+@router.get("/metrics", tags=["Health"], summary="Prometheus Metrics Endpoint")
+async def metrics() -> Response:
+    """
+    The metrics of the service in the Prometheus text format: the time, rows and bytes of
+    every validation stage and the time of rules by cost class (see `src.services.tracing`).
+    """
+    return Response(content=generate_latest(registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,272 @@
+import re
+from dataclasses import dataclass, field
+from typing import Literal, Optional
+
+import duckdb
+import pyarrow as pa
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+from .pushdown import referenced_columns
+from .sql import DIALECT, parse_rule
+
+CostClass = Literal["cheap", "moderate", "expensive", "pathological"]
+
+COST_CLASSES: tuple[CostClass, ...] = ("cheap", "moderate", "expensive", "pathological")
+
+# Physical operators of a DuckDB plan that compare every pair of rows of their inputs
+QUADRATIC_OPERATORS = ("CROSS_PRODUCT", "NESTED_LOOP_JOIN", "BLOCKWISE_NL_JOIN")
+
+OPERATOR_PATTERN = re.compile(r"\b[A-Z][A-Z_]+[A-Z]\b")
+
+NUMERIC_CONTEXTS = (exp.Add, exp.Sub, exp.Mul, exp.Div, exp.Mod, exp.Sum, exp.Avg, exp.Abs, exp.Round)
+
+COMPARISONS = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE)
+
+
+@dataclass(slots=True)
+class RuleAnalysis:
+    """What static analysis found about a rule, and how expensive it is expected to be."""
+
+    cost_class: CostClass = "cheap"
+    findings: list[str] = field(default_factory=list)
+    operators: frozenset[str] = frozenset()
+    # The findings of joins the query text suggests pair every row with every row
+    cross_products: list[str] = field(default_factory=list)
+    # The cost class of the other findings, the rule's class if the query plan clears the cross products
+    base_class: CostClass = "cheap"
+
+    def flag(self, cost_class: CostClass, finding: Optional[str] = None, cross_product: bool = False) -> None:
+        if not cross_product:
+            self.base_class = _costlier(self.base_class, cost_class)
+        self.cost_class = _costlier(self.cost_class, cost_class)
+        if finding is not None and finding not in self.findings:
+            self.findings.append(finding)
+
+    def flag_cross_product(self, finding: str) -> None:
+        self.flag("pathological", finding, cross_product=True)
+        self.cross_products.append(finding)
+
+    def clear_cross_products(self) -> None:
+        self.findings = [finding for finding in self.findings if finding not in self.cross_products]
+        self.cross_products = []
+        self.cost_class = self.base_class
+
+    @property
+    def pathological(self) -> bool:
+        return self.cost_class == "pathological"
+
+
+def _costlier(first: CostClass, second: CostClass) -> CostClass:
+    return max(first, second, key=COST_CLASSES.index)
+
+
+def _qualifiers(expression: Optional[exp.Expression]) -> set[str]:
+    if expression is None:
+        return set()
+    return {column.table.lower() for column in expression.find_all(exp.Column) if column.table}
+
+
+def _is_single_row(source: exp.Expression) -> bool:
+    """Whether a joined source returns one row: a subquery aggregating without GROUP BY."""
+    select = source.this if isinstance(source, exp.Subquery) else None
+    return (isinstance(select, exp.Select) and not select.args.get("group")
+            and any(projection.find(exp.AggFunc) for projection in select.expressions))
+
+
+def _has_join_predicate(where: Optional[exp.Expression], alias: str, previous: set[str]) -> bool:
+    """Whether a WHERE clause has an equality between a column of `alias` and one of the previous sources."""
+    if where is None:
+        return False
+    for equality in where.find_all(exp.EQ):
+        left, right = _qualifiers(equality.left), _qualifiers(equality.right)
+        if not left or not right:
+            # Unqualified columns could belong to either side, leave it to the query plan
+            if equality.left.find(exp.Column) and equality.right.find(exp.Column):
+                return True
+            continue
+        if (alias in left and right & previous) or (alias in right and left & previous):
+            return True
+    return False
+
+
+def _non_sargable(predicate: exp.Expression) -> Optional[str]:
+    """Why a predicate can't be evaluated on a column's raw values, if it can't."""
+    if isinstance(predicate, exp.Like) and isinstance(predicate.expression, exp.Literal) \
+            and predicate.expression.this.startswith("%"):
+        return f"{predicate.sql(dialect=DIALECT)} starts with a wildcard"
+    if isinstance(predicate, COMPARISONS):
+        for side in (predicate.left, predicate.right):
+            if not isinstance(side, (exp.Column, exp.Literal, exp.Paren)) and side.find(exp.Column):
+                return f"{predicate.sql(dialect=DIALECT)} compares a computed value of a column"
+    return None
+
+
+def check_select(select: exp.Select, analysis: RuleAnalysis) -> None:
+    if any(isinstance(projection, exp.Star) or
+           (isinstance(projection, exp.Column) and isinstance(projection.this, exp.Star))
+           for projection in select.expressions):
+        analysis.flag("moderate", "SELECT * reads every column of the tables, list the columns the rule needs")
+
+    source = select.args.get("from_")
+    previous = {source.this.alias_or_name.lower()} if source is not None else set()
+    where = select.args.get("where")
+
+    for join in select.args.get("joins") or []:
+        alias = join.this.alias_or_name.lower()
+        analysis.flag("moderate")
+        on, using = join.args.get("on"), join.args.get("using")
+        if on is not None and not on.find(exp.Column):
+            # ON TRUE and the like
+            on = None
+        if on is None and not using:
+            if _is_single_row(join.this):
+                pass
+            elif join.args.get("kind") == "CROSS":
+                analysis.flag_cross_product(f"CROSS JOIN {join.this.sql(dialect=DIALECT)} pairs every row "
+                                            f"of {', '.join(sorted(previous))} with every row of {alias}")
+            elif not _has_join_predicate(where, alias, previous):
+                analysis.flag_cross_product(f"{alias} is joined to {', '.join(sorted(previous))} "
+                                            f"without a join predicate")
+        elif on is not None and not any(
+                _qualifiers(equality.left) != _qualifiers(equality.right) for equality in on.find_all(exp.EQ)):
+            analysis.flag("expensive", f"The join of {alias} has no equality predicate: ON {on.sql(dialect=DIALECT)}")
+        previous.add(alias)
+
+    for condition in filter(None, [where, *(join.args.get("on") for join in select.args.get("joins") or [])]):
+        for predicate in condition.find_all(exp.Like, *COMPARISONS):
+            reason = _non_sargable(predicate)
+            if reason is not None:
+                analysis.flag("moderate", f"Non-sargable predicate, it can't be pushed down to MySQL: {reason}")
+
+
+def sample_schemas(tree: exp.Expression, known: Optional[dict[str, pa.Schema]] = None) -> dict[str, pa.Schema]:
+    """
+    Schemas to plan a rule against: the known schema of a table (e.g. a MySQL table), else the
+    columns the rule reads, typed as doubles where the rule uses them as numbers and strings otherwise.
+    """
+    known = {name.lower(): schema for name, schema in (known or {}).items()}
+    def is_numeric(expression: exp.Expression) -> bool:
+        return (isinstance(expression, NUMERIC_CONTEXTS) or (isinstance(expression, exp.Literal) and expression.is_number)
+                or (isinstance(expression, exp.Column) and expression.name.lower() in numeric))
+
+    numeric = {column.name.lower() for column in tree.find_all(exp.Column) if isinstance(column.parent, NUMERIC_CONTEXTS)}
+    # Columns compared with numbers are numbers too
+    for comparison in tree.find_all(*COMPARISONS):
+        for side, other in ((comparison.left, comparison.right), (comparison.right, comparison.left)):
+            if isinstance(side, exp.Column) and is_numeric(other):
+                numeric.add(side.name.lower())
+
+    # Tables read with * still need the columns the rule names
+    aliases = {table.alias_or_name.lower(): table.name.lower() for table in tree.find_all(exp.Table)}
+    named: dict[str, set[str]] = {}
+    for column in tree.find_all(exp.Column):
+        if column.table.lower() in aliases and not isinstance(column.this, exp.Star):
+            named.setdefault(aliases[column.table.lower()], set()).add(column.name.lower())
+
+    schemas = {}
+    for table, columns in referenced_columns(tree).items():
+        if table in known:
+            schemas[table] = known[table]
+        else:
+            columns = columns if columns is not None else named.get(table)
+            schemas[table] = pa.schema([
+                (column, pa.float64() if column in numeric else pa.string()) for column in sorted(columns or ["_"])
+            ])
+    return schemas
+
+
+def _normalize_literals(node: exp.Expression) -> exp.Expression:
+    """Literals replaced by one number or string, except row counts that shape the plan (LIMIT 0)."""
+    if isinstance(node, exp.Literal) and not isinstance(node.parent, (exp.Limit, exp.Offset)):
+        return exp.Literal.number(0) if node.is_number else exp.Literal.string("")
+    return node
+
+
+class RulePlanner(object):
+    """
+    Plans rules with DuckDB over empty tables of sample schemas (see `sample_schemas`), to read
+    the physical operators of their plans. Opening a DuckDB connection costs more than planning
+    a rule, so a planner opens one on its first plan and keeps it for the rules of a batch, and
+    plans the rules that only differ by their constants once.
+    """
+
+    def __init__(self, schemas: Optional[dict[str, pa.Schema]] = None):
+        self.schemas = schemas or {}
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        # By the rule's tree, which compares and hashes by structure
+        self._plans: dict[exp.Expression, frozenset[str]] = {}
+
+    def __enter__(self) -> "RulePlanner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def operators(self, tree: exp.Expression) -> frozenset[str]:
+        """The physical operators DuckDB plans for a rule. Replaces the literals of `tree` in place."""
+        tree = tree.transform(_normalize_literals, copy=False)
+        if tree not in self._plans:
+            schemas = sample_schemas(tree, self.schemas)
+            if self._conn is None:
+                self._conn = duckdb.connect()
+            try:
+                for name, schema in schemas.items():
+                    self._conn.register(name, schema.empty_table())
+                plan = self._conn.execute(f"EXPLAIN {tree.sql(dialect=DIALECT)}").fetchall()
+            finally:
+                for name in schemas:
+                    self._conn.unregister(name)
+            self._plans[tree] = frozenset(OPERATOR_PATTERN.findall("\n".join(row[1] for row in plan)))
+        return self._plans[tree]
+
+
+def analyze_rule(query: str | exp.Expression, planner: Optional[RulePlanner] = None) -> RuleAnalysis:
+    """
+    Estimate the cost class of a rule from its query: cross joins and joins without a predicate
+    are pathological, joins DuckDB can only run as nested loops are expensive, and SELECT *,
+    non-sargable predicates and joins in general are moderate.
+
+    Queries with joins are also planned by DuckDB (see `RulePlanner`), whose join operators
+    confirm or overrule what the query text suggests. A parsed query is modified in place.
+    """
+    analysis = RuleAnalysis()
+    try:
+        tree = parse_rule(query)
+    except SqlglotError as exc:
+        analysis.flag("pathological", f"The query can't be parsed: {exc}")
+        return analysis
+
+    for select in tree.find_all(exp.Select):
+        check_select(select, analysis)
+
+    if not any(select.args.get("joins") for select in tree.find_all(exp.Select)):
+        return analysis
+
+    single_row = all(_is_single_row(join.this) for join in tree.find_all(exp.Join))
+    try:
+        if planner is None:
+            with RulePlanner() as planner:
+                analysis.operators = planner.operators(tree)
+        else:
+            analysis.operators = planner.operators(tree)
+    except duckdb.Error as exc:
+        analysis.findings.append(f"The query could not be planned against sample schemas: {str(exc).splitlines()[0]}")
+        return analysis
+
+    quadratic = sorted(set(QUADRATIC_OPERATORS) & analysis.operators)
+    if single_row:
+        # Pairing every row with a single row is a scan
+        quadratic = []
+    if analysis.pathological and "CROSS_PRODUCT" not in analysis.operators:
+        # DuckDB found a join predicate the text checks missed (e.g. through unqualified columns)
+        analysis.clear_cross_products()
+    if quadratic:
+        analysis.flag("expensive", f"DuckDB plans the rule with {', '.join(quadratic)}, "
+                                   f"which compares every pair of rows of the joined tables")
+    return analysis
@@ -1,18 +1,99 @@
-from fastapi import APIRouter
+import asyncio
+from contextlib import suppress
+from typing import Optional
+
+import pyarrow as pa
+from fastapi import APIRouter, Response, status
 from loguru import logger
+from sqlalchemy.exc import DBAPIError
+from sqlglot.errors import SqlglotError
 
-from .models import CreateRulesRequest, CreateRulesResponse
+from .analysis import RuleAnalysis, RulePlanner, analyze_rule
+from .cache import rule_plan_cache
+from .crud import RuleCRUD
+from .models import CreateRulesRequest, CreateRulesResponse, RuleCreate, RuleCreateResult
+from .sql import check_rule, referenced_tables
+from ..conf import settings
+from ..services.db_service import DbService
 
 router = APIRouter(prefix="/api/rules", tags=["Rules"], )
 
 
+def check_rules(rules: list[RuleCreate], schemas: Optional[dict[str, pa.Schema]] = None,
+                ) -> tuple[list[RuleCreateResult], dict[str, RuleAnalysis]]:
+    """
+    The rules that can't be stored (invalid queries, names repeated within the request and,
+    with `settings.validation.reject_pathological_rules`, pathological rules) and the analysis
+    of each valid rule by name.
+    """
+    seen: set[str] = set()
+    rejected = []
+    analyses = {}
+    with RulePlanner(schemas) as planner:
+        for rule in rules:
+            analysis = None
+            tree, error = check_rule(rule.query)
+            if rule.name in seen:
+                error = f"Duplicate rule name {rule.name!r} in the request"
+            seen.add(rule.name)
+            if error is None:
+                analysis = analyses[rule.name] = analyze_rule(tree, planner)
+                if analysis.pathological and settings.validation.reject_pathological_rules:
+                    error = f"Rule {rule.name} is pathological: {'; '.join(analysis.findings)}"
+            if error is not None:
+                rejected.append(RuleCreateResult(name=rule.name, status="invalid", error=error,
+                                                 cost_class=analysis.cost_class if analysis else None,
+                                                 findings=analysis.findings if analysis else []))
+    return rejected, analyses
+
+
+async def table_schemas(rules: list[RuleCreate]) -> dict[str, pa.Schema]:
+    """The schemas of the MySQL tables the rules reference, to analyze the rules against."""
+    db_service = DbService()
+    tables = set()
+    for rule in rules:
+        with suppress(SqlglotError):
+            tables |= {table.lower() for table in referenced_tables(rule.query)}
+
+    try:
+        names = [name for name in await db_service.get_table_names() if name.lower() in tables]
+        schemas = {}
+        for name in names:
+            columns = await db_service.get_table_columns(name)
+            schemas[name] = pa.schema([(column.name, column.arrow_type or pa.string()) for column in columns])
+        return schemas
+    except (DBAPIError, OSError) as exc:
+        logger.warning(f"Analyzing rules without the MySQL table schemas, they could not be read: {exc}")
+        return {}
+
+
 @router.post("/api/create_rules", tags=["Rules"], summary="Create Rule Endpoint")
-async def create_rule(req: CreateRulesRequest) -> CreateRulesResponse:
-    logger.info(f"Create rule endpoint called with: {req}")
+async def create_rule(req: CreateRulesRequest, response: Response) -> CreateRulesResponse:
+    """
+    Store the rules of an event type, replacing existing rules with the same names, along with
+    the cost class their analysis estimates. Either all the rules are stored or, when any of
+    them is invalid, none is and the response is a 422 listing the invalid rules.
+    """
+    rules = req.rules if isinstance(req.rules, list) else [req.rules]
+    logger.info(f"Create rule endpoint called with {len(rules)} rules for {req.event_type}")
+
+    # Parsing and planning hundreds of queries takes a while, keep the event loop serving other requests
+    rejected, analyses = await asyncio.to_thread(check_rules, rules, await table_schemas(rules))
+    if rejected:
+        response.status_code = status.HTTP_422_UNPROCESSABLE_CONTENT
+        return CreateRulesResponse(
+            success=False,
+            created_rule_ids=[],
+            error=f"{len(rejected)} of {len(rules)} rules are invalid, no rule was stored",
+            error_code=response.status_code,
+            results=rejected,
+        )
 
-    dummy_response_id = [f"rule_{i}" for i in range(len(req.rules))]
+    results = await RuleCRUD.upsert_many(req.event_type, rules, analyses=analyses)
+    rule_plan_cache.invalidate(req.event_type)
 
     return CreateRulesResponse(
         success=True,
-        created_rule_ids=dummy_response_id,
+        created_rule_ids=[result.id for result in results],
+        results=results,
     )
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from ..conf import settings
+from .plan import RulePlan
+
+
+class RulePlanCache(object):
+    """
+    An LRU cache of compiled rule plans keyed by event type.
+
+    Plans expire `ttl` seconds after they were compiled and are dropped explicitly through
+    `invalidate` when the rules of an event type change. Given a way to read the current
+    rule version, a plan is also checked against it at most every `check_interval` seconds,
+    which catches rule changes made by other processes. Concurrent misses for the same
+    event type share a single load.
+    """
+
+    def __init__(self, max_size: int, ttl: float, check_interval: float = 0.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._plans: OrderedDict[str, RulePlan] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[RulePlan]] = {}
+
+    def get(self, event_type: str) -> Optional[RulePlan]:
+        plan = self._plans.get(event_type)
+        if plan is None:
+            return None
+        if time.monotonic() - plan.created_at > self.ttl:
+            del self._plans[event_type]
+            return None
+        self._plans.move_to_end(event_type)
+        return plan
+
+    def put(self, plan: RulePlan) -> None:
+        self._plans[plan.event_type] = plan
+        self._plans.move_to_end(plan.event_type)
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+
+    def invalidate(self, event_type: Optional[str] = None) -> None:
+        if event_type is None:
+            self._plans.clear()
+        else:
+            self._plans.pop(event_type, None)
+        logger.debug(f"Invalidated rule plans for {event_type or 'all event types'}")
+
+    async def get_or_load(self, event_type: str, loader: Callable[[], Awaitable[RulePlan]],
+                          version: Optional[Callable[[], Awaitable[int]]] = None) -> RulePlan:
+        plan = self.get(event_type)
+        if plan is not None and version is not None and time.monotonic() - plan.checked_at >= self.check_interval:
+            plan.checked_at = time.monotonic()
+            if await version() != plan.version:
+                logger.debug(f"The rules of {event_type} changed since version {plan.version}, reloading them")
+                if self._plans.get(event_type) is plan:
+                    del self._plans[event_type]
+                plan = None
+        if plan is not None:
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        pending = self._loading.get(event_type)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[RulePlan] = asyncio.get_running_loop().create_future()
+        self._loading[event_type] = future
+        try:
+            plan = await loader()
+            self.put(plan)
+            future.set_result(plan)
+            return plan
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved, concurrent waiters re-raise it themselves.
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._loading[event_type]
+
+
+rule_plan_cache: RulePlanCache = RulePlanCache(
+    max_size=settings.validation.rule_plan_cache_size,
+    ttl=settings.validation.rule_plan_cache_ttl,
+    check_interval=settings.validation.rule_version_check_interval,
+)
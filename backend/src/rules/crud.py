@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from python_sdk.utils import Crypto
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import select, update
+
+from .analysis import RuleAnalysis
+from .models import Rule, RuleCreate, RuleCreateResult
+from ..db.sqlite_client import get_session
+from ..validations.models import Validation
+
+# Rows per INSERT, well under SQLite's limit of 32766 bound parameters (6 per rule)
+UPSERT_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True, frozen=True)
+class RuleSet:
+    """The rules of an event type as of one version of them."""
+
+    event_type: str
+    version: int
+    rules: tuple[Rule, ...] = ()
+
+
+class RuleCRUD(object):
+
+    @staticmethod
+    async def upsert_many(event_type: str, rules: list[RuleCreate],
+                          analyses: Optional[dict[str, RuleAnalysis]] = None) -> list[RuleCreateResult]:
+        """
+        Store the rules of an event type in one transaction, replacing the rules with the same
+        names, with multi-row INSERT ... ON CONFLICT statements, and bump the event type's rule
+        version. Creates the event type's validation if it doesn't exist yet. Rules are stored
+        with the cost class of their analysis, by rule name.
+        """
+        analyses = analyses or {}
+        async with get_session() as session:
+            await session.execute(
+                insert(Validation).values(id=Crypto.uuidv7(), event_type=event_type, version=0)
+                .on_conflict_do_nothing(index_elements=["event_type"])
+            )
+            validation_id = (await session.execute(
+                update(Validation).where(Validation.event_type == event_type)
+                .values(version=Validation.version + 1).returning(Validation.id)
+            )).scalar_one()
+
+            existing = dict((await session.execute(
+                select(Rule.name, Rule.id).where(Rule.validation_id == validation_id)
+            )).all())
+
+            rows = [
+                {"id": existing.get(rule.name) or Crypto.uuidv7(), "validation_id": validation_id,
+                 "name": rule.name, "error_message": rule.error_message, "query": rule.query,
+                 "cost_class": analyses[rule.name].cost_class if rule.name in analyses else None}
+                for rule in rules
+            ]
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                statement = insert(Rule).values(rows[start:start + UPSERT_BATCH_SIZE])
+                await session.execute(statement.on_conflict_do_update(
+                    index_elements=["validation_id", "name"],
+                    set_={"error_message": statement.excluded.error_message, "query": statement.excluded.query,
+                          "cost_class": statement.excluded.cost_class},
+                ))
+            await session.commit()
+
+        return [
+            RuleCreateResult(name=row["name"], id=row["id"],
+                             status="updated" if row["name"] in existing else "created",
+                             cost_class=row["cost_class"],
+                             findings=analyses[row["name"]].findings if row["name"] in analyses else [])
+            for row in rows
+        ]
+
+    @staticmethod
+    async def get_version(event_type: str) -> int:
+        """The current rule version of an event type (0 before it has rules), with one index lookup."""
+        async with get_session(readonly=True) as session:
+            statement = select(Validation.version).where(Validation.event_type == event_type)
+            result = await session.execute(statement)
+            return result.scalar_one_or_none() or 0
+
+    @staticmethod
+    async def get_rule_set(event_type: str) -> RuleSet:
+        """The rules of an event type with their version, read together in a single query."""
+        async with get_session(readonly=True) as session:
+            statement = (
+                select(Validation.version, Rule)
+                .outerjoin(Rule, Rule.validation_id == Validation.id)
+                .where(Validation.event_type == event_type)
+                .order_by(Rule.name)
+            )
+            rows = (await session.execute(statement)).all()
+
+        if not rows:
+            return RuleSet(event_type=event_type, version=0)
+        return RuleSet(event_type=event_type, version=rows[0][0],
+                       rules=tuple(rule for _, rule in rows if rule is not None))
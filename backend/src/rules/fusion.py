@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+from .models import Rule
+from .sql import DIALECT, parse_rule
+
+# Expressions that change the number of rows a SELECT returns, so a rule using them
+# cannot be rewritten into a filtered count over its table.
+ROW_CHANGING_EXPRESSIONS = (exp.AggFunc, exp.Window, exp.Unnest, exp.Explode, exp.Subquery, exp.Select)
+
+ROW_CHANGING_CLAUSES = ("with", "joins", "laterals", "group", "having", "qualify", "distinct", "limit", "offset")
+
+
+@dataclass(slots=True)
+class FusedScan:
+    """Several single-table rules evaluated by one scan of their table."""
+
+    table: str
+    rules: list[Rule]
+    query: str
+
+
+@dataclass(slots=True)
+class FusionPlan:
+    scans: list[FusedScan] = field(default_factory=list)
+    unfused: list[Rule] = field(default_factory=list)
+
+    @property
+    def fused_rules(self) -> list[str]:
+        return [rule.name for scan in self.scans for rule in scan.rules]
+
+
+def qualified_name(table: exp.Table) -> str:
+    """The lower-cased name of a table with its catalog and schema, if it has them."""
+    return ".".join(part.lower() for part in (table.catalog, table.db, table.name) if part)
+
+
+def is_trivial_projection(projection: exp.Expression) -> bool:
+    """Whether a select list item only passes a column through: `*`, `t.*` or a plain column."""
+    if isinstance(projection, exp.Alias):
+        projection = projection.this
+    return isinstance(projection, (exp.Star, exp.Column))
+
+
+def filtered_scan(query: str | exp.Expression) -> Optional[tuple[exp.Table, Optional[exp.Expression]]]:
+    """
+    Decompose a rule of the form `SELECT columns FROM table [alias] [WHERE predicate]`.
+
+    Returns the table, without its alias, and the predicate with its column qualifiers
+    stripped, or None when the rule does anything that changes which rows it returns
+    (joins, grouping, aggregates, windows, subqueries, limits, set operations...) or
+    computes anything in its select list, which a count of its rows would not evaluate.
+    """
+    try:
+        tree = parse_rule(query)
+    except SqlglotError:
+        return None
+
+    if not isinstance(tree, exp.Select) or any(tree.args.get(clause) for clause in ROW_CHANGING_CLAUSES):
+        return None
+
+    source = tree.args.get("from_") or tree.args.get("from")
+    table = source.this if source else None
+    if not isinstance(table, exp.Table) or not table.name or table.args.get("joins"):
+        return None
+
+    if not all(is_trivial_projection(projection) for projection in tree.expressions):
+        return None
+
+    source_table = table.copy()
+    source_table.set("alias", None)
+
+    where = tree.args.get("where")
+    if where is None:
+        return source_table, None
+
+    predicate = where.this.copy()
+    if predicate.find(*ROW_CHANGING_EXPRESSIONS):
+        return None
+
+    qualifiers = {table.name.lower(), table.alias_or_name.lower()}
+    for column in predicate.find_all(exp.Column):
+        if column.table and column.table.lower() in qualifiers:
+            column.set("table", None)
+            column.set("db", None)
+            column.set("catalog", None)
+        elif column.table:
+            return None
+
+    return source_table, predicate
+
+
+def plan_fusion(rules: list[Rule], trees: Optional[Sequence[exp.Expression]] = None) -> FusionPlan:
+    """
+    Group rules that filter the same table (by its qualified name) and compile each group into
+    one query that scans the table once and counts the invalid rows of every rule in its own column.
+    Rules that cannot be decomposed, or are alone on their table, are left unfused.
+    Already parsed queries can be passed in `trees`, in the order of `rules`.
+    """
+    plan = FusionPlan()
+    groups: dict[str, list[tuple[Rule, exp.Table, Optional[exp.Expression]]]] = {}
+
+    for index, rule in enumerate(rules):
+        scan = filtered_scan(trees[index] if trees is not None else rule.query)
+        if scan is None:
+            plan.unfused.append(rule)
+            continue
+        table, predicate = scan
+        groups.setdefault(qualified_name(table), []).append((rule, table, predicate))
+
+    for members in groups.values():
+        if len(members) < 2:
+            plan.unfused.extend(rule for rule, _, _ in members)
+            continue
+
+        counts = []
+        for index, (_, _, predicate) in enumerate(members):
+            count: exp.Expression = exp.Count(this=exp.Star())
+            if predicate is not None:
+                count = exp.Filter(this=count, expression=exp.Where(this=predicate))
+            counts.append(exp.alias_(count, f"rule_{index}"))
+
+        table = members[0][1]
+        source = exp.table_(table.name, db=table.db or None, catalog=table.catalog or None, quoted=True)
+        query = exp.select(*counts).from_(source).sql(dialect=DIALECT)
+        plan.scans.append(FusedScan(table=table.sql(dialect=DIALECT), rules=[rule for rule, _, _ in members],
+                                    query=query))
+
+    return plan
@@ -1,13 +1,15 @@
-from typing import Union
+from typing import Literal, Optional, Union
 
 from python_sdk.domain.base import BaseModel
 from python_sdk.utils import Crypto
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class Rule(SQLModel, table=True):
 
     __tablename__ = "rules"
+    __table_args__ = (Index("ix_rules_validation_id_name", "validation_id", "name", unique=True),)
 
     id: str = Field(default_factory=Crypto.uuidv7, primary_key=True, title="Token ID",
                     description="The unique identifier for the token.")
@@ -26,8 +28,39 @@ class Rule(SQLModel, table=True):
 
     query: str = Field(..., title="Query", description="The query string for the rule.")
 
+    cost_class: Optional[str] = Field(
+        default=None,
+        title="Cost Class",
+        description="The cost class estimated by analyzing the query (cheap, moderate, expensive or pathological), "
+                    "None when the rule was not analyzed.",
+    )
+
+
+class RuleCreate(BaseModel):
+
+    name: str = Field(..., title="Name", description="The name of the rule, unique within its event type.")
+
+    error_message: str = Field(..., title="Error Message", description="The error message associated with the rule.")
+
+    query: str = Field(..., title="Query", description="The query string for the rule.")
 
 
+class RuleCreateResult(BaseModel):
+
+    name: str = Field(..., title="Name", description="The name of the rule.")
+
+    id: Optional[str] = Field(default=None, title="Rule ID", description="The ID of the stored rule.")
+
+    status: Literal["created", "updated", "invalid"] = Field(
+        ..., title="Status", description="Whether the rule was created, replaced an existing one or was rejected.")
+
+    error: Optional[str] = Field(default=None, title="Error", description="Why the rule was rejected.")
+
+    cost_class: Optional[str] = Field(default=None, title="Cost Class",
+                                      description="The cost class estimated by analyzing the query.")
+
+    findings: list[str] = Field(default_factory=list, title="Findings",
+                                description="What analyzing the query found, e.g. joins without predicates.")
 
 
 class CreateRulesRequest(BaseModel):
@@ -35,7 +68,8 @@ class CreateRulesRequest(BaseModel):
     event_type: str = Field(..., title="Event Type",
                             description="The type of event for which the rules are being created.")
 
-    rules: Union[Rule, list[Rule]] = Field(..., title="Rules", description="The rules associated with the event.")
+    rules: Union[RuleCreate, list[RuleCreate]] = Field(..., title="Rules",
+                                                       description="The rules associated with the event.")
 
 
 class CreateRulesResponse(BaseModel):
@@ -48,6 +82,9 @@ class CreateRulesResponse(BaseModel):
 
     error_code: int | None = Field(default=None, title="Error Code", description="Error code if the creation failed.")
 
+    results: list[RuleCreateResult] = Field(default_factory=list, title="Results",
+                                            description="The outcome of each rule, in request order.")
+
 
 class UpdateRulesRequest(BaseModel):
 
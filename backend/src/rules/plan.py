@@ -0,0 +1,112 @@
+import hashlib
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, cast
+
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+from ..conf import settings
+from .analysis import COST_CLASSES, CostClass, RulePlanner, analyze_rule
+from .fusion import FusionPlan, plan_fusion
+from .models import Rule
+from .pushdown import TableProjection, plan_projections
+from .sql import count_probe, exists_probe, parse_rule, referenced_tables
+
+
+@dataclass(slots=True)
+class CompiledRule:
+    """A rule with its parsed query and the probes derived from it, computed once per plan."""
+
+    rule: Rule
+    db_tables: list[str]
+    tree: Optional[exp.Expression] = None
+    tables: frozenset[str] = frozenset()
+    exists_sql: str = ""
+    count_sql: str = ""
+    cost_class: CostClass = "cheap"
+    error: Optional[str] = None
+
+    @property
+    def expensive(self) -> bool:
+        return self.cost_class in ("expensive", "pathological")
+
+
+@dataclass(slots=True)
+class RulePlan:
+    """Everything a validation needs to know about the rules of an event type."""
+
+    event_type: str
+    rules: list[CompiledRule]
+    fusion: FusionPlan
+    projections: dict[str, TableProjection] = field(default_factory=dict)
+    fingerprint: str = ""
+    version: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def db_tables(self) -> list[str]:
+        """The DB tables read by the rules, without duplicates."""
+        return list(dict.fromkeys(table for compiled in self.rules for table in compiled.db_tables))
+
+    @property
+    def tables(self) -> set[str]:
+        """Every table referenced by the rules, DB tables and sheet tabs alike."""
+        return {table for compiled in self.rules for table in compiled.tables}
+
+    @property
+    def sheet_tabs(self) -> set[str]:
+        """The tables referenced by the rules that are not DB tables, i.e. the sheet tabs to fetch."""
+        db_tables = {table.lower() for table in self.db_tables}
+        return {table for table in self.tables if table.lower() not in db_tables}
+
+    @property
+    def scans(self) -> Counter[str]:
+        """How many rules read each table, keyed by lower-cased table name."""
+        return Counter(table.lower() for compiled in self.rules for table in compiled.tables)
+
+
+def compile_rule(rule: Rule, db_tables: list[str], planner: Optional[RulePlanner] = None) -> CompiledRule:
+    compiled = CompiledRule(rule=rule, db_tables=list(db_tables))
+    try:
+        compiled.tree = parse_rule(rule.query)
+        compiled.tables = frozenset(referenced_tables(compiled.tree))
+        compiled.exists_sql = exists_probe(compiled.tree)
+        compiled.count_sql = count_probe(compiled.tree)
+    except SqlglotError as exc:
+        compiled.error = f"Rule {rule.name} could not be parsed: {exc}"
+        return compiled
+
+    reject = settings.validation.reject_pathological_rules
+    if rule.cost_class in COST_CLASSES and not (rule.cost_class == "pathological" and reject):
+        compiled.cost_class = cast(CostClass, rule.cost_class)
+    else:
+        # Stored before rules were analyzed (or unknown), or the findings are needed for the error
+        analysis = analyze_rule(rule.query, planner)
+        compiled.cost_class = analysis.cost_class
+        if analysis.pathological and reject:
+            compiled.error = f"Rule {rule.name} is pathological and was not run: {'; '.join(analysis.findings)}"
+    return compiled
+
+
+def rules_fingerprint(rules: list[tuple[Rule, list[str]]]) -> str:
+    """A digest of everything about the rules that affects their results."""
+    digest = hashlib.sha256()
+    for rule, db_tables in rules:
+        for part in (rule.id, rule.name, rule.error_message, rule.query, rule.cost_class, *sorted(db_tables)):
+            digest.update(str(part).encode())
+            digest.update(b"\0")
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+def compile_plan(event_type: str, rules: list[tuple[Rule, list[str]]], version: int = 0) -> RulePlan:
+    with RulePlanner() as planner:
+        compiled = [compile_rule(rule, db_tables, planner) for rule, db_tables in rules]
+    parsed = [rule for rule in compiled if rule.tree is not None and rule.error is None]
+    fusion = plan_fusion([rule.rule for rule in parsed], trees=[rule.tree for rule in parsed])
+    projections = plan_projections([(rule.tree, rule.db_tables) for rule in compiled])
+    return RulePlan(event_type=event_type, rules=compiled, fusion=fusion, projections=projections,
+                    fingerprint=rules_fingerprint(rules), version=version)
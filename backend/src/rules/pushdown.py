@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import Scope, build_scope, traverse_scope
+
+# Expressions a pushed down predicate may consist of. They evaluate the same way in MySQL
+# and DuckDB, or (case and accent insensitive collations, PAD SPACE, implicit casts) select
+# a superset of the rows in MySQL, which is safe because DuckDB still applies the rule's full
+# predicate. Negations (<>, NOT) are left out: under those collations they select fewer rows,
+# e.g. `country <> 'fr'` drops the 'FR' rows DuckDB would have kept.
+PUSHABLE_EXPRESSIONS = (
+    exp.Column, exp.Identifier, exp.Literal, exp.Boolean, exp.Null, exp.Paren, exp.Neg,
+    exp.EQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Between, exp.In, exp.Is, exp.Like,
+    exp.And, exp.Or,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class TableProjection:
+    """
+    The part of a DB table the rules of an event type read.
+
+    `columns` are candidate column names (None means every column); names that are not
+    columns of the table are ignored when fetching. `predicate` is a MySQL filter whose
+    rows are a superset of the rows every rule reads (None means every row).
+    """
+
+    table: str
+    columns: Optional[frozenset[str]] = None
+    predicate: Optional[str] = None
+
+
+def _table_sources(scope: Scope) -> dict[str, exp.Table]:
+    return {alias.lower(): source for alias, source in scope.sources.items() if isinstance(source, exp.Table)}
+
+
+def referenced_columns(tree: exp.Expression) -> dict[str, Optional[set[str]]]:
+    """
+    Map every table of a rule (lower-cased) to the columns it reads, or None when it
+    reads every column. Unqualified columns of a scope with several tables are attributed
+    to all of them.
+    """
+    columns: dict[str, Optional[set[str]]] = {}
+
+    def read(table: exp.Table, name: Optional[str]) -> None:
+        key = table.name.lower()
+        if name is None:
+            columns[key] = None
+        elif columns.setdefault(key, set()) is not None:
+            columns[key].add(name.lower())
+
+    for scope in traverse_scope(tree):
+        tables = _table_sources(scope)
+        for table in tables.values():
+            columns.setdefault(table.name.lower(), set())
+
+        if isinstance(scope.expression, exp.Select):
+            for projection in scope.expression.expressions:
+                if isinstance(projection, exp.Star):
+                    for table in tables.values():
+                        read(table, None)
+                elif isinstance(projection, exp.Column) and isinstance(projection.this, exp.Star):
+                    if projection.table.lower() in tables:
+                        read(tables[projection.table.lower()], None)
+
+            for join in scope.expression.args.get("joins") or []:
+                if join.args.get("method"):
+                    for table in tables.values():
+                        read(table, None)
+                for identifier in join.args.get("using") or []:
+                    for table in tables.values():
+                        read(table, identifier.name)
+
+        for column in scope.columns:
+            if column.table:
+                if column.table.lower() in tables:
+                    read(tables[column.table.lower()], column.name)
+            else:
+                for table in tables.values():
+                    read(table, column.name)
+
+    return columns
+
+
+def pushable_predicate(tree: exp.Expression, table_name: str) -> Optional[exp.Expression]:
+    """
+    The conjunction of the WHERE conditions of a rule that only involve `table_name`,
+    with their column qualifiers stripped, or None when the rule's filter on the table
+    cannot be applied before the table is read (outer joins, several references...).
+    """
+    if not isinstance(tree, exp.Select):
+        return None
+    if sum(1 for table in tree.find_all(exp.Table) if table.name.lower() == table_name.lower()) != 1:
+        return None
+
+    scope = build_scope(tree)
+    aliases = {alias for alias, table in _table_sources(scope).items() if table.name.lower() == table_name.lower()}
+    if not aliases:
+        return None
+
+    for join in tree.args.get("joins") or []:
+        if join.args.get("side") or join.args.get("method") or join.args.get("kind") not in (None, "INNER", "CROSS"):
+            return None
+
+    where = tree.args.get("where")
+    if where is None:
+        return None
+
+    only_source = len(scope.sources) == 1
+    # Names the WHERE clause may resolve to an expression of the select list rather than a column
+    projected = {projection.alias.lower() for projection in tree.expressions if isinstance(projection, exp.Alias)}
+    conditions = []
+    for condition in where.this.flatten() if isinstance(where.this, exp.And) else [where.this]:
+        if not all(isinstance(node, PUSHABLE_EXPRESSIONS) for node in condition.walk()):
+            continue
+        condition_columns = list(condition.find_all(exp.Column))
+        if not condition_columns:
+            continue
+        if not all(column.table.lower() in aliases if column.table
+                   else only_source and column.name.lower() not in projected
+                   for column in condition_columns):
+            continue
+
+        condition = condition.copy()
+        for column in condition.find_all(exp.Column):
+            column.set("table", None)
+        conditions.append(condition)
+
+    return exp.and_(*conditions) if conditions else None
+
+
+def plan_projections(rules: list[tuple[Optional[exp.Expression], list[str]]]) -> dict[str, TableProjection]:
+    """
+    Work out, for every DB table, the columns and rows the rules read from it.
+    `rules` pairs each parsed rule (None if it could not be parsed) with its DB tables.
+    """
+    columns: dict[str, Optional[set[str]]] = {}
+    predicates: dict[str, Optional[list[exp.Expression]]] = {}
+    names: dict[str, str] = {}
+
+    for tree, db_tables in rules:
+        try:
+            read = referenced_columns(tree) if tree is not None else {}
+        except SqlglotError:
+            read = {}
+
+        for table in db_tables:
+            key = table.lower()
+            names.setdefault(key, table)
+
+            needed = read.get(key) if tree is not None and key in read else None
+            if needed is None:
+                columns[key] = None
+            elif columns.setdefault(key, set()) is not None:
+                columns[key] |= needed
+
+            try:
+                predicate = pushable_predicate(tree, table) if tree is not None else None
+            except SqlglotError:
+                predicate = None
+            if predicate is None:
+                predicates[key] = None
+            elif predicates.setdefault(key, []) is not None:
+                predicates[key].append(predicate)
+
+    projections = {}
+    for key, table in names.items():
+        needed = columns.get(key)
+        filters = predicates.get(key)
+        predicate = exp.or_(*filters).sql(dialect="mysql") if filters else None
+        projections[table] = TableProjection(
+            table=table,
+            columns=frozenset(needed) if needed is not None else None,
+            predicate=predicate,
+        )
+    return projections
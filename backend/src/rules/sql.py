@@ -0,0 +1,54 @@
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ErrorLevel, ParseError
+
+DIALECT = "duckdb"
+
+
+def parse_rule(query: str | exp.Expression) -> exp.Expression:
+    """Parse a rule query written in the DuckDB dialect."""
+    if isinstance(query, exp.Expression):
+        return query
+    return sqlglot.parse_one(query, read=DIALECT)
+
+
+def check_rule(query: str) -> tuple[Optional[exp.Query], Optional[str]]:
+    """The parsed query of a rule, or why it can't run as a rule when it isn't a single SELECT."""
+    try:
+        trees = sqlglot.parse(query, read=DIALECT, error_level=ErrorLevel.RAISE)
+    except ParseError as exc:
+        return None, f"Invalid SQL: {exc.errors[0]['description'] if exc.errors else exc}"
+    trees = [tree for tree in trees if tree is not None]
+    if len(trees) != 1:
+        return None, f"Expected a single statement, got {len(trees)}"
+    if not isinstance(trees[0], exp.Query):
+        return None, f"Expected a SELECT statement, got {trees[0].key.upper()}"
+    return trees[0], None
+
+
+def referenced_tables(query: str | exp.Expression) -> set[str]:
+    """Return the names of the tables a rule reads from, excluding its own CTEs."""
+    tree = parse_rule(query)
+    ctes = {cte.alias_or_name for cte in tree.find_all(exp.CTE)}
+    return {table.name for table in tree.find_all(exp.Table) if table.name and table.name not in ctes}
+
+
+def _from_rule(query: str | exp.Expression) -> exp.Subquery:
+    return parse_rule(query).subquery("_rule")
+
+
+def exists_probe(query: str | exp.Expression) -> str:
+    """Rewrite a rule so that it stops at the first invalid row."""
+    return exp.select("1").from_(_from_rule(query)).limit(1).sql(dialect=DIALECT)
+
+
+def count_probe(query: str | exp.Expression) -> str:
+    """Rewrite a rule so that it only counts its invalid rows."""
+    return exp.select(exp.Count(this=exp.Star())).from_(_from_rule(query)).sql(dialect=DIALECT)
+
+
+def sample_query(query: str | exp.Expression, limit: int) -> str:
+    """Rewrite a rule so that it returns at most `limit` invalid rows."""
+    return exp.select("*").from_(_from_rule(query)).limit(limit).sql(dialect=DIALECT)
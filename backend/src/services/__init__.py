@@ -1,4 +1,6 @@
 from .db_service import DbService
 from .google_sheets_service import GoogleSheetsService
-from .validation_service import ValidationService
+from .ingestion_service import IngestionService
+from .rule_executor import RuleExecutor, RuleResult
+from .validation_service import ValidationService, ValidationServiceDep, get_validation_service
 from .auth_service import AuthService, AuthServiceDep
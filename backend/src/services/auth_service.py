@@ -2,12 +2,17 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated, Optional
 
 import jwt
+from jwt.exceptions import InvalidTokenError
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from pwdlib import PasswordHash
+from loguru import logger
+from python_sdk.utils import Crypto
 
+from ..auth.revocation import revocation_list
 from ..conf import settings
 from ..users.crud import UserCRUD
+from ..users.models import User, UserUpdate
+from .password_hasher import PasswordHasher, password_hasher
 
 
 class AuthService(object):
@@ -15,20 +20,25 @@ class AuthService(object):
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
     def __init__(self) -> None:
-        self.password_hash = PasswordHash.recommended()
+        self.password_hasher: PasswordHasher = password_hasher
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.password_hash.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
-        return self.password_hash.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await self.password_hasher.hash(password)
 
     async def authenticate_user(self, email: str, password: str):
         user = await UserCRUD.get_by_email(email)
         if not user:
             return False
-        if not self.verify_password(password, user.password):
+        valid, updated_hash = await self.password_hasher.verify_and_update(password, user.password)
+        if not valid:
             return False
+        if updated_hash is not None:
+            # The hashing parameters changed since the password was set, store it with the current ones
+            logger.info(f"Rehashing the password of user {user.id}")
+            user = await UserCRUD.update_one(user.id, UserUpdate(password=updated_hash))
         return user
 
     @staticmethod
@@ -38,19 +48,35 @@ class AuthService(object):
             expire = datetime.now(timezone.utc) + expires_delta
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=settings.auth.expires_in_minutes)
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": Crypto.uuidv7()})
         encoded_jwt = jwt.encode(to_encode, settings.auth.secret.get_secret_value(), algorithm=settings.auth.algorithm)
         return encoded_jwt
 
+    @staticmethod
+    async def user_claims(user: User) -> dict:
+        """The claims identifying a user in its access tokens, so that requests need no lookup to know them."""
+        # The token generation must be the one other processes revoke against
+        await revocation_list.start()
+        return {"sub": str(user.email), "uid": user.id, "disabled": user.disabled,
+                "gen": revocation_list.generation(user.id)}
+
     @staticmethod
     def decode_jwt(token: str) -> dict:
-        decoded_token = jwt.decode(token, settings.auth.secret.get_secret_value(), algorithms=[settings.auth.algorithm])
-        return decoded_token if decoded_token["exp"] >= datetime.now(timezone.utc).timestamp() else None
+        """The claims of a token; raises `InvalidTokenError` for a bad signature or an expired token."""
+        return jwt.decode(
+            token,
+            settings.auth.secret.get_secret_value(),
+            algorithms=[settings.auth.algorithm],
+            options={"require": ["exp", "sub", "jti"]},
+        )
 
     @staticmethod
     def is_token_valid(token: str) -> bool:
-        decoded_token = jwt.decode(token, settings.auth.secret.get_secret_value(), algorithms=[settings.auth.algorithm])
-        return decoded_token["exp"] >= datetime.now(timezone.utc).timestamp()
+        try:
+            AuthService.decode_jwt(token)
+            return True
+        except InvalidTokenError:
+            return False
 
 
 AuthServiceDep = Annotated[AuthService, Depends(AuthService)]
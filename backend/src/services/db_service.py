@@ -1,15 +1,50 @@
-import pandas as pd
-from sqlalchemy import inspect
+import time
+from contextlib import suppress
+from typing import Any, Hashable, Optional
 
-from ..db import engine
+import pyarrow as pa
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlglot.errors import SqlglotError
+
+from ..conf import settings
+from ..db import MySQLColumn, connection, engine, reader
+from ..rules.crud import RuleCRUD, RuleSet
 from ..rules.models import Rule
+from ..rules.pushdown import TableProjection
+from ..rules.sql import referenced_tables
+from .table_cache import TableSnapshot, TableSnapshotCache, table_snapshot_cache
 
 
 class DbService(object):
 
+    def __init__(self, cache: Optional[TableSnapshotCache] = None) -> None:
+        self.cache: TableSnapshotCache = cache or table_snapshot_cache
+
+    async def get_rule_set(self, event_type: str) -> RuleSet:
+        return await RuleCRUD.get_rule_set(event_type)
+
+    async def get_validation_rules(self, event_type: str,
+                                   rule_set: Optional[RuleSet] = None) -> list[tuple[Rule, list[str]]]:
+        """
+        The rules of an event type, each with the DB tables it reads: the tables it references
+        that exist in MySQL. The others are sheet tabs.
+        """
+        rule_set = rule_set or await self.get_rule_set(event_type)
+        if not rule_set.rules:
+            return []
 
-    async def get_validation_rules(self, event_type: str) -> dict[Rule, list[str]]:
-        ...
+        table_names = {name.lower(): name for name in await self.get_table_names()}
+        rules = []
+        for rule in rule_set.rules:
+            try:
+                tables = referenced_tables(rule.query)
+            except SqlglotError:
+                # Reported as a rule error when the plan is compiled
+                tables = set()
+            rules.append((rule, sorted(table_names[table.lower()] for table in tables
+                                       if table.lower() in table_names)))
+        return rules
 
     @classmethod
     async def get_table_names(cls, schema: str = "backend") -> list[str]:
@@ -18,5 +53,95 @@ class DbService(object):
                 lambda sync_conn: inspect(sync_conn).get_table_names(schema=schema)
             )
 
-    async def get_all(self, table_name: str) -> pd.DataFrame:
-        ...
+    async def get_all(self, table_name: str, projection: Optional[TableProjection] = None) -> pa.Table:
+        """
+        Return the table, or only the columns and rows of `projection`, as an Arrow table.
+        It comes from the snapshot cache when the table has not changed since it was cached.
+        """
+        if not self.cache.max_bytes:
+            return await self.fetch_table(table_name, projection)
+
+        key = (table_name, projection)
+        async with self.cache.lock(key):
+            snapshot = self.cache.get(key)
+            if snapshot is not None and snapshot.is_fresh(settings.mysql.snapshot_freshness_interval):
+                self.cache.hits += 1
+                return snapshot.table
+
+            version = await self.get_table_version(table_name)
+            if snapshot is not None and snapshot.version == version:
+                snapshot.checked_at = time.monotonic()
+                self.cache.hits += 1
+                return snapshot.table
+
+            self.cache.misses += 1
+            table = await self.fetch_table(table_name, projection)
+            self.cache.put(key, TableSnapshot(table=table, version=version))
+            return table
+
+    async def get_table_version(self, table_name: str) -> Hashable:
+        """
+        A cheap fingerprint of the table contents: its last update time and row count
+        from information_schema, or its checksum when MySQL does not track the update time.
+
+        The update time only has a one-second resolution and the row count is an estimate,
+        so a table updated within the last second could still change without its version
+        changing: its checksum is its version until the second has passed. CHECKSUM TABLE
+        scans the whole table, so the checksum of a table without an update time is reused
+        for `checksum_ttl` seconds.
+        """
+        async with connection() as conn:
+            # MySQL 8 caches information_schema statistics for a day unless told otherwise,
+            # older servers and MariaDB don't cache them and don't know the variable.
+            with suppress(DBAPIError):
+                await conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+
+            row = (await conn.execute(
+                text(
+                    "SELECT UPDATE_TIME, TABLE_ROWS, UPDATE_TIME >= NOW() - INTERVAL 1 SECOND AS RECENT "
+                    "FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+                ),
+                {"table_name": table_name},
+            )).one_or_none()
+
+            if row is None or row.UPDATE_TIME is None:
+                checksum = self.cache.checksum(table_name, settings.mysql.checksum_ttl)
+                if checksum is None:
+                    checksum = await self.checksum(conn, table_name)
+                    self.cache.put_checksum(table_name, checksum)
+                return "checksum", checksum
+
+            if row.RECENT:
+                return "checksum", await self.checksum(conn, table_name)
+
+            return row.UPDATE_TIME, row.TABLE_ROWS
+
+    async def checksum(self, conn: Any, table_name: str) -> Hashable:
+        return (await conn.execute(text(f"CHECKSUM TABLE {self.quote(table_name)}"))).one()[1]
+
+    async def get_table_columns(self, table_name: str) -> list[MySQLColumn]:
+        return await reader.get_columns(table_name)
+
+    def select_statement(self, table_name: str, columns: list[MySQLColumn],
+                         projection: Optional[TableProjection] = None) -> str:
+        """Build the SELECT that fetches a table projection, keeping only columns the table has."""
+        selected = "*"
+        if projection is not None and projection.columns is not None:
+            names = [column.name for column in columns]
+            kept = [name for name in names if name.lower() in projection.columns] or names[:1]
+            selected = ", ".join(self.quote(name) for name in kept)
+
+        statement = f"SELECT {selected} FROM {self.quote(table_name)}"
+        if projection is not None and projection.predicate:
+            statement += f" WHERE {projection.predicate}"
+        return statement
+
+    async def fetch_table(self, table_name: str, projection: Optional[TableProjection] = None) -> pa.Table:
+        """Stream the table projection from MySQL into an Arrow table typed after the MySQL columns."""
+        columns = await self.get_table_columns(table_name)
+        return await reader.read(self.select_statement(table_name, columns, projection), columns)
+
+    @staticmethod
+    def quote(table_name: str) -> str:
+        return engine.dialect.identifier_preparer.quote_identifier(table_name)
@@ -1,7 +1,245 @@
-import pandas as pd
+import asyncio
+import re
+from typing import Iterable, Iterator, Optional
+from urllib.parse import quote
+
+import httpx
+import pyarrow as pa
+from loguru import logger
+
+from ..conf import settings
+from .ingestion_service import IngestionService
+from .sheet_cache import CachedTab, SheetCache, sheet_cache
+from .sheet_values import ValueRangeDecoder, ValueRows
+
+SPREADSHEET_ID_PATTERN = re.compile(r"/spreadsheets/d/([a-zA-Z0-9_-]+)")
 
 
 class GoogleSheetsService(object):
+    """
+    Reads spreadsheet tabs through the Google Sheets API, keeping a local copy of every tab.
+
+    The spreadsheet's Drive revision is checked first: tabs cached at the current revision
+    come from the local cache without further requests. The other tabs are downloaded in one
+    batched request (a single cached tab is requested with the ETag of its copy instead), and
+    only the tabs whose content changed are written to the cache again. Response bodies are
+    decoded and parsed row by row as they arrive (see `ValueRangeDecoder`), in worker threads,
+    off the event loop.
+    """
+
+    def __init__(self, cache: Optional[SheetCache] = None, client: Optional[httpx.AsyncClient] = None,
+                 ingestion: Optional[IngestionService] = None) -> None:
+        self.cache: SheetCache = cache or sheet_cache
+        self.ingestion: IngestionService = ingestion or IngestionService()
+        self.client: httpx.AsyncClient = client or httpx.AsyncClient(timeout=settings.google_sheets.timeout)
+
+    @staticmethod
+    def spreadsheet_id(url: str) -> str:
+        match = SPREADSHEET_ID_PATTERN.search(url)
+        if match:
+            return match.group(1)
+        if re.fullmatch(r"[a-zA-Z0-9_-]+", url):
+            return url
+        raise ValueError(f"Not a Google Sheets URL: {url}")
+
+    @staticmethod
+    def select_tabs(titles: list[str], tabs: Optional[Iterable[str]]) -> list[str]:
+        """The titles among `titles` named in `tabs`, compared case-insensitively like SQL identifiers."""
+        if tabs is None:
+            return list(titles)
+        wanted = {tab.lower() for tab in tabs}
+        return [title for title in titles if title.lower() in wanted]
+
+    async def fetch_sheet_data(self, url: str, tabs: Optional[Iterable[str]] = None,
+                               revision: Optional[str] = None) -> dict[str, pa.Table]:
+        """
+        Return the tabs of the spreadsheet by title, or only those named in `tabs`
+        (tab names the spreadsheet doesn't have are ignored). `revision` is the spreadsheet's
+        Drive revision when the caller already read it (see `get_revision`), else it is read here.
+        """
+        spreadsheet_id = self.spreadsheet_id(url)
+        if tabs is not None:
+            tabs = list(tabs)
+            if not tabs:
+                return {}
+
+        async with self.cache.lock(spreadsheet_id):
+            metadata = self.cache.metadata(spreadsheet_id)
+            version = revision if revision is not None else await self.get_revision(spreadsheet_id)
+
+            if version is None or version != metadata.version or not metadata.titles:
+                metadata.titles = await self.get_tab_titles(spreadsheet_id)
+                metadata.version = version
+
+            tables: dict[str, pa.Table] = {}
+            stale: list[str] = []
+            for title in self.select_tabs(metadata.titles, tabs):
+                cached = metadata.tabs.get(title)
+                table = self.cache.load(spreadsheet_id, cached) \
+                    if cached is not None and version is not None and cached.version == version else None
+                if table is None:
+                    stale.append(title)
+                else:
+                    tables[title] = table
+
+            revalidated = [title for title in stale if title in metadata.tabs]
+            if len(stale) == 1 and revalidated:
+                # A conditional request answers an unchanged tab without sending it
+                fetched = {stale[0]: await self.fetch_tab(spreadsheet_id, stale[0], metadata.tabs[stale[0]], version)}
+            else:
+                # One request for every stale tab; those whose content didn't change keep their cached copy
+                fetched = await self.fetch_tabs(spreadsheet_id, stale, version, cached=metadata.tabs)
+
+            for title, result in fetched.items():
+                metadata.tabs[title], tables[title] = result
+
+            if stale:
+                logger.debug(
+                    f"Spreadsheet {spreadsheet_id} at revision {version}: {len(tables) - len(stale)} tabs from cache, "
+                    f"{len(revalidated)} revalidated, {len(stale) - len(revalidated)} downloaded"
+                )
+            metadata.tabs = {title: tab for title, tab in metadata.tabs.items() if title in metadata.titles}
+            await asyncio.to_thread(self.cache.save_metadata, spreadsheet_id, metadata)
+
+            return {title: tables[title] for title in self.select_tabs(metadata.titles, tabs)}
+
+    def tab_versions(self, url: str, revision: Optional[str],
+                     tabs: Optional[Iterable[str]] = None) -> Optional[dict[str, str]]:
+        """
+        The ETags of the tabs (or of those named in `tabs`) at the spreadsheet's `revision`
+        (see `get_revision`), or None when the revision is unknown or a tab was not read at it,
+        i.e. without a fetch there is no telling what the tabs hold.
+        """
+        metadata = self.cache.metadata(self.spreadsheet_id(url))
+        if revision is None or revision != metadata.version:
+            return None
+
+        versions = {}
+        for title in self.select_tabs(metadata.titles, tabs):
+            cached = metadata.tabs.get(title)
+            if cached is None or cached.version != revision:
+                return None
+            versions[title] = cached.etag
+        return versions
+
+    async def get_revision(self, spreadsheet_id: str) -> Optional[str]:
+        """The Drive version of the spreadsheet, which changes with every edit, or None if unavailable."""
+        try:
+            response = await self.client.get(
+                f"{settings.google_sheets.drive_url}/files/{spreadsheet_id}",
+                params=self.params(fields="version", supportsAllDrives="true"),
+            )
+            response.raise_for_status()
+            return str(response.json()["version"])
+        except (httpx.HTTPError, KeyError, ValueError) as exc:
+            logger.debug(f"Could not read the revision of spreadsheet {spreadsheet_id}: {exc}")
+            return None
+
+    async def get_tab_titles(self, spreadsheet_id: str) -> list[str]:
+        response = await self.client.get(
+            f"{settings.google_sheets.sheets_url}/spreadsheets/{spreadsheet_id}",
+            params=self.params(fields="sheets.properties.title"),
+        )
+        response.raise_for_status()
+        return [sheet["properties"]["title"] for sheet in response.json().get("sheets", [])]
+
+    async def fetch_tab(self, spreadsheet_id: str, title: str, cached: Optional[CachedTab] = None,
+                        version: Optional[str] = None) -> tuple[CachedTab, pa.Table]:
+        """Download a tab unless it matches its cached copy, and return its cache entry and contents."""
+        headers = {"If-None-Match": cached.etag} if cached is not None else {}
+        async with self.client.stream(
+            "GET",
+            f"{settings.google_sheets.sheets_url}/spreadsheets/{spreadsheet_id}/values/{quote(self.a1_range(title), safe='')}",
+            params=self.params(majorDimension="ROWS", valueRenderOption="FORMATTED_VALUE"),
+            headers=headers,
+        ) as response:
+            if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+                table = await asyncio.to_thread(self.cache.load, spreadsheet_id, cached)
+                if table is not None:
+                    cached.version = version
+                    return cached, table
+            else:
+                response.raise_for_status()
+                etag = response.headers.get("ETag")
+                # The body is decoded and parsed in a worker thread as it arrives, off the event loop
+                decoder = ValueRangeDecoder(self.body_chunks(response))
+                return await asyncio.to_thread(
+                    lambda: self.ingest(spreadsheet_id, title, decoder.value_range(), cached, version, etag=etag)
+                )
+        return await self.fetch_tab(spreadsheet_id, title, version=version)
+
+    async def fetch_tabs(self, spreadsheet_id: str, titles: list[str], version: Optional[str] = None,
+                         cached: Optional[dict[str, CachedTab]] = None) -> dict[str, tuple[CachedTab, pa.Table]]:
+        """
+        Download several tabs with a single batched request. Tabs whose content is that of their
+        copy in `cached` keep it rather than being written to the cache again.
+        """
+        if not titles:
+            return {}
+        cached = cached or {}
+
+        async with self.client.stream(
+            "GET",
+            f"{settings.google_sheets.sheets_url}/spreadsheets/{spreadsheet_id}/values:batchGet",
+            params=[
+                *self.params(majorDimension="ROWS", valueRenderOption="FORMATTED_VALUE").items(),
+                *(("ranges", self.a1_range(title)) for title in titles),
+            ],
+        ) as response:
+            response.raise_for_status()
+            decoder = ValueRangeDecoder(self.body_chunks(response))
+
+            def ingest_all() -> dict[str, tuple[CachedTab, pa.Table]]:
+                # Value ranges come back in the order of the requested ranges
+                return {
+                    title: self.ingest(spreadsheet_id, title, rows, cached.get(title), version)
+                    for title, rows in zip(titles, decoder.value_ranges(), strict=True)
+                }
+
+            return await asyncio.to_thread(ingest_all)
+
+    def ingest(self, spreadsheet_id: str, title: str, rows: ValueRows, cached: Optional[CachedTab] = None,
+               version: Optional[str] = None, etag: Optional[str] = None) -> tuple[CachedTab, pa.Table]:
+        """
+        Parse the rows of a downloaded tab as they are decoded, and return its cache entry and
+        contents. A tab whose content didn't change keeps its cached copy; others are written to
+        the cache. Blocking, called in a worker thread.
+        """
+        table = self.ingestion.from_rows((spreadsheet_id, title), rows)
+        if cached is not None and cached.digest == rows.digest:
+            cached.version = version
+            if etag is not None:
+                cached.etag = etag
+            return cached, table
+
+        # Not every server sends ETags, the digest of the values tells unchanged tabs apart just as well
+        tab = self.cache.store(spreadsheet_id, title, table, etag or rows.digest, version, digest=rows.digest)
+        return tab, table
+
+    @staticmethod
+    def body_chunks(response: httpx.Response) -> Iterator[bytes]:
+        """
+        The body of a streamed response, for a worker thread to read while the event loop of the
+        caller receives it. Chunks are coalesced, each one costs a round trip to the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = response.aiter_bytes(chunk_size=1 << 16)
+
+        async def next_chunk() -> Optional[bytes]:
+            return await anext(chunks, None)
+
+        def read() -> Iterator[bytes]:
+            while (chunk := asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()) is not None:
+                yield chunk
+
+        return read()
+
+    @staticmethod
+    def a1_range(title: str) -> str:
+        return "'{}'".format(title.replace("'", "''"))
 
-    async def fetch_sheet_data(self, url: str) -> dict[str, pd.DataFrame]:
-        ...
+    @staticmethod
+    def params(**params: str) -> dict[str, str]:
+        if settings.google_sheets.api_key is not None:
+            params["key"] = settings.google_sheets.api_key.get_secret_value()
+        return params
@@ -0,0 +1,222 @@
+import csv
+import threading
+from collections import OrderedDict
+from itertools import batched
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from loguru import logger
+
+from ..conf import settings
+
+# The types a string column is tried as, in order. The first one every value casts to wins.
+CANDIDATE_TYPES: tuple[pa.DataType, ...] = (pa.int64(), pa.float64(), pa.bool_(), pa.date32(), pa.timestamp("us"))
+
+# Values such as zip codes or IDs with leading zeros are identifiers, not numbers
+LEADING_ZERO_PATTERN = r"^[+-]?0[0-9]"
+
+
+def column_names(headers: Sequence[Any]) -> list[str]:
+    """Column names for a header row: blank headers get a positional name, duplicates a suffix."""
+    names: list[str] = []
+    for index, header in enumerate(headers):
+        name = str(header).strip() if header is not None else ""
+        name = name or f"column_{index + 1}"
+        unique, suffix = name, 1
+        while unique in names:
+            unique, suffix = f"{name}_{suffix}", suffix + 1
+        names.append(unique)
+    return names
+
+
+def rows_to_batch(rows: Sequence[Sequence[Any]], names: list[str]) -> pa.RecordBatch:
+    """
+    A record batch of string columns. Sheets omits trailing empty cells, so short rows are
+    padded with nulls, and empty cells are nulls too.
+    """
+    columns: list[list[Optional[str]]] = [[] for _ in names]
+    for row in rows:
+        for index, column in enumerate(columns):
+            value = row[index] if index < len(row) else None
+            column.append(None if value is None or value == "" else str(value))
+    return pa.RecordBatch.from_arrays([pa.array(column, type=pa.string()) for column in columns], names=names)
+
+
+def infer_type(array: pa.Array) -> pa.DataType:
+    if array.null_count == len(array):
+        return pa.string()
+    numeric = not pc.any(pc.match_substring_regex(array, LEADING_ZERO_PATTERN)).as_py()
+    for candidate in CANDIDATE_TYPES:
+        if not numeric and (pa.types.is_integer(candidate) or pa.types.is_floating(candidate)):
+            continue
+        try:
+            pc.cast(array, candidate)
+            return candidate
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return pa.string()
+
+
+def infer_schema(batch: pa.RecordBatch) -> pa.Schema:
+    return pa.schema([
+        pa.field(name, infer_type(column)) for name, column in zip(batch.schema.names, batch.columns, strict=True)
+    ])
+
+
+class SchemaCache(object):
+    """
+    An LRU cache of the schemas inferred for sheet tabs and CSV files, so each one is inferred once.
+    Tabs are parsed in worker threads, so the cache is guarded by a lock.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._schemas: OrderedDict[Hashable, pa.Schema] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, names: Optional[list[str]] = None) -> Optional[pa.Schema]:
+        """The cached schema of `key`, unless its columns are no longer `names`."""
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is None:
+                return None
+            if names is not None and schema.names != names:
+                self._schemas.pop(key)
+                return None
+            self._schemas.move_to_end(key)
+            return schema
+
+    def put(self, key: Hashable, schema: pa.Schema) -> None:
+        with self._lock:
+            self._schemas[key] = schema
+            self._schemas.move_to_end(key)
+            while len(self._schemas) > self.max_size:
+                self._schemas.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(key, None)
+
+
+class IngestionService(object):
+    """
+    Turns sheet tabs and CSV exports into typed Arrow tables.
+
+    Rows are converted a batch at a time. The schema of a source is inferred from its first
+    batch the first time it is read and cached; later reads cast straight to it. A column
+    that stops casting to its type (a value that doesn't fit anymore) falls back to strings,
+    holding the text of its cells as they were read in every batch.
+    """
+
+    def __init__(self, schemas: Optional[SchemaCache] = None, batch_size: Optional[int] = None,
+                 infer_types: Optional[bool] = None) -> None:
+        self.schemas: SchemaCache = schemas or schema_cache
+        self.batch_size = batch_size or settings.ingestion.batch_size
+        self.infer_types = settings.ingestion.infer_types if infer_types is None else infer_types
+
+    def from_rows(self, key: Hashable, values: Iterable[Sequence[Any]]) -> pa.Table:
+        """
+        A table from rows of cell values, the first row holding the headers (the Sheets API layout).
+        Rows are read a batch at a time, so `values` can be a stream of rows that is never held whole.
+        """
+        rows = iter(values)
+        headers = next(rows, None)
+        if headers is None:
+            return pa.table({})
+
+        names = column_names(headers)
+        batches = (rows_to_batch(batch, names) for batch in batched(rows, self.batch_size, strict=False))
+        return self.typed_table(key, names, batches)
+
+    def from_csv(self, path: Path | str, key: Optional[Hashable] = None) -> pa.Table:
+        """A table from a CSV file with a header row, parsed a block at a time."""
+        path = Path(path)
+        key = key or str(path.resolve())
+        with path.open(newline="", encoding="utf-8-sig") as file:
+            names = column_names(next(csv.reader(file), []))
+        if not names:
+            return pa.table({})
+
+        schema = self.schemas.get(key, names) if self.infer_types else None
+        if schema is not None:
+            try:
+                return self.read_csv(path, schema).read_all()
+            except pa.ArrowInvalid as exc:
+                logger.debug(f"{path} no longer matches its cached schema, inferring it again: {exc}")
+                self.schemas.invalidate(key)
+
+        strings = pa.schema([pa.field(name, pa.string()) for name in names])
+        return self.typed_table(key, names, self.read_csv(path, strings))
+
+    def from_csv_dir(self, directory: Path | str) -> dict[str, pa.Table]:
+        """Every CSV export of a directory, keyed by file name without the extension (the tab name)."""
+        return {path.stem: self.from_csv(path) for path in sorted(Path(directory).glob("*.csv"))}
+
+    def read_csv(self, path: Path, schema: pa.Schema) -> pa_csv.CSVStreamingReader:
+        return pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(
+                column_names=schema.names,
+                skip_rows=1,
+                block_size=max(self.batch_size * 64, 1 << 20),
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema,
+                strings_can_be_null=True,
+                true_values=["TRUE", "True", "true"],
+                false_values=["FALSE", "False", "false"],
+            ),
+        )
+
+    def typed_table(self, key: Hashable, names: list[str], batches: Iterable[pa.RecordBatch]) -> pa.Table:
+        """Cast batches of string columns to the schema of `key`, inferring it from the first batch if needed."""
+        if not self.infer_types:
+            strings = pa.schema([pa.field(name, pa.string()) for name in names])
+            return pa.Table.from_batches(list(batches), schema=strings)
+
+        schema = self.schemas.get(key, names)
+        # The string batches are kept until the schema is final, a column falling back to strings takes them
+        raw: list[pa.RecordBatch] = []
+        typed: list[pa.RecordBatch] = []
+        for batch in batches:
+            if schema is None:
+                schema = infer_schema(batch)
+            schema = self.cast(batch, schema, typed, raw)
+
+        if schema is None:
+            schema = pa.schema([pa.field(name, pa.string()) for name in names])
+        self.schemas.put(key, schema)
+        return pa.Table.from_batches(typed, schema=schema)
+
+    @staticmethod
+    def cast(batch: pa.RecordBatch, schema: pa.Schema, typed: list[pa.RecordBatch],
+             raw: list[pa.RecordBatch]) -> pa.Schema:
+        """
+        Cast `batch` to `schema` and append it to `typed`, and the batch itself to `raw`. Columns
+        that don't cast become string columns, in the batches already cast too, which take them
+        back from `raw` rather than formatting the typed values; the resulting schema is returned.
+        """
+        columns = []
+        for index, (column, field) in enumerate(zip(batch.columns, schema, strict=True)):
+            try:
+                columns.append(pc.cast(column, field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                schema = schema.set(index, pa.field(field.name, pa.string()))
+                typed[:] = [
+                    previous.set_column(index, field.name, original.column(index))
+                    for previous, original in zip(typed, raw, strict=True)
+                ]
+                columns.append(column)
+
+        typed.append(pa.RecordBatch.from_arrays(columns, schema=schema))
+        raw.append(batch)
+        return schema
+
+
+schema_cache: SchemaCache = SchemaCache(max_size=settings.ingestion.schema_cache_size)
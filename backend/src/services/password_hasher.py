@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from ..conf import settings
+
+
+class PasswordHasher(object):
+    """
+    Hashes and verifies passwords in a bounded pool of threads, so that Argon2 (which
+    releases the GIL) doesn't block the event loop.
+
+    At most `workers` operations run at once and `queue_size` more wait for a thread;
+    beyond that requests are turned away with a 429 rather than queued without bound.
+    """
+
+    def __init__(self, password_hash: PasswordHash, workers: int, queue_size: int) -> None:
+        self.password_hash = password_hash
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        # Only touched from the event loop, so the counter needs no lock
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many password operations in progress, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.password_hash.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(self.password_hash.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """Whether the password matches, and its new hash when the stored one uses outdated parameters."""
+        return await self.run(self.password_hash.verify_and_update, password, hashed_password)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.auth.argon2_time_cost,
+            memory_cost=settings.auth.argon2_memory_cost,
+            parallelism=settings.auth.argon2_parallelism,
+        ),
+    )),
+    workers=settings.auth.hash_workers,
+    queue_size=settings.auth.hash_queue_size,
+)
@@ -0,0 +1,193 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from ..conf import settings
+from ..validations.models import ResultCacheStats, ValidateResponse
+
+
+class ResultCache(object):
+    """
+    Validation results keyed by a fingerprint of everything they depend on.
+
+    Backends keep at most `max_entries` results and `max_bytes` of serialized results,
+    evicting the least recently used ones first.
+    """
+
+    backend = "none"
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[ValidateResponse]:
+        value = await self.load(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ValidateResponse.model_validate_json(value)
+
+    async def put(self, key: str, response: ValidateResponse) -> None:
+        value = response.model_dump_json().encode()
+        if len(value) > self.max_bytes:
+            return
+        await self.store(key, value)
+
+    async def load(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def store(self, key: str, value: bytes) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+    async def size(self) -> tuple[int, int]:
+        """The number of cached results and their total size in bytes."""
+        return 0, 0
+
+    async def stats(self) -> ResultCacheStats:
+        entries, nbytes = await self.size()
+        return ResultCacheStats(
+            backend=self.backend, entries=entries, bytes=nbytes,
+            hits=self.hits, misses=self.misses, evictions=self.evictions,
+        )
+
+
+class MemoryResultCache(ResultCache):
+    """Results kept in this process."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        super().__init__(max_entries, max_bytes)
+        self._values: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+
+    async def load(self, key: str) -> Optional[bytes]:
+        value = self._values.get(key)
+        if value is not None:
+            self._values.move_to_end(key)
+        return value
+
+    async def store(self, key: str, value: bytes) -> None:
+        previous = self._values.pop(key, None)
+        self._bytes -= len(previous) if previous is not None else 0
+        self._values[key] = value
+        self._bytes += len(value)
+
+        while len(self._values) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._values.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    async def clear(self) -> None:
+        self._values.clear()
+        self._bytes = 0
+
+    async def size(self) -> tuple[int, int]:
+        return len(self._values), self._bytes
+
+
+class SqliteResultCache(ResultCache):
+    """Results kept in a SQLite file, shared by the API and worker processes of a host."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path, max_entries: int, max_bytes: int) -> None:
+        super().__init__(max_entries, max_bytes)
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS validation_results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_validation_results_accessed_at ON validation_results (accessed_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _load(self, key: str) -> Optional[bytes]:
+        conn = self._connection()
+        row = conn.execute("SELECT value FROM validation_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE validation_results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def _store(self, key: str, value: bytes) -> int:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO validation_results (key, value, size, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "accessed_at = excluded.accessed_at",
+                (key, value, len(value), time.time()),
+            )
+            entries, nbytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM validation_results").fetchone()
+
+            evicted = 0
+            for evicted_key, size in conn.execute(
+                    "SELECT key, size FROM validation_results ORDER BY accessed_at").fetchall():
+                if entries <= self.max_entries and nbytes <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM validation_results WHERE key = ?", (evicted_key,))
+                entries, nbytes, evicted = entries - 1, nbytes - size, evicted + 1
+        return evicted
+
+    async def load(self, key: str) -> Optional[bytes]:
+        try:
+            return await asyncio.to_thread(self._load, key)
+        except sqlite3.Error as exc:
+            logger.warning(f"Reading the result cache {self.path} failed: {exc}")
+            return None
+
+    async def store(self, key: str, value: bytes) -> None:
+        try:
+            self.evictions += await asyncio.to_thread(self._store, key, value)
+        except sqlite3.Error as exc:
+            logger.warning(f"Writing the result cache {self.path} failed: {exc}")
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(lambda: self._connection().execute("DELETE FROM validation_results"))
+
+    async def size(self) -> tuple[int, int]:
+        def size() -> tuple[int, int]:
+            return self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM validation_results"
+            ).fetchone()
+
+        return await asyncio.to_thread(size)
+
+
+def create_result_cache() -> ResultCache:
+    validation = settings.validation
+    if validation.result_cache == "memory":
+        return MemoryResultCache(validation.result_cache_entries, validation.result_cache_bytes)
+    if validation.result_cache == "sqlite":
+        return SqliteResultCache(validation.result_cache_path, validation.result_cache_entries,
+                                 validation.result_cache_bytes)
+    return ResultCache(validation.result_cache_entries, validation.result_cache_bytes)
+
+
+result_cache: ResultCache = create_result_cache()
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Optional, TypeVar
+
+import duckdb
+from loguru import logger
+
+from ..conf import settings
+from ..db.duckdb_client import DuckDBContext
+from ..rules.fusion import FusedScan, FusionPlan
+from ..rules.models import Rule
+from ..rules.plan import CompiledRule, RulePlan
+from ..rules.sql import sample_query
+
+T = TypeVar("T")
+
+# The pooled connections share one DuckDB database, which runs all their queries on its own
+# `duckdb.threads` threads: more rules in flight than that would only queue inside DuckDB. How many
+# rules of one validation run at once is bounded by the validation (see `RuleExecutor`).
+executor = ThreadPoolExecutor(max_workers=settings.duckdb.threads, thread_name_prefix="rule-executor")
+
+
+@dataclass(slots=True)
+class RuleResult:
+    rule: Rule
+    failed: bool
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    invalid_rows_count: Optional[int] = None
+    sample: list[dict[str, Any]] = field(default_factory=list)
+    fused: bool = False
+
+
+class RuleExecutor(object):
+    """
+    Runs the rules of one validation concurrently on child cursors of its DuckDB context.
+
+    DuckDB releases the GIL while executing, so rules run in parallel on a shared thread pool.
+    A validation runs at most `parallelism` rules at once, one per cursor it checks out of its
+    own queue of cursors, each one is interrupted `timeout` seconds after it starts, and results
+    are returned in the order the rules were given.
+
+    Rules are never fetched in full: in "exists" mode a rule stops at its first invalid row,
+    in "count" mode only the number of invalid rows is returned. With `detail`, a failed rule
+    additionally returns a sample of at most `sample_size` invalid rows.
+
+    With `fuse`, the fused scans of the plan (see `plan_fusion`) evaluate all rules that
+    filter the same table with one scan of the table; the others run one query each.
+
+    Expensive rules (by the cost class of their analysis) run in a lane of their own, at most
+    `expensive_parallelism` at once, so that they don't hold up the cursors of the other rules.
+    """
+
+    def __init__(self, parallelism: Optional[int] = None, timeout: Optional[float] = None,
+                 mode: Optional[Literal["exists", "count"]] = None, sample_size: Optional[int] = None,
+                 fuse: Optional[bool] = None, expensive_parallelism: Optional[int] = None) -> None:
+        self.parallelism = parallelism or settings.validation.rule_parallelism
+        self.expensive_parallelism = expensive_parallelism or settings.validation.expensive_rule_parallelism
+        self.timeout = timeout or settings.validation.rule_timeout
+        self.mode = mode or settings.validation.evaluation_mode
+        self.sample_size = sample_size or settings.validation.detail_sample_size
+        self.fuse = settings.validation.fuse_rules if fuse is None else fuse
+
+    async def run(self, ctx: DuckDBContext, plan: RulePlan, detail: bool = False) -> list[RuleResult]:
+        if not plan.rules:
+            return []
+
+        compiled = {id(rule.rule): rule for rule in plan.rules}
+        fusion = plan.fusion if self.fuse else FusionPlan()
+        fused = {id(rule) for scan in fusion.scans for rule in scan.rules}
+        unfused = [rule for rule in plan.rules if id(rule.rule) not in fused and not rule.expensive]
+        expensive = [rule for rule in plan.rules if id(rule.rule) not in fused and rule.expensive]
+        if fusion.scans:
+            logger.info(
+                f"Fused {len(fusion.fused_rules)} rules into {len(fusion.scans)} scans {fusion.fused_rules}, "
+                f"{len(unfused)} rules run individually"
+            )
+
+        if expensive:
+            logger.info(f"{len(expensive)} expensive rules run in their own lane {[rule.rule.name for rule in expensive]}")
+
+        cursors: asyncio.Queue[duckdb.DuckDBPyConnection] = asyncio.Queue()
+        for _ in range(min(self.parallelism, len(fusion.scans) + len(unfused))):
+            cursors.put_nowait(ctx.cursor())
+        lane: asyncio.Queue[duckdb.DuckDBPyConnection] = asyncio.Queue()
+        for _ in range(min(self.expensive_parallelism, len(expensive))):
+            lane.put_nowait(ctx.cursor())
+
+        groups = await asyncio.gather(
+            *(self._run_scan(cursors, scan, [compiled[id(rule)] for rule in scan.rules], detail)
+              for scan in fusion.scans),
+            *(self._run_rule(cursors, rule, detail) for rule in unfused),
+            *(self._run_rule(lane, rule, detail) for rule in expensive),
+        )
+        results = {id(result.rule): result for group in groups for result in group}
+        return [results[id(rule.rule)] for rule in plan.rules]
+
+    async def _run_rule(self, cursors: asyncio.Queue[duckdb.DuckDBPyConnection], compiled: CompiledRule,
+                        detail: bool) -> list[RuleResult]:
+        rule = compiled.rule
+        if compiled.error:
+            return [RuleResult(rule=rule, failed=True, error=compiled.error)]
+
+        start = time.perf_counter()
+        try:
+            result = await self._submit(cursors, self.evaluate, compiled, detail)
+            result.elapsed = time.perf_counter() - start
+            return [result]
+        except TimeoutError:
+            logger.warning(f"Rule {rule.name} timed out after {self.timeout}s")
+            return [RuleResult(rule=rule, failed=True, error=f"Rule {rule.name} timed out after {self.timeout}s",
+                               elapsed=time.perf_counter() - start)]
+        except duckdb.Error as exc:
+            logger.error(f"Rule {rule.name} failed to execute: {exc}")
+            return [RuleResult(rule=rule, failed=True, error=f"Rule {rule.name} failed to execute: {exc}",
+                               elapsed=time.perf_counter() - start)]
+
+    async def _run_scan(self, cursors: asyncio.Queue[duckdb.DuckDBPyConnection], scan: FusedScan,
+                        rules: list[CompiledRule], detail: bool) -> list[RuleResult]:
+        start = time.perf_counter()
+        try:
+            counts = await self._submit(cursors, lambda cursor: cursor.execute(scan.query).fetchone())
+        except TimeoutError:
+            logger.warning(f"Fused scan of {scan.table} timed out after {self.timeout}s")
+            return [RuleResult(rule=rule, failed=True, error=f"Rule {rule.name} timed out after {self.timeout}s",
+                               elapsed=time.perf_counter() - start, fused=True) for rule in scan.rules]
+        except duckdb.Error as exc:
+            logger.warning(f"Fused scan of {scan.table} failed, running its rules individually: {exc}")
+            groups = await asyncio.gather(*(self._run_rule(cursors, rule, detail) for rule in rules))
+            return [result for group in groups for result in group]
+
+        elapsed = time.perf_counter() - start
+        results = [
+            RuleResult(rule=rule, failed=count > 0, invalid_rows_count=count, elapsed=elapsed, fused=True)
+            for rule, count in zip(scan.rules, counts, strict=True)
+        ]
+
+        if detail:
+            for result, compiled in zip(results, rules, strict=True):
+                if not result.failed:
+                    continue
+                try:
+                    result.sample = await self._submit(cursors, self.sample, compiled)
+                except (TimeoutError, duckdb.Error) as exc:
+                    logger.warning(f"Could not sample invalid rows of rule {result.rule.name}: {exc!r}")
+
+        return results
+
+    async def _submit(self, cursors: asyncio.Queue[duckdb.DuckDBPyConnection],
+                      fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run `fn(cursor, *args)` on the thread pool, interrupting it `timeout` seconds after it
+        starts. The time it waits for a thread, busy with the rules of other validations, doesn't count.
+        """
+        cursor = await cursors.get()
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def run() -> T:
+            loop.call_soon_threadsafe(started.set)
+            return fn(cursor, *args)
+
+        def release(done: asyncio.Future[T]) -> None:
+            # Nobody awaits the outcome anymore, retrieve it so that it isn't reported as lost
+            if not done.cancelled():
+                done.exception()
+            cursors.put_nowait(cursor)
+
+        job = executor.submit(run)
+        future = asyncio.wrap_future(job)
+        cancelled = False
+
+        try:
+            await started.wait()
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except TimeoutError:
+            cursor.interrupt()
+            with suppress(duckdb.Error):
+                await future
+            raise
+        except asyncio.CancelledError:
+            # The thread may still be running on the cursor, it is handed back once the thread is done
+            cancelled = True
+            if not job.cancel():
+                cursor.interrupt()
+            future.add_done_callback(release)
+            raise
+        finally:
+            if not cancelled:
+                cursors.put_nowait(cursor)
+
+    def evaluate(self, cursor: duckdb.DuckDBPyConnection, compiled: CompiledRule,
+                 detail: bool = False) -> RuleResult:
+        """Run a rule on a cursor, fetching no more rows than the evaluation mode needs."""
+        rule = compiled.rule
+        if self.mode == "count":
+            invalid_rows_count = cursor.execute(compiled.count_sql).fetchone()[0]
+            result = RuleResult(rule=rule, failed=invalid_rows_count > 0, invalid_rows_count=invalid_rows_count)
+        else:
+            result = RuleResult(rule=rule, failed=cursor.execute(compiled.exists_sql).fetchone() is not None)
+
+        if detail and result.failed:
+            result.sample = self.sample(cursor, compiled)
+
+        return result
+
+    def sample(self, cursor: duckdb.DuckDBPyConnection, compiled: CompiledRule) -> list[dict[str, Any]]:
+        """Fetch at most `sample_size` invalid rows of a rule."""
+        cursor.execute(sample_query(compiled.tree, self.sample_size))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import weakref
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+from loguru import logger
+
+from ..conf import settings
+
+
+@dataclass(slots=True)
+class CachedTab:
+    """A cached tab, its ETag, the digest of its values and the spreadsheet revision it was last known to be current at."""
+
+    file: str
+    etag: str
+    rows: int = 0
+    version: Optional[str] = None
+    digest: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SpreadsheetMetadata:
+    """What the cache knows about a spreadsheet: its latest revision, the tab titles at it and the cached tabs."""
+
+    version: Optional[str] = None
+    titles: list[str] = field(default_factory=list)
+    tabs: dict[str, CachedTab] = field(default_factory=dict)
+
+
+class SheetCache(object):
+    """
+    An on-disk cache of spreadsheet tabs, one Arrow IPC file per tab.
+
+    Cached tabs are memory-mapped when read back, so an unchanged tab costs neither a
+    download nor a parse, and its pages are shared by every validation reading it.
+    Files are written to a temporary name and renamed, so readers never see partial files.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def lock(self, spreadsheet_id: str) -> asyncio.Lock:
+        """
+        A per-spreadsheet lock, so that concurrent validations of one spreadsheet download it once.
+        It lives only as long as a validation holds it or waits for it.
+        """
+        return self._locks.setdefault(spreadsheet_id, asyncio.Lock())
+
+    def directory(self, spreadsheet_id: str) -> Path:
+        return self.cache_dir / spreadsheet_id
+
+    def metadata(self, spreadsheet_id: str) -> SpreadsheetMetadata:
+        path = self.directory(spreadsheet_id) / "metadata.json"
+        try:
+            data = json.loads(path.read_text())
+            return SpreadsheetMetadata(
+                version=data.get("version"),
+                titles=data.get("titles", []),
+                tabs={title: CachedTab(**tab) for title, tab in data.get("tabs", {}).items()},
+            )
+        except FileNotFoundError:
+            return SpreadsheetMetadata()
+        except (ValueError, TypeError) as exc:
+            logger.warning(f"Ignoring corrupt sheet cache metadata {path}: {exc}")
+            return SpreadsheetMetadata()
+
+    def save_metadata(self, spreadsheet_id: str, metadata: SpreadsheetMetadata) -> None:
+        directory = self.directory(spreadsheet_id)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for file in {path.name for path in directory.glob("*.arrow")} - {tab.file for tab in metadata.tabs.values()}:
+            (directory / file).unlink(missing_ok=True)
+
+        self._write(directory / "metadata.json", json.dumps(asdict(metadata)).encode())
+
+    def load(self, spreadsheet_id: str, tab: CachedTab) -> Optional[pa.Table]:
+        path = self.directory(spreadsheet_id) / tab.file
+        try:
+            with pa.memory_map(str(path)) as source:
+                return pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid) as exc:
+            logger.warning(f"Sheet cache file {path} is unreadable: {exc}")
+            return None
+
+    def store(self, spreadsheet_id: str, title: str, table: pa.Table, etag: str,
+              version: Optional[str] = None, digest: Optional[str] = None) -> CachedTab:
+        directory = self.directory(spreadsheet_id)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        file = f"{hashlib.sha1(title.encode()).hexdigest()}.arrow"
+        temporary = directory / f".{file}.{os.getpid()}.tmp"
+        with pa.OSFile(str(temporary), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temporary, directory / file)
+
+        return CachedTab(file=file, etag=etag, rows=table.num_rows, version=version, digest=digest)
+
+    def invalidate(self, spreadsheet_id: Optional[str] = None) -> None:
+        shutil.rmtree(self.directory(spreadsheet_id) if spreadsheet_id else self.cache_dir, ignore_errors=True)
+
+    @staticmethod
+    def _write(path: Path, content: bytes) -> None:
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporary.write_bytes(content)
+        os.replace(temporary, path)
+
+
+sheet_cache: SheetCache = SheetCache(settings.google_sheets.cache_dir)
@@ -0,0 +1,131 @@
+import codecs
+import hashlib
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class ValueRows(object):
+    """
+    The rows of one ValueRange, decoded as they are iterated. `digest` is the SHA-256 of their
+    raw JSON, which tells unchanged tabs apart, once every row has been read.
+    """
+
+    def __init__(self, rows: Iterator[tuple[list[Any], str]]) -> None:
+        self._rows = rows
+        self._hash = hashlib.sha256()
+        self.digest: Optional[str] = None
+
+    def __iter__(self) -> "ValueRows":
+        return self
+
+    def __next__(self) -> list[Any]:
+        try:
+            row, text = next(self._rows)
+        except StopIteration:
+            self.digest = self._hash.hexdigest()
+            raise
+        self._hash.update(text.encode())
+        self._hash.update(b"\n")
+        return row
+
+
+class ValueRangeDecoder(object):
+    """
+    Decodes Sheets API responses (a ValueRange, or the ValueRanges of a batchGet) from the chunks
+    of their body as they arrive, one row at a time, so that a tab is never held as a whole JSON
+    document nor as a list of Python rows. Rows are decoded by `json`, only the structure around
+    them is walked here.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def value_range(self) -> ValueRows:
+        """The rows of a ValueRange body."""
+        return ValueRows(self._rows())
+
+    def value_ranges(self) -> Iterator[ValueRows]:
+        """The rows of every ValueRange of a batchGet body, in order. A range not read to its end is skipped."""
+        self._expect("{")
+        while not self._consume("}"):
+            key, _ = self._decode()
+            self._expect(":")
+            if key == "valueRanges":
+                self._expect("[")
+                while not self._consume("]"):
+                    rows = ValueRows(self._rows())
+                    yield rows
+                    for _ in rows:
+                        pass
+                    self._consume(",")
+            else:
+                self._decode()
+            self._consume(",")
+
+    def _rows(self) -> Iterator[tuple[list[Any], str]]:
+        """The rows of the ValueRange object at the cursor and their JSON, up to the end of the object."""
+        self._expect("{")
+        while not self._consume("}"):
+            key, _ = self._decode()
+            self._expect(":")
+            if key == "values":
+                self._expect("[")
+                while not self._consume("]"):
+                    yield self._decode()
+                    self._consume(",")
+            else:
+                self._decode()
+            self._consume(",")
+
+    def _read(self) -> bool:
+        """Append the next chunk of the body to the buffer, or return False at its end."""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._buffer = self._buffer[self._pos:] + self._decoder.decode(b"", final=True)
+        else:
+            self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """The next character that isn't whitespace, or "" at the end of the body."""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._read():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _consume(self, char: str) -> bool:
+        if self._peek() != char:
+            return False
+        self._pos += 1
+        return True
+
+    def _expect(self, char: str) -> None:
+        if not self._consume(char):
+            raise ValueError(f"Expected {char!r} at {self._peek()!r} in a Sheets API response")
+
+    def _decode(self) -> tuple[Any, str]:
+        """The JSON value at the cursor and its text, reading more of the body until it is complete."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+                # A number may go on in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    text, self._pos = self._buffer[self._pos:end], end
+                    return value, text
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read()
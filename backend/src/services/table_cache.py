@@ -0,0 +1,97 @@
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional
+
+import pyarrow as pa
+from loguru import logger
+
+from ..conf import settings
+
+
+@dataclass(slots=True)
+class TableSnapshot:
+    """An in-memory copy of a reference table and the version it was read at."""
+
+    table: pa.Table
+    version: Hashable
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def is_fresh(self, interval: float) -> bool:
+        return time.monotonic() - self.checked_at < interval
+
+
+class TableSnapshotCache(object):
+    """
+    An LRU cache of reference table snapshots held as Arrow tables within a memory budget.
+
+    Snapshots are shared as-is with every validation (DuckDB scans Arrow tables without
+    copying them). The least recently used snapshots are evicted once the cached tables
+    exceed `max_bytes`; a table larger than the whole budget is never cached. The cache also
+    keeps the checksums of the tables whose version is their checksum (see
+    `DbService.get_table_version`), as computing one scans the table.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._snapshots: OrderedDict[Any, TableSnapshot] = OrderedDict()
+        self._locks: weakref.WeakValueDictionary[Any, asyncio.Lock] = weakref.WeakValueDictionary()
+        self._checksums: dict[str, tuple[Hashable, float]] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(snapshot.nbytes for snapshot in self._snapshots.values())
+
+    def lock(self, key: Any) -> asyncio.Lock:
+        """
+        A per-key lock, so that concurrent misses for one table download it once. A lock is
+        dropped once nobody holds or waits for it, as keys are as many as the projections read.
+        """
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def get(self, key: Any) -> Optional[TableSnapshot]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+        return snapshot
+
+    def put(self, key: Any, snapshot: TableSnapshot) -> None:
+        self._snapshots.pop(key, None)
+        if snapshot.nbytes > self.max_bytes:
+            logger.debug(f"Table snapshot {key} ({snapshot.nbytes} bytes) exceeds the cache budget, not cached")
+            return
+
+        self._snapshots[key] = snapshot
+        total = self.nbytes
+        while total > self.max_bytes:
+            evicted_key, evicted = self._snapshots.popitem(last=False)
+            total -= evicted.nbytes
+            logger.debug(f"Evicted table snapshot {evicted_key} ({evicted.nbytes} bytes)")
+
+    def checksum(self, table_name: str, ttl: float) -> Optional[Hashable]:
+        """The checksum of `table_name`, unless it was computed more than `ttl` seconds ago."""
+        cached = self._checksums.get(table_name)
+        if cached is None or time.monotonic() - cached[1] >= ttl:
+            return None
+        return cached[0]
+
+    def put_checksum(self, table_name: str, checksum: Hashable) -> None:
+        self._checksums[table_name] = (checksum, time.monotonic())
+
+    def invalidate(self, key: Optional[Any] = None) -> None:
+        if key is None:
+            self._snapshots.clear()
+            self._checksums.clear()
+        else:
+            self._snapshots.pop(key, None)
+
+
+table_snapshot_cache: TableSnapshotCache = TableSnapshotCache(max_bytes=settings.mysql.snapshot_cache_bytes)
@@ -0,0 +1,152 @@
+import os
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pyarrow as pa
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+from ..rules.plan import RulePlan
+from ..validations.models import RuleTiming, StageTiming, ValidateResponse, ValidationTimings
+from .rule_executor import RuleResult
+
+STAGE_SECONDS = Histogram(
+    "validation_stage_seconds", "Time spent in each stage of a validation", ["event_type", "stage"],
+)
+STAGE_ROWS = Counter("validation_stage_rows", "Rows handled by each stage of a validation", ["event_type", "stage"])
+STAGE_BYTES = Counter("validation_stage_bytes", "Bytes handled by each stage of a validation", ["event_type", "stage"])
+# By cost class rather than by rule, an event type can have thousands of rules: the time of
+# each rule is in the timings of a debug validation (see `Trace.timings`)
+RULE_SECONDS = Histogram(
+    "validation_rule_seconds", "Time spent evaluating rules, by cost class", ["event_type", "cost_class"],
+)
+RULE_ROWS = Counter("validation_rule_rows", "Rows of the tables rules scan, by cost class", ["event_type", "cost_class"])
+VALIDATIONS = Counter("validations", "Validations by outcome (valid, invalid or cached)", ["event_type", "status"])
+PEAK_MEMORY = Gauge(
+    "validation_peak_memory_bytes",
+    "Peak resident memory of the process as of its last validation (of the largest live one across processes)",
+    multiprocess_mode="livemax",
+)
+
+
+def multiprocess_dir() -> Optional[str]:
+    """
+    The directory the processes of the service (the API, its validation workers and the job
+    workers) share their metrics through, if `PROMETHEUS_MULTIPROC_DIR` is set (see `src.metrics`).
+    """
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def process_exited(pid: int) -> None:
+    """Drop the live gauges of a process that exited from the metrics shared across processes."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def peak_rss() -> int:
+    """The peak resident memory of the process so far, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def table_sizes(tables: dict[str, pa.Table]) -> tuple[int, int]:
+    """The total (rows, bytes) of Arrow tables."""
+    return sum(table.num_rows for table in tables.values()), sum(table.nbytes for table in tables.values())
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed stage of a validation, with the rows and bytes it handled when they are known."""
+
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    peak_memory: Optional[int] = None
+
+
+class Trace(object):
+    """
+    The spans of one validation: one per stage and one per rule. Stages are recorded by
+    `span` while the trace is the current one (see `current_trace`), and exported as
+    Prometheus metrics when they end; rules are exported by cost class.
+    """
+
+    def __init__(self, event_type: str) -> None:
+        self.event_type = event_type
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.stages: list[Span] = []
+        self.rules: list[RuleTiming] = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        span = Span(name=name)
+        try:
+            yield span
+        finally:
+            span.elapsed = time.perf_counter() - span.started
+            span.peak_memory = peak_rss()
+            self.stages.append(span)
+
+            STAGE_SECONDS.labels(self.event_type, name).observe(span.elapsed)
+            if span.rows is not None:
+                STAGE_ROWS.labels(self.event_type, name).inc(span.rows)
+            if span.bytes is not None:
+                STAGE_BYTES.labels(self.event_type, name).inc(span.bytes)
+
+    def record_rules(self, plan: RulePlan, results: list[RuleResult], tables: dict[str, pa.Table]) -> None:
+        """A span per rule, from its result; the rows a rule scans are those of the tables it reads."""
+        rows = {name.lower(): table.num_rows for name, table in tables.items()}
+        for compiled, result in zip(plan.rules, results, strict=True):
+            scanned = sum(rows.get(table.lower(), 0) for table in compiled.tables)
+            self.rules.append(RuleTiming(rule=result.rule.name, elapsed=result.elapsed, rows=scanned,
+                                         fused=result.fused, failed=result.failed))
+            RULE_SECONDS.labels(self.event_type, compiled.cost_class).observe(result.elapsed)
+            RULE_ROWS.labels(self.event_type, compiled.cost_class).inc(scanned)
+
+    def finish(self, response: ValidateResponse, cached: bool = False) -> None:
+        self.elapsed = time.perf_counter() - self.started
+        VALIDATIONS.labels(self.event_type, "cached" if cached else response.status).inc()
+        PEAK_MEMORY.set(peak_rss())
+        logger.info(
+            f"Validation of {self.event_type} took {self.elapsed:.3f}s: "
+            + ", ".join(f"{span.name} {span.elapsed:.3f}s" for span in self.ordered_stages)
+        )
+
+    @property
+    def ordered_stages(self) -> list[Span]:
+        """The stages in the order they started (they are recorded as they end)."""
+        return sorted(self.stages, key=lambda span: span.started)
+
+    def timings(self) -> ValidationTimings:
+        return ValidationTimings(
+            elapsed=self.elapsed,
+            stages=[
+                StageTiming(stage=span.name, elapsed=span.elapsed, rows=span.rows, bytes=span.bytes,
+                            peak_memory=span.peak_memory)
+                for span in self.ordered_stages
+            ],
+            rules=sorted(self.rules, key=lambda rule: rule.elapsed, reverse=True),
+        )
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span]:
+    """A span of the current trace, or an unrecorded one outside of a traced validation."""
+    trace = current_trace.get()
+    if trace is None:
+        yield Span(name=name)
+        return
+    with trace.span(name) as recorded:
+        yield recorded
@@ -0,0 +1,406 @@
+import asyncio
+import atexit
+import dataclasses
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cache
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterator, Optional
+
+import pyarrow as pa
+from loguru import logger
+
+from ..conf import settings
+from ..rules.models import Rule
+from ..rules.plan import RulePlan, compile_plan
+from ..validations.models import ValidationPoolStats, WorkerStats
+from .rule_executor import RuleResult
+from .tracing import PEAK_MEMORY, Trace, current_trace, peak_rss, process_exited
+
+
+@dataclass(slots=True)
+class SharedTables:
+    """Arrow tables written as IPC streams into one shared memory block: (name, offset, length) each."""
+
+    block: str
+    tables: list[tuple[str, int, int]]
+
+    @classmethod
+    def write(cls, tables: dict[str, pa.Table]) -> tuple["SharedTables", SharedMemory]:
+        sizes = []
+        for table in tables.values():
+            sink = pa.MockOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            sizes.append(sink.size())
+
+        block = SharedMemory(create=True, size=max(sum(sizes), 1))
+        entries, offset = [], 0
+        for (name, table), size in zip(tables.items(), sizes, strict=True):
+            sink = pa.FixedSizeBufferWriter(pa.py_buffer(block.buf[offset:offset + size]))
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            entries.append((name, offset, size))
+            offset += size
+
+        return cls(block=block.name, tables=entries), block
+
+    def read(self) -> tuple[dict[str, pa.Table], SharedMemory]:
+        """The tables, backed by the shared memory block without copies. Close the block once they are dropped."""
+        block = SharedMemory(name=self.block, track=False)
+        tables = {
+            name: pa.ipc.open_stream(pa.py_buffer(block.buf[offset:offset + size])).read_all()
+            for name, offset, size in self.tables
+        }
+        return tables, block
+
+
+def release_block(block: SharedMemory) -> None:
+    block.close()
+    block.unlink()
+
+
+def release_written(write: asyncio.Future[tuple[SharedTables, SharedMemory]]) -> None:
+    """Release the block of a write nobody awaits anymore, once it is written."""
+    if not write.cancelled() and write.exception() is None:
+        release_block(write.result()[1])
+
+
+@dataclass(slots=True)
+class EvaluationTask:
+    task_id: int
+    event_type: str
+    fingerprint: str
+    rules: list[tuple[dict[str, Any], list[str]]]
+    tables: SharedTables
+    detail: bool
+
+
+@dataclass(slots=True)
+class WorkerState:
+    process: multiprocessing.Process
+    inbox: Any
+    in_flight: set[int] = field(default_factory=set)
+    completed: int = 0
+
+
+class ValidationPool(object):
+    """
+    Evaluates validation rules in worker processes, so that rule evaluation uses every core
+    while the API process keeps serving requests.
+
+    The API process fetches the tables and hands them to the least loaded worker as Arrow
+    IPC streams in shared memory, along with the rules; the worker evaluates them on its own
+    DuckDB pool and returns the rule results. A worker evaluates at most `tasks_per_worker`
+    validations at once; further validations wait in the API process. A worker that dies
+    fails its validations and is replaced.
+
+    The shared memory of a validation is released once its worker answers or dies, even when
+    the validation is cancelled meanwhile, as the worker may still be reading it. Workers split
+    the cores between them: each one runs `tasks_per_worker` DuckDB connections of
+    cores / `processes` threads (see `worker_environment`).
+    """
+
+    def __init__(self, processes: int, tasks_per_worker: int = 1) -> None:
+        self.processes = processes
+        self.tasks_per_worker = tasks_per_worker
+        self.context = multiprocessing.get_context("spawn")
+        self.completed = 0
+        self.failed = 0
+        self._workers: list[WorkerState] = []
+        self._outbox: Any = None
+        self._futures: dict[int, asyncio.Future[list[RuleResult]]] = {}
+        self._blocks: dict[int, SharedMemory] = {}
+        self._task_ids = itertools.count()
+        self._waiting = 0
+        self._slots: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._replacing: set[int] = set()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Condition()
+        self._outbox = self.context.Queue()
+        self._workers = [self._spawn(index) for index in range(self.processes)]
+        self._reader = threading.Thread(target=self._read_results, name="validation-pool-results", daemon=True)
+        self._reader.start()
+        atexit.register(self.close)
+        logger.info(f"Started {self.processes} validation worker processes")
+
+    def close(self) -> None:
+        self._closed.set()
+        for worker in self._workers:
+            with_timeout(worker.inbox.put, None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            process_exited(worker.process.pid)
+        self._workers = []
+        for block in self._blocks.values():
+            release_block(block)
+        self._blocks.clear()
+
+    def _spawn(self, index: int) -> WorkerState:
+        inbox = self.context.Queue()
+        process = self.context.Process(
+            target=serve, args=(inbox, self._outbox), name=f"validation-worker-{index}", daemon=True,
+        )
+        # Spawned workers read their settings from the environment when they import them
+        with environment(self.worker_environment()):
+            process.start()
+        return WorkerState(process=process, inbox=inbox)
+
+    def worker_environment(self) -> dict[str, str]:
+        """
+        The settings of the workers, sized so that together they use the cores once: a DuckDB
+        connection per validation a worker runs at once, and a share of the cores for each
+        worker's queries and rules.
+        """
+        threads = max(1, min(settings.duckdb.threads, (os.cpu_count() or 1) // self.processes))
+        return {
+            "DUCKDB_WORKERS": str(self.tasks_per_worker),
+            "DUCKDB_THREADS": str(threads),
+            "VALIDATION_RULE_PARALLELISM": str(min(settings.validation.rule_parallelism, threads)),
+            # A worker evaluates locally whatever it is given
+            "VALIDATION_WORKER_PROCESSES": "0",
+        }
+
+    def stats(self) -> ValidationPoolStats:
+        return ValidationPoolStats(
+            processes=len(self._workers),
+            busy_workers=sum(1 for worker in self._workers if worker.in_flight),
+            in_flight=sum(len(worker.in_flight) for worker in self._workers),
+            queued=self._waiting,
+            completed=self.completed,
+            failed=self.failed,
+            workers=[
+                WorkerStats(pid=worker.process.pid, alive=worker.process.is_alive(),
+                            in_flight=len(worker.in_flight), completed=worker.completed)
+                for worker in self._workers
+            ],
+        )
+
+    async def evaluate(self, plan: RulePlan, tables: dict[str, pa.Table], detail: bool = False) -> list[RuleResult]:
+        self.start()
+        # Copying the tables takes a while for large inputs, keep the event loop serving other requests
+        write = asyncio.ensure_future(asyncio.to_thread(SharedTables.write, tables))
+        try:
+            shared, block = await asyncio.shield(write)
+        except asyncio.CancelledError:
+            write.add_done_callback(release_written)
+            raise
+        task = EvaluationTask(
+            task_id=next(self._task_ids),
+            event_type=plan.event_type,
+            fingerprint=plan.fingerprint,
+            rules=[(compiled.rule.model_dump(), compiled.db_tables) for compiled in plan.rules],
+            tables=shared,
+            detail=detail,
+        )
+        future = self._loop.create_future()
+        self._futures[task.task_id] = future
+        dispatched = False
+        try:
+            worker = await self._acquire(task.task_id)
+            worker.inbox.put(task)
+            # The worker owns the block from now on, it is released when the worker answers (see `_resolve`)
+            self._blocks[task.task_id] = block
+            dispatched = True
+
+            results = await future
+        finally:
+            self._futures.pop(task.task_id, None)
+            if not dispatched:
+                release_block(block)
+                self._release(task.task_id)
+
+        # Workers return results without their rules, they are the plan's
+        return [dataclasses.replace(result, rule=compiled.rule) for result, compiled in zip(results, plan.rules, strict=True)]
+
+    async def _acquire(self, task_id: int) -> WorkerState:
+        """Assign a task to the least loaded worker with a free slot, waiting for one if they are all busy."""
+        async with self._slots:
+            self._waiting += 1
+            try:
+                await self._slots.wait_for(
+                    lambda: any(len(worker.in_flight) < self.tasks_per_worker for worker in self._workers)
+                )
+            finally:
+                self._waiting -= 1
+            worker = min(self._workers, key=lambda worker: len(worker.in_flight))
+            worker.in_flight.add(task_id)
+            return worker
+
+    def _read_results(self) -> None:
+        while not self._closed.is_set():
+            try:
+                task_id, results, error = self._outbox.get(timeout=1)
+                if self._loop.is_closed():
+                    return
+                self._loop.call_soon_threadsafe(self._resolve, task_id, results, error)
+            except queue.Empty:
+                if self._loop.is_closed():
+                    return
+                self._replace_dead_workers()
+            except (EOFError, OSError):
+                return
+
+    def _release(self, task_id: int) -> bool:
+        """Free the worker slot of a task, if it holds one, and wake the validations waiting for a slot."""
+        released = False
+        for worker in self._workers:
+            if task_id in worker.in_flight:
+                worker.in_flight.discard(task_id)
+                released = True
+        if released:
+            self._loop.create_task(self._notify())
+        return released
+
+    def _resolve(self, task_id: int, results: Optional[list[RuleResult]], error: Optional[str]) -> None:
+        for worker in self._workers:
+            if task_id in worker.in_flight:
+                worker.completed += 1
+        self._release(task_id)
+        block = self._blocks.pop(task_id, None)
+        if block is not None:
+            release_block(block)
+
+        future = self._futures.pop(task_id, None)
+        if error is None:
+            self.completed += 1
+            if future is not None and not future.done():
+                future.set_result(results)
+        else:
+            self.failed += 1
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError(f"Rule evaluation failed in a worker process: {error}"))
+
+    def _replace_dead_workers(self) -> None:
+        """
+        Spawn a replacement for every worker that died. Runs on the results thread, as starting
+        a process takes a while; the replacements are swapped in on the event loop (see `_replaced`).
+        """
+        replacements = []
+        for index, worker in enumerate(list(self._workers)):
+            if worker.process.is_alive() or index in self._replacing or self._closed.is_set():
+                continue
+            self._replacing.add(index)
+            logger.error(f"Validation worker {worker.process.pid} exited with {worker.process.exitcode}, replacing it")
+            process_exited(worker.process.pid)
+            replacements.append((index, worker, self._spawn(index)))
+        self._loop.call_soon_threadsafe(self._replaced, replacements)
+
+    def _replaced(self, replacements: list[tuple[int, WorkerState, WorkerState]]) -> None:
+        """Fail the tasks of dead workers, swap in their replacements and wake the validations waiting for a slot."""
+        for index, worker, replacement in replacements:
+            self._replacing.discard(index)
+            if self._closed.is_set():
+                replacement.process.terminate()
+                continue
+            for task_id in list(worker.in_flight):
+                self._resolve(task_id, None, f"worker exited with {worker.process.exitcode}")
+            self._workers[index] = replacement
+        self._loop.create_task(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._slots:
+            self._slots.notify_all()
+
+
+@contextmanager
+def environment(variables: dict[str, str]) -> Iterator[None]:
+    """Set environment variables for the processes started within."""
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def with_timeout(put: Any, item: Any) -> None:
+    try:
+        put(item, timeout=1)
+    except (queue.Full, ValueError, OSError):
+        pass
+
+
+def serve(inbox: Any, outbox: Any) -> None:
+    """The main function of a worker process."""
+    asyncio.run(serve_async(inbox, outbox))
+
+
+async def serve_async(inbox: Any, outbox: Any) -> None:
+    from .validation_service import get_validation_service
+
+    service = get_validation_service()
+    plans: OrderedDict[str, RulePlan] = OrderedDict()
+    loop = asyncio.get_running_loop()
+    running: set[asyncio.Task] = set()
+
+    async def evaluate(task: EvaluationTask) -> None:
+        started = time.perf_counter()
+        try:
+            plan = plans.get(task.fingerprint)
+            if plan is None:
+                plan = compile_plan(task.event_type, [(Rule(**rule), db_tables) for rule, db_tables in task.rules])
+                plans[task.fingerprint] = plan
+                if len(plans) > settings.validation.rule_plan_cache_size:
+                    plans.popitem(last=False)
+            plans.move_to_end(task.fingerprint)
+
+            tables, block = task.tables.read()
+            # The worker's own stages reach /metrics through the multiprocess collector, if it is set up
+            token = current_trace.set(Trace(task.event_type))
+            try:
+                results = await service.evaluate_local(plan, tables, detail=task.detail)
+            finally:
+                current_trace.reset(token)
+                PEAK_MEMORY.set(peak_rss())
+                del tables
+                try:
+                    block.close()
+                except BufferError:
+                    # An Arrow buffer still points into the block, it is unmapped when collected
+                    pass
+
+            outbox.put((task.task_id, [dataclasses.replace(result, rule=None) for result in results], None))
+            logger.debug(f"Evaluated {len(results)} rules of {task.event_type} in {time.perf_counter() - started:.3f}s")
+        except Exception as exc:
+            logger.exception(f"Evaluating the rules of {task.event_type} failed")
+            outbox.put((task.task_id, None, repr(exc)))
+
+    while True:
+        task = await loop.run_in_executor(None, inbox.get)
+        if task is None:
+            break
+        job = asyncio.create_task(evaluate(task))
+        running.add(job)
+        job.add_done_callback(running.discard)
+
+    if running:
+        await asyncio.gather(*running)
+
+
+@cache
+def get_validation_pool() -> ValidationPool:
+    return ValidationPool(
+        processes=settings.validation.worker_processes,
+        tasks_per_worker=settings.validation.worker_tasks,
+    )
@@ -1,11 +1,26 @@
-import duckdb
-import pandas as pd
-
-from ..validations.models import ValidateResponse
+import asyncio
+import hashlib
+import json
+from collections import Counter
+from functools import cache
+from typing import Annotated, Hashable, Optional
+
+import pyarrow as pa
+from fastapi import Depends
+from loguru import logger
+
+from ..conf import settings
+from ..db.duckdb_client import DuckDBContext, pool
+from ..rules.cache import rule_plan_cache
+from ..rules.crud import RuleCRUD
+from ..rules.plan import RulePlan, compile_plan
+from ..rules.pushdown import TableProjection
+from ..validations.models import RuleViolation, ValidateResponse
 from .db_service import DbService
 from .google_sheets_service import GoogleSheetsService
-
-conn = duckdb.connect(database=":memory:")
+from .result_cache import ResultCache, result_cache
+from .rule_executor import RuleExecutor, RuleResult
+from .tracing import Trace, current_trace, span, table_sizes
 
 
 class ValidationService(object):
@@ -13,49 +28,218 @@ class ValidationService(object):
     def __init__(self) -> None:
         self.google_sheets_service: GoogleSheetsService = GoogleSheetsService()
         self.db_service: DbService = DbService()
-
-    async def validate_async(self, event_type: str, url: str) -> ValidateResponse:
-
-        rules = await self.db_service.get_validation_rules(event_type=event_type)
-
-        all_tables = [table_name for tables in rules.values() for table_name in tables]
-
-        db_tables = {}
-        for table in all_tables:
-
-            data = await self.db_service.get_all(table)
-            db_tables[table] = data
-
-        sheets_data = await self.google_sheets_service.fetch_sheet_data(url=url)
-
-        self.insert_to_duckdb(sheets_data, db_tables)
-
+        self.rule_executor: RuleExecutor = RuleExecutor()
+        self.result_cache: ResultCache = result_cache
+
+    async def validate_async(self, event_type: str, url: str, detail: bool = False,
+                             debug: bool = False) -> ValidateResponse:
+        """
+        Validate the data of an event type. Every stage and every rule is traced (see `Trace`)
+        and exported as metrics; with `debug`, the response also tells where the time went.
+        """
+        trace = Trace(event_type)
+        token = current_trace.set(trace)
+        try:
+            response, cached = await self.run_stages(trace, event_type, url, detail=detail)
+        finally:
+            current_trace.reset(token)
+
+        trace.finish(response, cached=cached)
+        # Timings are never cached, they describe this validation only
+        return response.model_copy(update={"timings": trace.timings()}) if debug else response
+
+    async def run_stages(self, trace: Trace, event_type: str, url: str,
+                         detail: bool = False) -> tuple[ValidateResponse, bool]:
+        """The response of a validation, and whether it came from the result cache."""
+        with span("plan"):
+            plan = await rule_plan_cache.get_or_load(event_type, lambda: self.load_rule_plan(event_type),
+                                                     version=lambda: RuleCRUD.get_version(event_type))
+
+        with span("result_cache"):
+            revision, table_versions = await self.input_versions(plan, url)
+            key = self.result_key(plan, url, revision, table_versions, detail=detail)
+            cached = await self.result_cache.get(key) if key is not None else None
+        if cached is not None:
+            logger.info(f"Validation of {event_type} answered from the result cache")
+            return cached, True
+
+        with span("fetch") as fetch:
+            tables = await self.fetch(plan, url, revision=revision)
+            fetch.rows, fetch.bytes = table_sizes(tables)
+
+        with span("evaluate"):
+            rule_results = await self.evaluate(plan, tables, detail=detail)
+        trace.record_rules(plan, rule_results, tables)
+
+        with span("response"):
+            response = self.build_response(rule_results, detail=detail)
+
+            # The fetch may have brought the tabs up to date, so the fingerprint can be known now
+            key = key or self.result_key(plan, url, revision, table_versions, detail=detail)
+            # A rule that timed out or failed to run says nothing about the data, it is retried next time
+            if key is not None and not any(result.error for result in rule_results):
+                await self.result_cache.put(key, response)
+
+        return response, False
+
+    async def input_versions(self, plan: RulePlan, url: str) -> tuple[Optional[str], list[Hashable]]:
+        """
+        The spreadsheet's Drive revision and the versions of the DB tables the rules read, which
+        fingerprint a validation's inputs (see `result_key`). Nothing is read when results aren't cached.
+        """
+        if self.result_cache.backend == "none":
+            return None, []
+
+        revision, table_versions = await asyncio.gather(
+            self.google_sheets_service.get_revision(self.google_sheets_service.spreadsheet_id(url)),
+            asyncio.gather(*(self.db_service.get_table_version(table) for table in plan.db_tables)),
+        )
+        return revision, table_versions
+
+    def result_key(self, plan: RulePlan, url: str, revision: Optional[str], table_versions: list[Hashable],
+                   detail: bool = False) -> Optional[str]:
+        """
+        A fingerprint of the inputs of a validation: the rules, the versions of the sheet tabs and
+        DB tables they read, and the options that shape the response. None when it can't be known
+        without fetching the sheet.
+        """
+        if self.result_cache.backend == "none":
+            return None
+
+        tab_versions = self.google_sheets_service.tab_versions(url, revision, tabs=plan.sheet_tabs)
+        if tab_versions is None:
+            return None
+
+        inputs = {
+            "event_type": plan.event_type,
+            "rules": plan.fingerprint,
+            "spreadsheet": self.google_sheets_service.spreadsheet_id(url),
+            "tabs": tab_versions,
+            "tables": {table: repr(version) for table, version in zip(plan.db_tables, table_versions, strict=True)},
+            "detail": detail,
+            "mode": self.rule_executor.mode,
+            "sample_size": self.rule_executor.sample_size,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    async def fetch(self, plan: RulePlan, url: str, revision: Optional[str] = None) -> dict[str, pa.Table]:
+        """
+        The fetch stage: the sheet tabs and DB tables the rules read, by name (DB tables win on clashes).
+        `revision` is the spreadsheet's Drive revision if it was already read.
+        """
+        db_tables, sheets_data = await asyncio.gather(
+            self.fetch_db_data(plan.db_tables, plan.projections),
+            self.fetch_sheets(url, plan.sheet_tabs, revision=revision),
+        )
+        return {**sheets_data, **db_tables}
+
+    async def fetch_sheets(self, url: str, tabs: set[str], revision: Optional[str] = None) -> dict[str, pa.Table]:
+        with span("fetch.sheets") as sheets:
+            tables = await self.google_sheets_service.fetch_sheet_data(url=url, tabs=tabs, revision=revision)
+            sheets.rows, sheets.bytes = table_sizes(tables)
+        return tables
+
+    async def evaluate(self, plan: RulePlan, tables: dict[str, pa.Table], detail: bool = False) -> list[RuleResult]:
+        """
+        The evaluation stage: run the rules over the fetched tables, in a worker process
+        when `settings.validation.worker_processes` is set and in this process otherwise.
+        """
+        if settings.validation.worker_processes:
+            from .validation_pool import get_validation_pool
+
+            return await get_validation_pool().evaluate(plan, tables, detail=detail)
+        return await self.evaluate_local(plan, tables, detail=detail)
+
+    async def evaluate_local(self, plan: RulePlan, tables: dict[str, pa.Table],
+                             detail: bool = False) -> list[RuleResult]:
+        async with pool.context() as ctx:
+
+            with span("evaluate.register") as register:
+                self.insert_to_duckdb(ctx, tables, scans=plan.scans)
+                register.rows = sum(table.rows for table in ctx.report.tables)
+                register.bytes = ctx.report.bytes_registered
+
+            with span("evaluate.rules"):
+                return await self.rule_executor.run(ctx, plan, detail=detail)
+
+    @staticmethod
+    def build_response(rule_results: list[RuleResult], detail: bool = False) -> ValidateResponse:
         results = []
+        details = []
+        for result in rule_results:
 
-        for rule in rules.keys():
-
-            invalid_rows = conn.execute(rule.query).fetchdf()
-
-            if invalid_rows.empty:
+            if not result.failed:
                 continue
 
-            results.append(rule.error_message)
+            results.append(result.error or result.rule.error_message)
 
-        return ValidateResponse(status="invalid", errors=results) \
+            if detail:
+                details.append(RuleViolation(
+                    rule=result.rule.name,
+                    error_message=result.error or result.rule.error_message,
+                    invalid_rows_count=result.invalid_rows_count,
+                    sample=result.sample,
+                ))
+
+        return ValidateResponse(status="invalid", errors=results, details=details) \
             if len(results) > 0 else ValidateResponse(
             status="valid", errors=[])
 
-    async def fetch_db_data(self, tables: list[str]) -> pd.DataFrame:
-        ...
+    async def load_rule_plan(self, event_type: str) -> RulePlan:
+        rule_set = await self.db_service.get_rule_set(event_type)
+        rules = await self.db_service.get_validation_rules(event_type=event_type, rule_set=rule_set)
+        return compile_plan(event_type, rules, version=rule_set.version)
+
+    async def fetch_db_data(self, tables: list[str],
+                            projections: Optional[dict[str, TableProjection]] = None) -> dict[str, pa.Table]:
+        """
+        Load the given DB tables concurrently, each one once, with no more loads
+        in flight than the MySQL pool has connections. Only the columns and rows in
+        a table's projection are fetched.
+        """
+        projections = projections or {}
+        tables = list(dict.fromkeys(tables))
+        semaphore = asyncio.Semaphore(settings.mysql.pool_size)
+
+        async def load(table: str) -> pa.Table:
+            async with semaphore:
+                return await self.db_service.get_all(table, projections.get(table))
+
+        with span("fetch.db") as db:
+            frames = await asyncio.gather(*(load(table) for table in tables))
+            db.rows, db.bytes = table_sizes(dict(zip(tables, frames, strict=True)))
+        return dict(zip(tables, frames, strict=True))
+
+    def insert_to_duckdb(self, ctx: DuckDBContext, tables: dict[str, pa.Table],
+                         scans: Optional[Counter[str]] = None) -> None:
+        """
+        Register sheet tabs and DB tables as zero-copy views. A table is only materialized
+        when `settings.duckdb.materialize_min_scans` is set and enough rules scan it.
+        """
+        threshold = settings.duckdb.materialize_min_scans
+        scans = scans or Counter()
+
+        for name, df in tables.items():
+
+            if len(df.columns) == 0:
+                # An empty tab, DuckDB can't register a table without columns
+                logger.debug(f"Skipping table {name} without columns")
+                continue
+
+            ctx.register(name, df, materialize=0 < threshold <= scans[name.lower()])
 
-    def insert_to_duckdb(self, sheet_tabs: dict[str, pd.DataFrame], db_tables: dict[str, pd.DataFrame]) -> None:
+        report = ctx.report
+        logger.info(
+            f"Registered {len(report.tables)} tables in DuckDB context {ctx.schema}: "
+            f"{report.bytes_registered} bytes registered, {report.bytes_materialized} bytes materialized, "
+            f"{report.bytes_saved} bytes saved by zero-copy views"
+        )
 
-        for tab_name, df in sheet_tabs.items():
 
-            conn.execute(f"CREATE TABLE IF NOT EXISTS {tab_name} AS SELECT * FROM df")
-            conn.register(tab_name, df)
+@cache
+def get_validation_service() -> ValidationService:
+    """The validation service of the process, shared so that its HTTP client and caches are too."""
+    return ValidationService()
 
-        for table_name, df in db_tables.items():
 
-            conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM df")
-            conn.register(table_name, df)
+ValidationServiceDep = Annotated[ValidationService, Depends(get_validation_service)]
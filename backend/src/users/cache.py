@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..conf import settings
+from .models import User
+
+
+class UserCache(object):
+    """
+    A short-lived in-process cache of users by ID and by email, so that authenticated
+    requests don't query the user table each time. `UserCRUD` drops a user from it when
+    the user is updated or deleted; other processes see the change within `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._users: OrderedDict[str, tuple[float, User]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[User]:
+        entry = self._users.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self._users.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: User) -> None:
+        if not self.ttl:
+            return
+        entry = (time.monotonic(), user)
+        for key in (f"id:{user.id}", f"email:{user.email}"):
+            self._users[key] = entry
+            self._users.move_to_end(key)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def get_by_id(self, user_id: str) -> Optional[User]:
+        return self.get(f"id:{user_id}")
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self.get(f"email:{email}")
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            self._users.clear()
+            return
+        entry = self._users.pop(f"id:{user_id}", None)
+        if entry is not None:
+            self._users.pop(f"email:{entry[1].email}", None)
+
+
+user_cache: UserCache = UserCache(ttl=settings.auth.user_cache_ttl, max_size=settings.auth.user_cache_size)
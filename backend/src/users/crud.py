@@ -1,5 +1,8 @@
+from typing import Optional
+
 from sqlmodel import select, update, delete
 
+from .cache import user_cache
 from .models import User, UserUpdate, UserCreate
 from ..db.sqlite_client import get_session
 
@@ -18,22 +21,32 @@ class UserCRUD(object):
 
     @staticmethod
     async def get_by_id(user_id: str) -> User:
-        async with get_session() as session:
+        async with get_session(readonly=True) as session:
             statement = select(User).where(User.id == user_id)
             result = await session.execute(statement)
             return result.scalar_one_or_none()
 
     @staticmethod
     async def get_by_email(email: str) -> User:
-        async with get_session() as session:
+        async with get_session(readonly=True) as session:
             statement = select(User).where(User.email == email)
             result = await session.execute(statement)
             return result.scalar_one_or_none()
 
 
+    @staticmethod
+    async def get_cached(user_id: Optional[str] = None, email: Optional[str] = None) -> Optional[User]:
+        """The user by ID (or by email), from the user cache when it was looked up recently."""
+        user = user_cache.get_by_id(user_id) if user_id else user_cache.get_by_email(email)
+        if user is None:
+            user = await UserCRUD.get_by_id(user_id) if user_id else await UserCRUD.get_by_email(email)
+            if user is not None:
+                user_cache.put(user)
+        return user
+
     @staticmethod
     async def get_all() -> list[User]:
-        async with get_session() as session:
+        async with get_session(readonly=True) as session:
             statement = select(User)
             result = await session.execute(statement)
             return result.scalars().all()
@@ -48,8 +61,12 @@ class UserCRUD(object):
                 returning(User)
             )
             result = await session.execute(statement)
+            db_user = result.scalar_one_or_none()
             await session.commit()
-            return result.scalar_one_or_none()
+            user_cache.invalidate(user_id)
+            if db_user is not None:
+                await session.refresh(db_user)
+            return db_user
 
     @staticmethod
     async def delete_one(user_id: str) -> None:
@@ -57,3 +74,4 @@ class UserCRUD(object):
             statement = delete(User).where(User.id == user_id)
             await session.execute(statement)
             await session.commit()
+            user_cache.invalidate(user_id)
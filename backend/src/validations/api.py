@@ -1,14 +1,59 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, status
 from loguru import logger
 
-from .models import ValidateRequest, ValidateResponse
+from ..conf import settings
+from ..jobs import JobStatus, job_client
+from ..services import ValidationServiceDep
+from ..services.result_cache import result_cache
+from ..services.validation_pool import get_validation_pool
+from .models import ResultCacheStats, ValidationPoolStats, ValidateRequest, ValidateResponse
 
 router = APIRouter(prefix="/api/validate", tags=["Validation"])
 
 @router.post("/api/validate", tags=["Validation"], summary="Validate Data Endpoint")
-async def validate_request(req: ValidateRequest) -> ValidateResponse:
+async def validate_request(req: ValidateRequest, validation_service: ValidationServiceDep) -> ValidateResponse:
 
 
     logger.info(f"Received validation request: {req}")
 
-    return ValidateResponse(status="valid", errors=[])
+    return await validation_service.validate_async(event_type=req.event_type, url=str(req.url), detail=req.detail,
+                                                   debug=req.debug)
+
+
+@router.post("/jobs", tags=["Validation"], summary="Submit Validation Job Endpoint",
+             status_code=status.HTTP_202_ACCEPTED)
+async def submit_validation_job(req: ValidateRequest) -> JobStatus:
+    """
+    Queue a validation and return its job ID right away, poll the job for the result.
+    """
+    logger.info(f"Received validation job: {req}")
+
+    return await job_client.submit(event_type=req.event_type, url=str(req.url), detail=req.detail, debug=req.debug)
+
+
+@router.get("/jobs/{job_id}", tags=["Validation"], summary="Validation Job Status Endpoint")
+async def get_validation_job(
+        job_id: str,
+        wait: float = Query(default=0, ge=0, le=settings.jobs.max_wait,
+                            description="Seconds to wait for the job to finish before answering."),
+) -> JobStatus:
+    job = await job_client.get(job_id, wait=wait)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/pool", tags=["Validation"], summary="Validation Worker Pool Stats Endpoint")
+async def get_validation_pool_stats() -> ValidationPoolStats:
+    """
+    The saturation of the validation worker processes: busy workers and queued validations.
+    """
+    return get_validation_pool().stats()
+
+
+@router.get("/cache", tags=["Validation"], summary="Validation Result Cache Stats Endpoint")
+async def get_result_cache_stats() -> ResultCacheStats:
+    """
+    The size of the validation result cache and its hit and miss counts.
+    """
+    return await result_cache.stats()
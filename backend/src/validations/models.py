@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Any, Literal, Optional
 
 from pydantic import HttpUrl
 from python_sdk.domain.base import BaseModel
@@ -16,7 +16,14 @@ class Validation(SQLModel, table=True):
         description="The unique identifier for the validation."
     )
 
-    event_type: str = Field(..., title="Event Type", description="The type of event to validate.")
+    event_type: str = Field(..., title="Event Type", description="The type of event to validate.", index=True,
+                            unique=True)
+
+    version: int = Field(
+        default=0,
+        title="Version",
+        description="The version of the event type's rules, bumped on every change to them.",
+    )
 
 
 
@@ -26,6 +33,60 @@ class ValidateRequest(BaseModel):
 
     url: HttpUrl = Field(..., title="URL", description="The URL to validate the event against.")
 
+    detail: bool = Field(default=False, title="Detail",
+                         description="Whether to return a sample of the invalid rows of each failed rule.")
+
+    debug: bool = Field(default=False, title="Debug",
+                        description="Whether to return the time spent in each stage and on each rule.")
+
+
+
+class RuleViolation(BaseModel):
+    rule: str = Field(..., title="Rule", description="The name of the failed rule.")
+
+    error_message: str = Field(..., title="Error Message", description="The error message of the failed rule.")
+
+    invalid_rows_count: Optional[int] = Field(default=None, title="Invalid Rows Count",
+                                              description="The number of invalid rows, when counted.")
+
+    sample: list[dict[str, Any]] = Field(default_factory=list, title="Sample",
+                                         description="A capped sample of the invalid rows.")
+
+
+class StageTiming(BaseModel):
+    stage: str = Field(..., title="Stage", description="The name of the stage, nested stages are dotted.")
+
+    elapsed: float = Field(..., title="Elapsed", description="The seconds spent in the stage.")
+
+    rows: Optional[int] = Field(default=None, title="Rows", description="The rows the stage handled, when known.")
+
+    bytes: Optional[int] = Field(default=None, title="Bytes", description="The bytes the stage handled, when known.")
+
+    peak_memory: Optional[int] = Field(default=None, title="Peak Memory",
+                                       description="The peak resident memory of the process by the end of the stage.")
+
+
+class RuleTiming(BaseModel):
+    rule: str = Field(..., title="Rule", description="The name of the rule.")
+
+    elapsed: float = Field(..., title="Elapsed",
+                           description="The seconds spent evaluating the rule, or its fused scan.")
+
+    rows: int = Field(..., title="Rows", description="The rows of the tables the rule scans.")
+
+    fused: bool = Field(..., title="Fused", description="Whether the rule was evaluated by a fused scan.")
+
+    failed: bool = Field(..., title="Failed", description="Whether the rule failed.")
+
+
+class ValidationTimings(BaseModel):
+    elapsed: float = Field(..., title="Elapsed", description="The seconds the validation took.")
+
+    stages: list[StageTiming] = Field(default_factory=list, title="Stages",
+                                      description="The stages of the validation, in the order they started.")
+
+    rules: list[RuleTiming] = Field(default_factory=list, title="Rules",
+                                    description="The rules evaluated, slowest first.")
 
 
 class ValidateResponse(BaseModel):
@@ -34,3 +95,51 @@ class ValidateResponse(BaseModel):
     errors:list[str] = Field(default_factory=list,
                              title="Errors",
                              description="List of validation error messages, if any.")
+
+    details: list[RuleViolation] = Field(default_factory=list,
+                                         title="Details",
+                                         description="The invalid rows of each failed rule, in detail mode.")
+
+    timings: Optional[ValidationTimings] = Field(default=None, title="Timings",
+                                                 description="Where the time of the validation went, in debug mode.")
+
+
+class WorkerStats(BaseModel):
+    pid: Optional[int] = Field(default=None, title="PID", description="The process ID of the worker.")
+
+    alive: bool = Field(..., title="Alive", description="Whether the worker process is running.")
+
+    in_flight: int = Field(..., title="In Flight", description="The validations the worker is evaluating.")
+
+    completed: int = Field(..., title="Completed", description="The validations the worker has evaluated.")
+
+
+class ValidationPoolStats(BaseModel):
+    processes: int = Field(..., title="Processes", description="The number of worker processes.")
+
+    busy_workers: int = Field(..., title="Busy Workers",
+                              description="The worker processes evaluating at least one validation.")
+
+    in_flight: int = Field(..., title="In Flight", description="The validations being evaluated.")
+
+    queued: int = Field(..., title="Queued", description="The validations waiting for a free worker.")
+
+    completed: int = Field(..., title="Completed", description="The validations evaluated successfully.")
+
+    failed: int = Field(..., title="Failed", description="The validations whose evaluation failed.")
+
+    workers: list[WorkerStats] = Field(default_factory=list, title="Workers", description="Per worker statistics.")
+
+
+class ResultCacheStats(BaseModel):
+    backend: str = Field(..., title="Backend", description="Where the results are cached.")
+
+    entries: int = Field(..., title="Entries", description="The number of cached results.")
+
+    bytes: int = Field(..., title="Bytes", description="The total size of the cached results.")
+
+    hits: int = Field(..., title="Hits", description="Validations answered from the cache.")
+
+    misses: int = Field(..., title="Misses", description="Validations that were not cached.")
+
+    evictions: int = Field(..., title="Evictions", description="Results evicted to stay within the size limits.")
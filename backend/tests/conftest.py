@@ -0,0 +1,39 @@
+import pytest
+from sqlmodel import SQLModel
+
+import src.auth.models  # noqa: F401
+import src.jobs.models  # noqa: F401
+import src.rules.models  # noqa: F401
+import src.users.models  # noqa: F401
+import src.validations.models  # noqa: F401
+from bench.standins import SheetsStandIn, tab_rows
+from src.conf import settings
+from src.db import sqlite_client
+from src.db.sqlite_client import SqliteClient, sqlite_pragmas
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def sqlite(tmp_path, monkeypatch):
+    """A fresh SQLite database with every table, in place of the configured one."""
+    client = SqliteClient(url=f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", pragmas=sqlite_pragmas())
+    monkeypatch.setattr(sqlite_client, "client", client)
+    async with client.write_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield client
+    await client.dispose()
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """A Sheets API stand-in serving an orders and a refunds tab, which the Sheets settings point at."""
+    stand_in = SheetsStandIn({"orders": tab_rows(["1", "10"], ["2", "20"]), "refunds": tab_rows(["1", "5"])}).start()
+    monkeypatch.setattr(settings.google_sheets, "sheets_url", stand_in.sheets_url)
+    monkeypatch.setattr(settings.google_sheets, "drive_url", stand_in.drive_url)
+    monkeypatch.setattr(settings.google_sheets, "api_key", None)
+    yield stand_in
+    stand_in.close()
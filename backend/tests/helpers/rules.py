@@ -0,0 +1,15 @@
+from typing import Optional
+
+from src.rules.models import Rule
+from src.rules.plan import RulePlan, compile_plan
+
+
+def make_rule(name: str, query: str, cost_class: Optional[str] = None) -> Rule:
+    return Rule(validation_id="validation", name=name, error_message=f"{name} failed", query=query,
+                cost_class=cost_class)
+
+
+def make_plan(*queries: str, event_type: str = "orders", db_tables: Optional[list[str]] = None) -> RulePlan:
+    """A plan of one rule per query, named rule_0, rule_1..."""
+    rules = [(make_rule(f"rule_{index}", query), list(db_tables or [])) for index, query in enumerate(queries)]
+    return compile_plan(event_type, rules)
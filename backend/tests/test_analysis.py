@@ -0,0 +1,101 @@
+import pytest
+
+from src.rules.analysis import RulePlanner, analyze_rule
+
+
+@pytest.fixture(scope="module")
+def planner():
+    with RulePlanner() as planner:
+        yield planner
+
+
+def test_plain_filter_is_cheap(planner):
+    analysis = analyze_rule("SELECT id FROM orders WHERE amount < 0", planner)
+
+    assert analysis.cost_class == "cheap" and analysis.findings == []
+
+
+def test_select_star_and_non_sargable_predicates_are_moderate(planner):
+    analysis = analyze_rule("SELECT * FROM orders WHERE name LIKE '%x' OR amount * 2 > 10", planner)
+
+    assert analysis.cost_class == "moderate"
+    assert len(analysis.findings) == 3
+
+
+def test_unparseable_rule_is_pathological(planner):
+    assert analyze_rule("SELECT FROM WHERE", planner).pathological
+
+
+def test_cross_join_is_pathological(planner):
+    analysis = analyze_rule("SELECT o.id FROM orders o CROSS JOIN customers c", planner)
+
+    assert analysis.pathological
+    assert "CROSS_PRODUCT" in analysis.operators
+    assert any("pairs every row" in finding for finding in analysis.findings)
+
+
+def test_join_without_predicate_is_pathological(planner):
+    analysis = analyze_rule("SELECT o.id FROM orders o, customers c WHERE o.amount > 0", planner)
+
+    assert analysis.pathological
+    assert any("without a join predicate" in finding for finding in analysis.findings)
+
+
+def test_plan_overrules_cross_join_with_a_predicate(planner):
+    analysis = analyze_rule("SELECT o.id FROM orders o CROSS JOIN customers c WHERE o.customer_id = c.id", planner)
+
+    assert analysis.cost_class == "moderate"
+    assert not any("pairs every row" in finding for finding in analysis.findings)
+
+
+def test_plan_overrules_join_predicate_the_text_misses(planner):
+    analysis = analyze_rule(
+        "SELECT o.id FROM orders o, customers c WHERE o.customer_id IS NOT DISTINCT FROM c.id", planner,
+    )
+
+    assert "HASH_JOIN" in analysis.operators
+    assert analysis.cost_class == "moderate" and analysis.findings == []
+
+
+def test_join_with_single_row_subquery_is_a_scan(planner):
+    analysis = analyze_rule(
+        "SELECT o.id FROM orders o CROSS JOIN (SELECT avg(amount) AS average FROM orders) a "
+        "WHERE o.amount > a.average * 10", planner,
+    )
+
+    assert not analysis.pathological
+    assert analysis.cost_class == "moderate"
+
+
+def test_inequality_join_is_expensive(planner):
+    analysis = analyze_rule("SELECT o.id FROM orders o JOIN customers c ON o.customer_id <> c.id", planner)
+
+    assert analysis.cost_class == "expensive"
+    assert any("compares every pair of rows" in finding for finding in analysis.findings)
+
+
+class RangeJoinPlanner(RulePlanner):
+    """DuckDB only plans range joins as merge joins for tables of some size, not for empty sample tables."""
+
+    def operators(self, tree):
+        return frozenset({"PROJECTION", "PIECEWISE_MERGE_JOIN", "ARROW_SCAN"})
+
+
+def test_range_join_is_not_quadratic():
+    analysis = analyze_rule("SELECT o.id FROM orders o JOIN customers c ON o.amount > c.credit_limit",
+                            RangeJoinPlanner())
+
+    # A sort-merge range join is expensive by its text, but not a comparison of every pair of rows
+    assert analysis.cost_class == "expensive"
+    assert not any("compares every pair of rows" in finding for finding in analysis.findings)
+
+
+def test_plan_overruling_a_cross_join_keeps_the_other_findings():
+    analysis = analyze_rule(
+        "SELECT o.id FROM orders o JOIN customers c ON o.amount > c.credit_limit "
+        "CROSS JOIN refunds r WHERE r.order_id IS NOT DISTINCT FROM o.id", RangeJoinPlanner(),
+    )
+
+    assert analysis.cost_class == "expensive"
+    assert analysis.cross_products == []
+    assert any("has no equality predicate" in finding for finding in analysis.findings)
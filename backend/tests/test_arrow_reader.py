@@ -0,0 +1,81 @@
+from typing import AsyncIterator
+
+import pyarrow as pa
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.db.arrow_reader import ArrowReader, MySQLColumn, unified_schema
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine() -> AsyncIterator[AsyncEngine]:
+    # Sqlite columns without a type hold whatever they are given, like results of unknown type
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER, value)"))
+    yield engine
+    await engine.dispose()
+
+
+async def insert(engine: AsyncEngine, values: list[object]) -> None:
+    async with engine.begin() as conn:
+        for index, value in enumerate(values):
+            await conn.execute(text("INSERT INTO items VALUES (:id, :value)"), {"id": index, "value": value})
+
+
+async def test_null_only_first_chunk_takes_the_type_of_later_chunks(engine: AsyncEngine) -> None:
+    await insert(engine, [None, None, 4, 5])
+
+    table = await ArrowReader(engine, chunk_size=2).read("SELECT id, value FROM items")
+
+    assert table.schema.field("value").type == pa.int64()
+    assert table.column("value").to_pylist() == [None, None, 4, 5]
+
+
+async def test_wider_values_in_later_chunks_widen_the_column(engine: AsyncEngine) -> None:
+    await insert(engine, [1, 2, 2.5, None])
+
+    table = await ArrowReader(engine, chunk_size=2).read("SELECT id, value FROM items")
+
+    assert table.schema.field("value").type == pa.float64()
+    assert table.column("value").to_pylist() == [1.0, 2.0, 2.5, None]
+
+
+async def test_irreconcilable_chunks_become_strings(engine: AsyncEngine) -> None:
+    await insert(engine, [1, 2, "x", 3.5])
+
+    table = await ArrowReader(engine, chunk_size=2).read("SELECT id, value FROM items")
+
+    assert table.schema.field("value").type == pa.large_string()
+    assert table.column("value").to_pylist() == ["1", "2", "x", "3.5"]
+
+
+async def test_values_that_do_not_fit_the_mysql_type_are_inferred(engine: AsyncEngine) -> None:
+    await insert(engine, ["a", "b", "c", "d"])
+    columns = [MySQLColumn(name="id", data_type="int", column_type="int"),
+               MySQLColumn(name="value", data_type="int", column_type="int")]
+
+    table = await ArrowReader(engine, chunk_size=2).read("SELECT id, value FROM items", columns)
+
+    assert table.schema.field("id").type == pa.int32()
+    assert table.schema.field("value").type == pa.string()
+    assert table.column("value").to_pylist() == ["a", "b", "c", "d"]
+
+
+async def test_empty_results_keep_their_columns(engine: AsyncEngine) -> None:
+    table = await ArrowReader(engine).read("SELECT id, value FROM items")
+
+    assert table.num_rows == 0
+    assert table.column_names == ["id", "value"]
+
+
+def test_unified_schema_promotes_nulls_and_numbers() -> None:
+    schema = unified_schema([
+        pa.schema([("a", pa.null()), ("b", pa.int32()), ("c", pa.string())]),
+        pa.schema([("a", pa.string()), ("b", pa.float64()), ("c", pa.date32())]),
+    ])
+
+    assert schema == pa.schema([("a", pa.string()), ("b", pa.float64()), ("c", pa.large_string())])
@@ -0,0 +1,139 @@
+import httpx
+import jwt
+import pytest
+from fastapi import FastAPI
+
+from src.auth import api, auth_bearer
+from src.auth.revocation import RevocationList
+from src.conf import settings
+from src.services import auth_service
+from src.services.auth_service import AuthService
+from src.users.cache import user_cache
+from src.users.crud import UserCRUD
+
+pytestmark = pytest.mark.anyio
+
+USER = {"name": "Ada", "email": "ada@example.com", "password": "correct horse"}
+
+
+@pytest.fixture
+async def revocations(sqlite, monkeypatch):
+    """A revocation list of its own, in place of the process-wide one."""
+    revocations = RevocationList(flush_interval=3600)
+    for module in (api, auth_bearer, auth_service):
+        monkeypatch.setattr(module, "revocation_list", revocations)
+    yield revocations
+    await revocations.close()
+
+
+@pytest.fixture
+async def client(revocations):
+    app = FastAPI()
+    app.include_router(api.router)
+    user_cache.invalidate()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    user_cache.invalidate()
+
+
+@pytest.fixture
+def lookups(monkeypatch) -> list[str]:
+    """The user IDs looked up in the user table."""
+    lookups = []
+    get_by_id = UserCRUD.get_by_id
+
+    async def counted(user_id: str):
+        lookups.append(user_id)
+        return await get_by_id(user_id)
+
+    monkeypatch.setattr(UserCRUD, "get_by_id", counted)
+    return lookups
+
+
+async def register(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/auth/register", json=USER)
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+async def login(client: httpx.AsyncClient, password: str = USER["password"]) -> str:
+    response = await client.post("/api/auth/login", json={"email": USER["email"], "password": password})
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+def bearer(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def test_token_carries_the_claims_requests_need(client):
+    token = await register(client)
+
+    claims = AuthService.decode_jwt(token)
+
+    assert claims["sub"] == USER["email"]
+    assert claims["uid"] and claims["jti"]
+    assert (claims["gen"], claims["disabled"]) == (0, False)
+
+
+async def test_requests_reuse_the_cached_user(client, lookups):
+    token = await register(client)
+    user_cache.invalidate()
+
+    responses = [await client.get("/api/auth/me", headers=bearer(token)) for _ in range(3)]
+
+    assert [response.json()["email"] for response in responses] == [USER["email"]] * 3
+    assert len(lookups) == 1
+
+
+async def test_disabled_user_is_refused_without_a_lookup(client, lookups):
+    claims = AuthService.decode_jwt(await register(client))
+    token = AuthService.create_access_token({**claims, "disabled": True})
+
+    response = await client.get("/api/auth/me", headers=bearer(token))
+
+    assert response.status_code == 400
+    assert lookups == []
+
+
+async def test_token_signed_with_another_secret_is_refused(client):
+    claims = AuthService.decode_jwt(await register(client))
+    token = jwt.encode(claims, "another secret", algorithm=settings.auth.algorithm)
+
+    response = await client.get("/api/auth/me", headers=bearer(token))
+
+    assert response.status_code == 403
+
+
+async def test_logout_revokes_the_token_only(client):
+    token, other = await register(client), await login(client)
+
+    await client.post("/api/auth/logout", headers=bearer(token))
+
+    assert (await client.get("/api/auth/me", headers=bearer(token))).status_code == 403
+    assert (await client.get("/api/auth/me", headers=bearer(other))).status_code == 200
+
+
+async def test_refreshed_token_replaces_the_old_one(client):
+    token = await register(client)
+
+    response = await client.post("/api/auth/refresh-token", headers=bearer(token))
+    refreshed = response.json()["access_token"]
+
+    assert (await client.get("/api/auth/me", headers=bearer(token))).status_code == 403
+    assert (await client.get("/api/auth/me", headers=bearer(refreshed))).status_code == 200
+
+
+async def test_password_change_revokes_every_token_of_the_user(client, revocations):
+    token, other = await register(client), await login(client)
+
+    response = await client.post("/api/auth/change-password", params={"new_password": "battery staple"},
+                                 headers=bearer(token))
+    await revocations.sync()
+
+    assert response.status_code == 200
+    assert (await client.get("/api/auth/me", headers=bearer(token))).status_code == 403
+    assert (await client.get("/api/auth/me", headers=bearer(other))).status_code == 403
+    fresh = await login(client, password="battery staple")
+    assert AuthService.decode_jwt(fresh)["gen"] == 1
+    assert (await client.get("/api/auth/me", headers=bearer(fresh))).status_code == 200
@@ -0,0 +1,136 @@
+import datetime
+import gc
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional
+
+import pyarrow as pa
+import pytest
+
+from src.services import db_service
+from src.services.db_service import DbService
+from src.services.table_cache import TableSnapshotCache
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeResult(object):
+
+    def __init__(self, row: Any) -> None:
+        self.row = row
+
+    def one_or_none(self) -> Any:
+        return self.row
+
+    def one(self) -> Any:
+        return self.row
+
+
+class FakeConnection(object):
+    """Answers the statistics query with `statistics` and CHECKSUM TABLE with `checksum`."""
+
+    def __init__(self, statistics: Optional[SimpleNamespace], checksum: int = 1) -> None:
+        self.statistics = statistics
+        self.checksum = checksum
+        self.statements: list[str] = []
+
+    async def execute(self, statement: Any, parameters: Optional[dict[str, Any]] = None) -> FakeResult:
+        sql = str(statement)
+        self.statements.append(sql)
+        if sql.startswith("CHECKSUM TABLE"):
+            return FakeResult(("backend.orders", self.checksum))
+        return FakeResult(self.statistics)
+
+
+@pytest.fixture
+def fake_connection(monkeypatch: pytest.MonkeyPatch) -> FakeConnection:
+    conn = FakeConnection(None)
+
+    @asynccontextmanager
+    async def connection() -> AsyncIterator[FakeConnection]:
+        yield conn
+
+    monkeypatch.setattr(db_service, "connection", connection)
+    monkeypatch.setattr(DbService, "quote", staticmethod(lambda name: f"`{name}`"))
+    return conn
+
+
+def statistics(recent: bool) -> SimpleNamespace:
+    return SimpleNamespace(UPDATE_TIME=datetime.datetime(2026, 1, 1, 12), TABLE_ROWS=10, RECENT=recent)
+
+
+async def test_version_comes_from_the_table_statistics(fake_connection: FakeConnection) -> None:
+    fake_connection.statistics = statistics(recent=False)
+
+    version = await DbService().get_table_version("orders")
+
+    assert version == (datetime.datetime(2026, 1, 1, 12), 10)
+    assert not any(statement.startswith("CHECKSUM") for statement in fake_connection.statements)
+
+
+async def test_tables_updated_within_the_last_second_are_checksummed(fake_connection: FakeConnection) -> None:
+    fake_connection.statistics = statistics(recent=True)
+    service = DbService(TableSnapshotCache(max_bytes=1 << 20))
+
+    first = await service.get_table_version("orders")
+    fake_connection.checksum = 2
+    second = await service.get_table_version("orders")
+
+    assert first == ("checksum", 1)
+    assert second == ("checksum", 2)
+
+
+async def test_tables_without_an_update_time_are_checksummed_once_per_ttl(
+        fake_connection: FakeConnection, monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_connection.statistics = SimpleNamespace(UPDATE_TIME=None, TABLE_ROWS=10, RECENT=None)
+    service = DbService(TableSnapshotCache(max_bytes=1 << 20))
+
+    first = await service.get_table_version("orders")
+    fake_connection.checksum = 2
+    cached = await service.get_table_version("orders")
+    monkeypatch.setattr(db_service.settings.mysql, "checksum_ttl", 0.0)
+    expired = await service.get_table_version("orders")
+
+    assert (first, cached, expired) == (("checksum", 1), ("checksum", 1), ("checksum", 2))
+    assert sum(statement.startswith("CHECKSUM") for statement in fake_connection.statements) == 2
+
+
+class CountingDbService(DbService):
+    """Fetches a one-column table whose version and contents the test controls."""
+
+    def __init__(self, cache: TableSnapshotCache) -> None:
+        super().__init__(cache=cache)
+        self.version = 1
+        self.fetches = 0
+
+    async def get_table_version(self, table_name: str) -> Any:
+        return self.version
+
+    async def fetch_table(self, table_name: str, projection: Any = None) -> pa.Table:
+        self.fetches += 1
+        return pa.table({"version": [self.version]})
+
+
+async def test_snapshots_are_refetched_when_the_version_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(db_service.settings.mysql, "snapshot_freshness_interval", 0.0)
+    service = CountingDbService(TableSnapshotCache(max_bytes=1 << 20))
+
+    first = await service.get_all("orders")
+    again = await service.get_all("orders")
+    service.version = 2
+    changed = await service.get_all("orders")
+
+    assert first is again
+    assert changed.column("version").to_pylist() == [2]
+    assert service.fetches == 2
+    assert (service.cache.hits, service.cache.misses) == (1, 2)
+
+
+async def test_snapshot_locks_are_dropped_once_released() -> None:
+    service = CountingDbService(TableSnapshotCache(max_bytes=1 << 20))
+
+    for index in range(3):
+        await service.get_all(f"orders_{index}")
+    gc.collect()
+
+    assert len(service.cache._locks) == 0
@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter
+
+import pyarrow as pa
+import pytest
+
+from src.conf import settings
+from src.db.duckdb_client import DuckDBPool
+from src.services.validation_service import ValidationService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def pool():
+    pool = DuckDBPool(size=2, threads=1)
+    yield pool
+    pool.close()
+
+
+async def test_contexts_of_concurrent_validations_are_isolated(pool):
+    async def count(rows: int) -> int:
+        async with pool.context() as ctx:
+            ctx.register("orders", pa.table({"id": list(range(rows))}))
+            ctx.execute("CREATE TABLE totals AS SELECT count(*) AS n FROM orders")
+            await asyncio.sleep(0.05)
+            return ctx.execute("SELECT n FROM totals").fetchone()[0]
+
+    assert await asyncio.gather(count(1), count(3)) == [1, 3]
+
+
+async def test_context_is_torn_down_with_the_validation(pool):
+    async with pool.context() as ctx:
+        ctx.register("orders", pa.table({"id": [1]}))
+        ctx.execute("CREATE TABLE totals AS SELECT 1")
+        schema = ctx.schema
+
+    schemas = pool.database.execute("SELECT schema_name FROM information_schema.schemata").fetchall()
+    assert (schema,) not in schemas
+    assert pool.available == 2
+
+
+async def test_validations_wait_for_a_free_connection(pool):
+    async with pool.context(), pool.context():
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.context(timeout=0.05):
+                pass
+
+    async with pool.context() as ctx:
+        assert ctx.execute("SELECT 1").fetchone() == (1,)
+
+
+async def test_tables_are_registered_as_views_unless_materialized(pool):
+    orders, refunds = pa.table({"id": [1, 2]}), pa.table({"id": [1]})
+
+    async with pool.context() as ctx:
+        ctx.register("orders", orders)
+        ctx.register("refunds", refunds, materialize=True)
+        kinds = dict(ctx.execute(
+            "SELECT table_name, table_type FROM information_schema.tables WHERE table_name IN ('orders', 'refunds')"
+        ).fetchall())
+        counts = [ctx.cursor().execute(f"SELECT count(*) FROM {name}").fetchone()[0] for name in ("orders", "refunds")]
+        report = ctx.report
+
+    assert kinds == {"orders": "VIEW", "refunds": "BASE TABLE"}
+    assert counts == [2, 1]
+    assert report.bytes_registered == orders.nbytes + refunds.nbytes
+    assert report.bytes_materialized == refunds.nbytes
+    assert report.bytes_saved == orders.nbytes
+
+
+async def test_only_tables_scanned_often_enough_are_materialized(pool, monkeypatch):
+    monkeypatch.setattr(settings.duckdb, "materialize_min_scans", 2)
+    tables = {"orders": pa.table({"id": [1]}), "refunds": pa.table({"id": [1]}), "empty": pa.table({})}
+
+    async with pool.context() as ctx:
+        ValidationService().insert_to_duckdb(ctx, tables, scans=Counter({"orders": 2, "refunds": 1}))
+        report = ctx.report
+
+    assert {table.name: table.materialized for table in report.tables} == {"orders": True, "refunds": False}
@@ -0,0 +1,72 @@
+import pyarrow as pa
+import pytest
+
+from src.db.duckdb_client import pool
+from src.rules.fusion import filtered_scan, plan_fusion
+from src.services.rule_executor import RuleExecutor
+from tests.helpers.rules import make_plan, make_rule
+
+pytestmark = pytest.mark.anyio
+
+
+def names(rules: list) -> list[str]:
+    return [rule.name for rule in rules]
+
+
+def test_rules_filtering_one_table_share_a_scan() -> None:
+    plan = plan_fusion([
+        make_rule("negative", "SELECT * FROM orders WHERE amount < 0"),
+        make_rule("unpaid", "SELECT o.id FROM orders o WHERE o.status = 'unpaid'"),
+        make_rule("joined", "SELECT * FROM orders o JOIN customers c ON o.customer_id = c.id"),
+    ])
+
+    assert [names(scan.rules) for scan in plan.scans] == [["negative", "unpaid"]]
+    assert names(plan.unfused) == ["joined"]
+    assert "FILTER(WHERE amount < 0)" in plan.scans[0].query.replace(" (", "(")
+
+
+def test_tables_of_other_schemas_are_not_fused_together() -> None:
+    plan = plan_fusion([
+        make_rule("x_negative", "SELECT * FROM x.orders WHERE amount < 0"),
+        make_rule("y_negative", "SELECT * FROM y.orders WHERE amount < 0"),
+        make_rule("x_empty", "SELECT * FROM x.orders WHERE amount IS NULL"),
+    ])
+
+    assert [names(scan.rules) for scan in plan.scans] == [["x_negative", "x_empty"]]
+    assert '"x"."orders"' in plan.scans[0].query
+    assert names(plan.unfused) == ["y_negative"]
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT CAST(status AS INTEGER) FROM orders WHERE amount < 0",
+    "SELECT amount * 2 AS doubled FROM orders WHERE amount < 0",
+    "SELECT count(*) FROM orders WHERE amount < 0",
+])
+def test_computed_select_lists_are_not_fused(query: str) -> None:
+    assert filtered_scan(query) is None
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM orders WHERE amount < 0",
+    "SELECT o.* FROM orders o WHERE amount < 0",
+    "SELECT id, amount AS total FROM orders WHERE amount < 0",
+])
+def test_plain_select_lists_are_fused(query: str) -> None:
+    table, predicate = filtered_scan(query)
+
+    assert table.name == "orders" and table.alias == ""
+    assert predicate.sql() == "amount < 0"
+
+
+async def test_rules_with_a_computed_select_list_run_alone() -> None:
+    plan = make_plan("SELECT * FROM orders WHERE amount < 0",
+                     "SELECT CAST(status AS INTEGER) FROM orders WHERE amount < 0",
+                     "SELECT id FROM orders WHERE status = 'unpaid'")
+    orders = pa.table({"id": [1, 2], "amount": [-1.0, 5.0], "status": ["paid", "unpaid"]})
+
+    async with pool.context() as ctx:
+        ctx.register("orders", orders)
+        results = await RuleExecutor(fuse=True).run(ctx, plan)
+
+    assert [result.failed for result in results] == [True, True, True]
+    assert [result.fused for result in results] == [True, False, True]
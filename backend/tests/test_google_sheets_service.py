@@ -0,0 +1,125 @@
+import gc
+
+import httpx
+import pytest
+
+from bench.standins import SheetsStandIn, tab_rows
+from src.services.google_sheets_service import GoogleSheetsService
+from src.services.ingestion_service import IngestionService, SchemaCache
+from src.services.sheet_cache import SheetCache
+
+pytestmark = pytest.mark.anyio
+
+URL = "https://docs.google.com/spreadsheets/d/spreadsheet/edit"
+
+
+class CountingSheetCache(SheetCache):
+
+    def __init__(self, cache_dir) -> None:
+        super().__init__(cache_dir)
+        self.stored: list[str] = []
+
+    def store(self, spreadsheet_id, title, *args, **kwargs):
+        self.stored.append(title)
+        return super().store(spreadsheet_id, title, *args, **kwargs)
+
+
+@pytest.fixture
+async def service(tmp_path):
+    async with httpx.AsyncClient() as client:
+        yield GoogleSheetsService(cache=CountingSheetCache(tmp_path), client=client,
+                                  ingestion=IngestionService(schemas=SchemaCache(max_size=8)))
+
+
+def sheets_requests(stand_in: SheetsStandIn) -> list[tuple[str, str, int]]:
+    return [request for request in stand_in.requests if request[0] == "sheets"]
+
+
+async def test_miss_downloads_every_tab_in_one_request(stand_in, service):
+    tables = await service.fetch_sheet_data(URL)
+
+    assert tables["orders"].column("amount").to_pylist() == [10, 20]
+    assert tables["refunds"].num_rows == 1
+    assert sheets_requests(stand_in) == [("sheets", "spreadsheet", 200), ("sheets", "values:batchGet", 200)]
+    assert service.cache.stored == ["orders", "refunds"]
+
+
+async def test_revision_hit_reads_the_cache_only(stand_in, service):
+    await service.fetch_sheet_data(URL)
+    stand_in.requests.clear()
+
+    tables = await service.fetch_sheet_data(URL, tabs=["ORDERS"])
+
+    assert list(tables) == ["orders"]
+    assert stand_in.requests == [("drive", "spreadsheet", 200)]
+    assert service.cache.stored == ["orders", "refunds"]
+
+
+async def test_given_revision_is_not_read_again(stand_in, service):
+    await service.fetch_sheet_data(URL)
+    stand_in.requests.clear()
+
+    await service.fetch_sheet_data(URL, revision=str(stand_in.version))
+
+    assert stand_in.requests == []
+
+
+async def test_single_unchanged_tab_is_revalidated_by_etag(stand_in, service):
+    await service.fetch_sheet_data(URL, tabs=["orders"])
+    service.cache.stored.clear()
+
+    # Batched downloads carry no ETag: the first revalidation matches the content and keeps the server's ETag
+    stand_in.set_tab("refunds", tab_rows(["2", "7"]))
+    await service.fetch_sheet_data(URL, tabs=["orders"])
+    stand_in.set_tab("refunds", tab_rows(["3", "9"]))
+    stand_in.requests.clear()
+    tables = await service.fetch_sheet_data(URL, tabs=["orders"])
+
+    assert tables["orders"].num_rows == 2
+    assert sheets_requests(stand_in) == [("sheets", "spreadsheet", 200), ("sheets", "'orders'", 304)]
+    assert service.cache.stored == []
+
+
+async def test_stale_tabs_are_revalidated_in_one_request(stand_in, service):
+    await service.fetch_sheet_data(URL)
+    stand_in.set_tab("refunds", tab_rows(["1", "5"], ["2", "7"]))
+    stand_in.requests.clear()
+    service.cache.stored.clear()
+
+    tables = await service.fetch_sheet_data(URL)
+
+    assert tables["refunds"].num_rows == 2
+    assert tables["orders"].num_rows == 2
+    assert sheets_requests(stand_in) == [("sheets", "spreadsheet", 200), ("sheets", "values:batchGet", 200)]
+    # The unchanged tab keeps its cached copy
+    assert service.cache.stored == ["refunds"]
+    assert service.tab_versions(URL, str(stand_in.version)) is not None
+    assert service.tab_versions(URL, "0") is None
+
+
+async def test_tabs_are_parsed_as_the_body_arrives(stand_in, service):
+    stand_in.set_tab("orders", tab_rows(*([str(i), f"{i}.5"] for i in range(200_000))))
+
+    tables = await service.fetch_sheet_data(URL, tabs=["orders"])
+
+    assert tables["orders"].num_rows == 200_000
+    assert tables["orders"].column("amount").type == "double"
+
+
+async def test_only_the_named_tabs_are_downloaded(stand_in, service):
+    tables = await service.fetch_sheet_data(URL, tabs=["ORDERS", "missing"])
+
+    assert list(tables) == ["orders"]
+    assert service.cache.stored == ["orders"]
+
+
+async def test_no_tab_named_means_no_request(stand_in, service):
+    assert await service.fetch_sheet_data(URL, tabs=[]) == {}
+    assert stand_in.requests == []
+
+
+async def test_spreadsheet_locks_are_dropped_once_released(stand_in, service):
+    await service.fetch_sheet_data(URL)
+    gc.collect()
+
+    assert len(service.cache._locks) == 0
@@ -0,0 +1,35 @@
+import pyarrow as pa
+
+from src.services.ingestion_service import IngestionService, SchemaCache
+
+
+def make_service() -> IngestionService:
+    return IngestionService(schemas=SchemaCache(max_size=8), batch_size=2, infer_types=True)
+
+
+def test_columns_are_typed_from_their_values():
+    table = make_service().from_rows("tab", [["id", "amount", "zip"], ["1", "1.5", "01000"], ["2", "", "75001"]])
+
+    assert table.schema.types == [pa.int64(), pa.float64(), pa.string()]
+    assert table.column("zip").to_pylist() == ["01000", "75001"]
+
+
+def test_column_falling_back_to_strings_keeps_the_cells_text():
+    table = make_service().from_rows("tab", [
+        ["amount", "flag"], ["1.50", "TRUE"], ["2", "FALSE"], ["n/a", "maybe"],
+    ])
+
+    assert table.schema.types == [pa.string(), pa.string()]
+    assert table.column("amount").to_pylist() == ["1.50", "2", "n/a"]
+    assert table.column("flag").to_pylist() == ["TRUE", "FALSE", "maybe"]
+
+
+def test_cached_schema_falls_back_to_strings_for_later_reads(tmp_path):
+    service = make_service()
+    service.from_rows("tab", [["day"], ["2024-01-02"]])
+    path = tmp_path / "tab.csv"
+    path.write_text("day\n2024-01-02\n2024-01-03\nsoon\n")
+
+    table = service.from_csv(path, key="tab")
+
+    assert table.column("day").to_pylist() == ["2024-01-02", "2024-01-03", "soon"]
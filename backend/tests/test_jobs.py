@@ -0,0 +1,158 @@
+import asyncio
+import gc
+import time
+
+import pytest
+from faststream.redis import RedisBroker, TestRedisBroker
+
+from src import main
+from src.jobs import JobClient, JobStatus, JobStore
+from src.jobs.worker import register_worker
+from src.services import validation_service
+from src.validations.models import ValidateResponse
+
+pytestmark = pytest.mark.anyio
+
+
+class StubValidationService(object):
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.validated: list[str] = []
+
+    async def validate_async(self, event_type: str, url: str, detail: bool = False,
+                             debug: bool = False) -> ValidateResponse:
+        self.validated.append(event_type)
+        if self.fail:
+            raise RuntimeError("The sheet is gone")
+        return ValidateResponse(status="invalid", errors=[f"{event_type} failed"])
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = StubValidationService()
+    monkeypatch.setattr(validation_service, "get_validation_service", lambda: service)
+    return service
+
+
+def make_store(ttl: float = 60) -> JobStore:
+    return JobStore(ttl=ttl, poll_interval=0.05)
+
+
+async def test_statuses_are_shared_between_stores(sqlite):
+    await make_store().put(JobStatus(job_id="job", status="running"))
+
+    status = await make_store().get("job")
+
+    assert status is not None and status.status == "running"
+
+
+async def test_finished_status_is_not_overwritten(sqlite):
+    store = make_store()
+    await store.put(JobStatus(job_id="job", status="done", result=ValidateResponse(status="valid", errors=[])))
+    await store.put(JobStatus(job_id="job", status="running"))
+
+    status = await store.get("job")
+
+    assert status.status == "done" and status.result.status == "valid"
+
+
+async def test_finished_jobs_expire(sqlite):
+    store = make_store(ttl=0.05)
+    await store.put(JobStatus(job_id="job", status="failed", error="boom"))
+    await asyncio.sleep(0.1)
+
+    assert await store.get("job") is None
+
+
+async def test_wait_sees_statuses_of_other_processes(sqlite):
+    store, other = make_store(), make_store()
+    await store.put(JobStatus(job_id="job", status="running"))
+
+    async def finish() -> None:
+        await asyncio.sleep(0.1)
+        await other.put(JobStatus(job_id="job", status="done", result=ValidateResponse(status="valid", errors=[])))
+
+    started = time.monotonic()
+    status, _ = await asyncio.gather(store.wait("job", timeout=5), finish())
+
+    assert status.status == "done"
+    assert time.monotonic() - started < 1
+
+
+async def test_wait_times_out_on_unfinished_jobs(sqlite):
+    store = make_store()
+    await store.put(JobStatus(job_id="job", status="queued"))
+
+    status = await store.wait("job", timeout=0.1)
+
+    assert status.status == "queued"
+
+
+async def test_waiters_do_not_leave_events_behind(sqlite):
+    store = make_store()
+    await store.put(JobStatus(job_id="job", status="queued"))
+
+    await asyncio.gather(store.wait("job", timeout=0.1), store.wait("job", timeout=0.1))
+    gc.collect()
+
+    assert len(store._events) == 0
+
+
+async def test_api_consumes_job_statuses_while_it_runs(monkeypatch):
+    calls = []
+
+    class RecordingJobClient(object):
+        async def start(self) -> None:
+            calls.append("start")
+
+        async def close(self) -> None:
+            calls.append("close")
+
+    monkeypatch.setattr(main, "job_client", RecordingJobClient())
+
+    async with main.api.router.lifespan_context(main.api):
+        assert calls == ["start"]
+
+    assert calls == ["start", "close"]
+
+
+async def test_job_runs_on_a_worker_and_any_instance_reads_its_result(sqlite, service):
+    broker = RedisBroker()
+    client = JobClient(queue="jobs", store=make_store(), broker=broker)
+    register_worker(broker, "jobs")
+
+    async with TestRedisBroker(broker):
+        submitted = await client.submit(event_type="orders", url="https://example.com/sheet", detail=True)
+        # Another API instance, or this one after a restart, shares nothing but the store
+        status = await JobClient(queue="jobs", store=make_store()).get(submitted.job_id, wait=1)
+
+    assert submitted.status == "queued"
+    assert service.validated == ["orders"]
+    assert status.status == "done"
+    assert status.result.errors == ["orders failed"]
+    assert status.finished_at is not None
+
+
+async def test_failed_job_reports_its_error(sqlite, service):
+    service.fail = True
+    broker = RedisBroker()
+    client = JobClient(queue="jobs", store=make_store(), broker=broker)
+    register_worker(broker, "jobs")
+
+    async with TestRedisBroker(broker):
+        submitted = await client.submit(event_type="orders", url="https://example.com/sheet")
+        status = await client.get(submitted.job_id, wait=1)
+
+    assert status.status == "failed"
+    assert status.error == "The sheet is gone"
+
+
+async def test_jobs_run_in_process_without_a_broker(sqlite, service):
+    client = JobClient(store=make_store())
+
+    submitted = await client.submit(event_type="orders", url="https://example.com/sheet")
+    status = await client.get(submitted.job_id, wait=1)
+
+    assert status.status == "done"
+    assert await client.start() is None
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from src.services.password_hasher import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowPasswordHash(object):
+    """Hashes in `delay` seconds, recording the threads it ran on."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.threads: set[str] = set()
+
+    def hash(self, password: str) -> str:
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return f"hashed:{password}"
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(SlowPasswordHash(delay=0.1), workers=2, queue_size=1)
+    yield hasher
+    hasher.close()
+
+
+async def test_hashing_does_not_block_the_event_loop(hasher):
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    hashed = await hasher.hash("secret")
+    ticker.cancel()
+
+    assert hashed == "hashed:secret"
+    assert ticks > 3
+    assert all(name.startswith("password-hash") for name in hasher.password_hash.threads)
+
+
+async def test_operations_beyond_the_queue_are_refused(hasher):
+    results = await asyncio.gather(*(hasher.hash(str(index)) for index in range(5)), return_exceptions=True)
+
+    refused = [result for result in results if isinstance(result, HTTPException)]
+    assert [result.status_code for result in refused] == [429, 429]
+    assert hasher.rejected == 2
+    assert hasher.pending == 0
+
+
+async def test_outdated_hashes_are_updated():
+    old = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),))
+    hasher = PasswordHasher(PasswordHash((Argon2Hasher(time_cost=2, memory_cost=8192, parallelism=1),)),
+                            workers=1, queue_size=0)
+    try:
+        valid, updated = await hasher.verify_and_update("secret", old.hash("secret"))
+        invalid, _ = await hasher.verify_and_update("wrong", old.hash("secret"))
+        verified = await hasher.verify("secret", updated)
+    finally:
+        hasher.close()
+
+    assert valid and not invalid
+    assert updated is not None and verified
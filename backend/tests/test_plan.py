@@ -0,0 +1,36 @@
+from src.rules.plan import compile_rule
+from tests.helpers.rules import make_plan, make_rule
+
+
+def test_stored_cost_class_is_kept():
+    compiled = compile_rule(make_rule("rule", "SELECT id FROM orders", cost_class="expensive"), [])
+
+    assert compiled.cost_class == "expensive" and compiled.expensive
+
+
+def test_unknown_cost_class_is_analyzed():
+    compiled = compile_rule(make_rule("rule", "SELECT * FROM orders", cost_class="slow"), [])
+
+    assert compiled.cost_class == "moderate"
+
+
+def test_pathological_rule_is_rejected_with_its_findings():
+    compiled = compile_rule(make_rule("rule", "SELECT o.id FROM orders o CROSS JOIN customers c",
+                                      cost_class="pathological"), [])
+
+    assert compiled.error.startswith("Rule rule is pathological")
+    assert "pairs every row" in compiled.error
+
+
+def test_unparseable_rule_has_an_error():
+    compiled = compile_rule(make_rule("rule", "SELECT FROM WHERE"), [])
+
+    assert "could not be parsed" in compiled.error
+
+
+def test_sheet_tabs_are_the_tables_that_are_not_db_tables():
+    plan = make_plan("SELECT o.id FROM orders o JOIN Customers c ON o.customer_id = c.id",
+                     "SELECT * FROM refunds", db_tables=["customers"])
+
+    assert plan.db_tables == ["customers"]
+    assert plan.sheet_tabs == {"orders", "refunds"}
@@ -0,0 +1,88 @@
+from typing import Optional
+
+from src.db.arrow_reader import MySQLColumn
+from src.rules.pushdown import TableProjection, plan_projections
+from src.rules.sql import parse_rule
+from src.services.db_service import DbService
+
+
+def project(*queries: Optional[str], db_tables: tuple[str, ...] = ("customers",)) -> dict[str, TableProjection]:
+    return plan_projections([(parse_rule(query) if query is not None else None, list(db_tables))
+                             for query in queries])
+
+
+def test_rule_reads_its_columns_and_rows():
+    projection = project("SELECT id, email FROM customers WHERE country = 'FR' AND age > 18")["customers"]
+
+    assert projection.columns == {"id", "email", "country", "age"}
+    assert projection.predicate == "country = 'FR' AND age > 18"
+
+
+def test_rules_read_the_union_of_their_projections():
+    projection = project(
+        "SELECT id FROM customers WHERE country = 'FR'",
+        "SELECT email FROM customers WHERE age IN (1, 2)",
+    )["customers"]
+
+    assert projection.columns == {"id", "email", "country", "age"}
+    assert projection.predicate == "country = 'FR' OR age IN (1, 2)"
+
+
+def test_rule_without_a_filter_reads_every_row():
+    projection = project("SELECT id FROM customers WHERE country = 'FR'", "SELECT id FROM customers")["customers"]
+
+    assert projection.predicate is None
+
+
+def test_star_and_unparsed_rules_read_every_column():
+    assert project("SELECT * FROM customers WHERE age > 18")["customers"].columns is None
+    assert project("SELECT c.* FROM customers c")["customers"].columns is None
+    assert project(None)["customers"] == TableProjection(table="customers")
+
+
+def test_only_conditions_on_the_table_are_pushed_down():
+    projection = project(
+        "SELECT o.id FROM orders o JOIN customers c ON o.customer_id = c.id "
+        "WHERE c.country = 'FR' AND o.amount < 0 AND lower(c.email) LIKE '%test%'"
+    )["customers"]
+
+    assert projection.columns == {"id", "country", "email"}
+    assert projection.predicate == "country = 'FR'"
+
+
+def test_outer_joins_and_repeated_tables_are_not_filtered():
+    outer = project("SELECT o.id FROM orders o LEFT JOIN customers c ON o.customer_id = c.id WHERE c.age > 18")
+    self_join = project("SELECT a.id FROM customers a JOIN customers b ON a.email = b.email WHERE a.age > 18")
+
+    assert outer["customers"].predicate is None
+    assert self_join["customers"].predicate is None
+
+
+def test_select_statement_keeps_the_columns_the_table_has():
+    columns = [MySQLColumn(name=name, data_type="varchar", column_type="varchar(255)")
+               for name in ("id", "Email", "country")]
+    projection = TableProjection(table="customers", columns=frozenset({"email", "missing"}),
+                                 predicate="country = 'FR'")
+
+    statement = DbService().select_statement("customers", columns, projection)
+    unprojected = DbService().select_statement("customers", columns)
+
+    assert statement == "SELECT `Email` FROM `customers` WHERE country = 'FR'"
+    assert unprojected == "SELECT * FROM `customers`"
+
+
+def test_negations_are_not_pushed_down():
+    # MySQL's default collations compare 'FR' and 'fr' as equal, so `country <> 'fr'` would
+    # never send DuckDB the 'FR' rows the rule reports
+    projection = project(
+        "SELECT id FROM customers WHERE country <> 'fr' AND NOT (name LIKE 'a%') AND age IS NOT NULL AND age > 18"
+    )["customers"]
+
+    assert projection.predicate == "age > 18"
+    assert project("SELECT id FROM customers WHERE country != 'fr'")["customers"].predicate is None
+
+
+def test_conditions_on_select_list_aliases_are_not_pushed_down():
+    projection = project("SELECT amount * 2 AS doubled FROM customers WHERE doubled > 10 AND amount > 1")["customers"]
+
+    assert projection.predicate == "amount > 1"
@@ -0,0 +1,65 @@
+import pytest
+
+from src.services.result_cache import MemoryResultCache, ResultCache, SqliteResultCache
+from src.validations.models import ValidateResponse
+
+pytestmark = pytest.mark.anyio
+
+
+def response(*errors: str) -> ValidateResponse:
+    return ValidateResponse(status="invalid" if errors else "valid", errors=list(errors))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make_cache(max_entries: int = 16, max_bytes: int = 1 << 20) -> ResultCache:
+        if request.param == "memory":
+            return MemoryResultCache(max_entries, max_bytes)
+        return SqliteResultCache(tmp_path / "results.sqlite3", max_entries, max_bytes)
+
+    return make_cache
+
+
+async def test_results_round_trip(make_cache):
+    cache = make_cache()
+    await cache.put("key", response("orders failed"))
+
+    assert await cache.get("key") == response("orders failed")
+    assert await cache.get("other") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_least_recently_used_results_are_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    await cache.put("a", response("a"))
+    await cache.put("b", response("b"))
+    await cache.get("a")
+    await cache.put("c", response("c"))
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert cache.evictions == 1
+    assert (await cache.size())[0] == 2
+
+
+async def test_results_are_evicted_by_size(make_cache):
+    size = len(response("x" * 100).model_dump_json())
+    cache = make_cache(max_bytes=size * 2)
+    for key in "abc":
+        await cache.put(key, response(key * 100))
+
+    entries, nbytes = await cache.size()
+    assert entries == 2 and nbytes <= size * 2
+
+
+async def test_oversized_results_are_not_cached(make_cache):
+    cache = make_cache(max_bytes=10)
+    await cache.put("key", response("orders failed"))
+
+    assert await cache.size() == (0, 0)
+
+
+async def test_sqlite_results_are_shared_between_processes(tmp_path):
+    await SqliteResultCache(tmp_path / "results.sqlite3", 16, 1 << 20).put("key", response("orders failed"))
+
+    assert await SqliteResultCache(tmp_path / "results.sqlite3", 16, 1 << 20).get("key") == response("orders failed")
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.auth import revocation
+from src.auth.crud import RevocationCRUD
+from src.auth.revocation import RevocationList
+
+pytestmark = pytest.mark.anyio
+
+
+def claims(jti: str, user_id: str = "user", gen: int = 0, expires_in: float = 3600) -> dict:
+    return {"jti": jti, "uid": user_id, "gen": gen, "exp": time.time() + expires_in}
+
+
+def make_list() -> RevocationList:
+    return RevocationList(flush_interval=3600)
+
+
+async def test_revoked_token_is_revoked_here_at_once_and_elsewhere_after_a_sync(sqlite):
+    here, elsewhere = make_list(), make_list()
+    await elsewhere.sync()
+
+    here.revoke(claims("revoked"))
+    checked_before_sync = elsewhere.is_revoked(claims("revoked"))
+    await here.sync()
+    await elsewhere.sync()
+
+    assert here.is_revoked(claims("revoked"))
+    assert not checked_before_sync
+    assert elsewhere.is_revoked(claims("revoked"))
+    assert not elsewhere.is_revoked(claims("kept"))
+
+
+async def test_generation_bump_revokes_every_earlier_token_of_the_user(sqlite):
+    here, elsewhere = make_list(), make_list()
+
+    here.revoke_user("user")
+    await here.sync()
+    await elsewhere.sync()
+
+    for revocations in (here, elsewhere):
+        assert revocations.generation("user") == 1
+        assert revocations.is_revoked(claims("old", gen=0))
+        assert not revocations.is_revoked(claims("new", gen=1))
+        assert not revocations.is_revoked(claims("other", user_id="other", gen=0))
+
+
+async def test_concurrent_bumps_keep_the_highest_generation(sqlite):
+    here, elsewhere = make_list(), make_list()
+
+    here.revoke_user("user")
+    here.revoke_user("user")
+    elsewhere.revoke_user("user")
+    await here.sync()
+    await elsewhere.sync()
+    await here.sync()
+
+    assert here.generation("user") == elsewhere.generation("user") == 2
+    assert [generation.generation for generation in await RevocationCRUD.get_generations_since(0)] == [2]
+
+
+async def test_expired_tokens_are_forgotten(sqlite):
+    revocations = make_list()
+    revocations.revoke(claims("expired", expires_in=-1))
+    revocations.revoke(claims("valid"))
+
+    await revocations.sync()
+
+    assert list(revocations.tokens) == ["valid"]
+    assert [token.jti for token in await RevocationCRUD.get_tokens_since(0, time.time())] == ["valid"]
+
+
+async def test_failed_sync_keeps_the_revocations_pending(sqlite, monkeypatch):
+    revocations = make_list()
+    revocations.revoke(claims("revoked"))
+    revocations.revoke_user("user")
+
+    async def unavailable(*args, **kwargs):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    with monkeypatch.context() as patched:
+        patched.setattr(revocation.RevocationCRUD, "save", unavailable)
+        await revocations.sync()
+    await revocations.sync()
+
+    assert [token.jti for token in await RevocationCRUD.get_tokens_since(0, time.time())] == ["revoked"]
+    assert [generation.user_id for generation in await RevocationCRUD.get_generations_since(0)] == ["user"]
@@ -0,0 +1,77 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from src.rules import api
+from src.rules.crud import UPSERT_BATCH_SIZE, RuleCRUD, RuleSet
+from src.rules.models import CreateRulesRequest, CreateRulesResponse, RuleCreate
+
+pytestmark = pytest.mark.anyio
+
+
+def rule(name: str, query: str = "SELECT * FROM orders WHERE amount < 0") -> RuleCreate:
+    return RuleCreate(name=name, error_message=f"{name} failed", query=query)
+
+
+@pytest.fixture
+def no_schemas(monkeypatch):
+    async def table_schemas(rules):
+        return {}
+
+    monkeypatch.setattr(api, "table_schemas", table_schemas)
+
+
+async def test_rules_with_the_same_names_are_replaced(sqlite):
+    created = await RuleCRUD.upsert_many("orders", [rule("negative"), rule("empty")])
+
+    updated = await RuleCRUD.upsert_many("orders", [rule("negative", "SELECT * FROM orders WHERE amount <= 0"),
+                                                    rule("large")])
+    rule_set = await RuleCRUD.get_rule_set("orders")
+
+    assert [result.status for result in created] == ["created", "created"]
+    assert [result.status for result in updated] == ["updated", "created"]
+    assert updated[0].id == created[0].id
+    assert [stored.name for stored in rule_set.rules] == ["empty", "large", "negative"]
+    assert rule_set.rules[2].query.endswith("amount <= 0")
+
+
+async def test_rules_are_stored_in_batches(sqlite):
+    rules = [rule(f"rule_{index:05}") for index in range(UPSERT_BATCH_SIZE * 2 + 1)]
+
+    results = await RuleCRUD.upsert_many("orders", rules)
+    rule_set = await RuleCRUD.get_rule_set("orders")
+
+    assert len({result.id for result in results}) == len(rules)
+    assert len(rule_set.rules) == len(rules)
+    assert rule_set.version == 1
+
+
+async def test_rules_are_stored_with_their_cost_class(sqlite, no_schemas):
+    response = await api.create_rule(CreateRulesRequest(event_type="orders", rules=[
+        rule("cheap", "SELECT id FROM orders WHERE amount < 0"),
+        rule("select_all", "SELECT * FROM orders"),
+    ]), Response())
+    rule_set = await RuleCRUD.get_rule_set("orders")
+
+    assert response.success
+    assert {stored.name: stored.cost_class for stored in rule_set.rules} == {
+        result.name: result.cost_class for result in response.results}
+    assert rule_set.rules[1].cost_class == "moderate"
+
+
+async def test_no_rule_is_stored_when_one_is_invalid(sqlite, no_schemas):
+    app = FastAPI()
+    app.include_router(api.router)
+    request = CreateRulesRequest(event_type="orders", rules=[
+        rule("valid"), rule("broken", "SELECT FROM WHERE"), rule("valid"),
+    ])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/rules/api/create_rules", json=request.model_dump())
+    body = CreateRulesResponse.model_validate(response.json())
+
+    assert response.status_code == 422
+    assert not body.success and body.error_code == 422
+    assert [result.name for result in body.results] == ["broken", "valid"]
+    assert "Duplicate rule name" in body.results[1].error
+    assert await RuleCRUD.get_rule_set("orders") == RuleSet(event_type="orders", version=0)
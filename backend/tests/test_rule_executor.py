@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+from src.db.duckdb_client import pool
+from src.services import rule_executor
+from src.services.rule_executor import RuleExecutor
+from tests.helpers.rules import make_plan
+
+pytestmark = pytest.mark.anyio
+
+ORDERS = pa.table({"id": [1, 2, 3, 4], "amount": [10.0, -5.0, 20.0, -1.0]})
+
+
+async def run(executor: RuleExecutor, *queries: str) -> list:
+    async with pool.context() as ctx:
+        ctx.register("orders", ORDERS)
+        return await executor.run(ctx, make_plan(*queries))
+
+
+async def test_results_follow_the_rule_order() -> None:
+    results = await run(RuleExecutor(fuse=False), "SELECT * FROM orders WHERE amount < 0",
+                        "SELECT * FROM orders WHERE amount > 100", "SELECT id FROM orders WHERE id = 3")
+
+    assert [result.rule.name for result in results] == ["rule_0", "rule_1", "rule_2"]
+    assert [result.failed for result in results] == [True, False, True]
+    assert all(result.error is None for result in results)
+
+
+async def test_count_mode_counts_invalid_rows() -> None:
+    results = await run(RuleExecutor(mode="count", fuse=False), "SELECT * FROM orders WHERE amount < 0")
+
+    assert results[0].invalid_rows_count == 2
+
+
+async def test_exists_mode_stops_at_the_first_invalid_row() -> None:
+    plan = make_plan("SELECT * FROM orders WHERE amount < 0")
+
+    results = await run(RuleExecutor(mode="exists", fuse=False), "SELECT * FROM orders WHERE amount < 0")
+
+    assert results[0].failed and results[0].invalid_rows_count is None
+    assert plan.rules[0].exists_sql.endswith("LIMIT 1")
+
+
+async def test_detail_samples_at_most_sample_size_rows() -> None:
+    async with pool.context() as ctx:
+        ctx.register("orders", ORDERS)
+        results = await RuleExecutor(mode="exists", sample_size=1, fuse=False).run(
+            ctx, make_plan("SELECT id, amount FROM orders WHERE amount < 0", "SELECT * FROM orders WHERE id = 0"),
+            detail=True,
+        )
+
+    assert results[0].sample == [{"id": 2, "amount": -5.0}]
+    assert results[1].sample == []
+
+
+async def test_slow_rule_is_interrupted() -> None:
+    started = time.perf_counter()
+    results = await run(RuleExecutor(timeout=0.2, fuse=False),
+                        "SELECT * FROM range(10000000000) t(i) WHERE i % 7 = 100")
+
+    assert results[0].failed
+    assert "timed out" in results[0].error
+    assert time.perf_counter() - started < 5
+
+
+async def test_time_waiting_for_a_thread_is_not_part_of_the_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rule_executor, "executor", ThreadPoolExecutor(max_workers=1))
+    executor = RuleExecutor(timeout=0.5)
+    cursors: asyncio.Queue[duckdb.DuckDBPyConnection] = asyncio.Queue()
+    for _ in range(2):
+        cursors.put_nowait(duckdb.connect())
+
+    # The second call waits 0.3s for the only thread, then runs for 0.3s of its own
+    results = await asyncio.gather(*(executor._submit(cursors, lambda cursor: time.sleep(0.3) or "done")
+                                     for _ in range(2)))
+
+    assert results == ["done", "done"]
+
+
+async def test_cancelled_rule_hands_its_cursor_back_once_the_thread_is_done() -> None:
+    executor = RuleExecutor(timeout=5)
+    cursors: asyncio.Queue[duckdb.DuckDBPyConnection] = asyncio.Queue()
+    cursors.put_nowait(duckdb.connect())
+    finished = threading.Event()
+
+    def slow(cursor: duckdb.DuckDBPyConnection) -> None:
+        time.sleep(0.3)
+        finished.set()
+
+    task = asyncio.create_task(executor._submit(cursors, slow))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert cursors.empty()
+    await asyncio.wait_for(cursors.get(), timeout=2)
+    assert finished.is_set()
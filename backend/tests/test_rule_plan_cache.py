@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.rules.cache import RulePlanCache
+from src.rules.plan import RulePlan
+from tests.helpers.rules import make_plan
+
+pytestmark = pytest.mark.anyio
+
+
+class Loader(object):
+
+    def __init__(self, event_type: str = "orders", fail: bool = False) -> None:
+        self.event_type = event_type
+        self.fail = fail
+        self.loads = 0
+
+    async def __call__(self) -> RulePlan:
+        self.loads += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("The rules could not be read")
+        return make_plan("SELECT * FROM orders", event_type=self.event_type)
+
+
+async def test_plan_is_compiled_once():
+    cache, loader = RulePlanCache(max_size=8, ttl=3600), Loader()
+
+    first = await cache.get_or_load("orders", loader)
+    second = await cache.get_or_load("orders", loader)
+
+    assert first is second
+    assert loader.loads == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_concurrent_misses_share_one_load():
+    cache, loader = RulePlanCache(max_size=8, ttl=3600), Loader()
+
+    plans = await asyncio.gather(*(cache.get_or_load("orders", loader) for _ in range(5)))
+
+    assert loader.loads == 1
+    assert all(plan is plans[0] for plan in plans)
+
+
+async def test_failed_load_is_shared_and_retried():
+    cache, loader = RulePlanCache(max_size=8, ttl=3600), Loader(fail=True)
+
+    results = await asyncio.gather(*(cache.get_or_load("orders", loader) for _ in range(3)), return_exceptions=True)
+    loader.fail = False
+    plan = await cache.get_or_load("orders", loader)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert loader.loads == 2
+    assert plan.event_type == "orders"
+
+
+async def test_plans_expire_and_are_evicted():
+    cache = RulePlanCache(max_size=2, ttl=3600)
+    for event_type in ("orders", "refunds", "customers"):
+        await cache.get_or_load(event_type, Loader(event_type))
+
+    assert cache.get("orders") is None
+    assert cache.get("customers") is not None
+
+    cache.ttl = 0
+    assert cache.get("customers") is None
+
+
+async def test_invalidate_drops_the_plan():
+    cache, loader = RulePlanCache(max_size=8, ttl=3600), Loader()
+    await cache.get_or_load("orders", loader)
+
+    cache.invalidate("orders")
+    await cache.get_or_load("orders", loader)
+
+    assert loader.loads == 2
@@ -0,0 +1,77 @@
+import pytest
+
+from src.rules.cache import RulePlanCache
+from src.rules.crud import RuleCRUD
+from src.rules.models import RuleCreate
+from src.rules.plan import RulePlan, compile_plan
+
+pytestmark = pytest.mark.anyio
+
+
+class VersionedLoader(object):
+    """Loads the stored rules of an event type and reads its version, counting both."""
+
+    def __init__(self, event_type: str = "orders") -> None:
+        self.event_type = event_type
+        self.loads = 0
+        self.checks = 0
+
+    async def load(self) -> RulePlan:
+        self.loads += 1
+        rule_set = await RuleCRUD.get_rule_set(self.event_type)
+        return compile_plan(self.event_type, [(rule, []) for rule in rule_set.rules], version=rule_set.version)
+
+    async def version(self) -> int:
+        self.checks += 1
+        return await RuleCRUD.get_version(self.event_type)
+
+
+async def store(*names: str) -> None:
+    await RuleCRUD.upsert_many("orders", [
+        RuleCreate(name=name, error_message=f"{name} failed", query="SELECT * FROM orders") for name in names
+    ])
+
+
+async def test_every_store_bumps_the_version(sqlite):
+    assert await RuleCRUD.get_version("orders") == 0
+
+    await store("negative")
+    await store("negative", "empty")
+    rule_set = await RuleCRUD.get_rule_set("orders")
+
+    assert await RuleCRUD.get_version("orders") == rule_set.version == 2
+    assert [rule.name for rule in rule_set.rules] == ["empty", "negative"]
+
+
+async def test_event_type_without_rules_has_an_empty_rule_set(sqlite):
+    rule_set = await RuleCRUD.get_rule_set("refunds")
+
+    assert rule_set.version == 0 and rule_set.rules == ()
+
+
+async def test_plan_is_reloaded_when_another_process_changes_the_rules(sqlite):
+    cache, loader = RulePlanCache(max_size=8, ttl=3600, check_interval=0), VersionedLoader()
+    await store("negative")
+    first = await cache.get_or_load("orders", loader.load, version=loader.version)
+
+    # Stored without invalidating this cache, as another API instance would
+    await store("negative", "empty")
+    second = await cache.get_or_load("orders", loader.load, version=loader.version)
+    third = await cache.get_or_load("orders", loader.load, version=loader.version)
+
+    assert (first.version, second.version) == (1, 2)
+    assert len(second.rules) == 2
+    assert third is second
+    assert loader.loads == 2
+
+
+async def test_version_is_read_at_most_every_check_interval(sqlite):
+    cache, loader = RulePlanCache(max_size=8, ttl=3600, check_interval=3600), VersionedLoader()
+    await store("negative")
+    first = await cache.get_or_load("orders", loader.load, version=loader.version)
+
+    await store("negative", "empty")
+    second = await cache.get_or_load("orders", loader.load, version=loader.version)
+
+    assert second is first
+    assert (loader.loads, loader.checks) == (1, 0)
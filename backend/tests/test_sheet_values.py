@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from src.services.sheet_values import ValueRangeDecoder
+
+
+def chunked(body: bytes, size: int) -> list[bytes]:
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+BATCH = json.dumps({
+    "spreadsheetId": "spreadsheet",
+    "valueRanges": [
+        {"range": "'orders'!A1:B3", "majorDimension": "ROWS", "values": [["id", "name"], ["1", 'Zoë "Z"'], ["2"]]},
+        {"range": "'empty'!A1"},
+        {"values": [["[\\]"]], "range": "'brackets'!A1"},
+    ],
+}, indent=2, ensure_ascii=False).encode()
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, len(BATCH)])
+def test_value_ranges_are_decoded_across_chunks(size):
+    decoder = ValueRangeDecoder(chunked(BATCH, size))
+
+    assert [list(rows) for rows in decoder.value_ranges()] == [
+        [["id", "name"], ["1", 'Zoë "Z"'], ["2"]],
+        [],
+        [["[\\]"]],
+    ]
+
+
+def test_unread_ranges_are_skipped():
+    ranges = ValueRangeDecoder(chunked(BATCH, 5)).value_ranges()
+    next(ranges)
+    next(ranges)
+
+    assert list(next(ranges)) == [["[\\]"]]
+
+
+def test_digest_tells_contents_apart():
+    def digest(values: list) -> str:
+        rows = ValueRangeDecoder([json.dumps({"range": "A1", "values": values}).encode()]).value_range()
+        assert list(rows) == values
+        return rows.digest
+
+    assert digest([["a"], ["b"]]) == digest([["a"], ["b"]])
+    assert digest([["a"], ["b"]]) != digest([["a", "b"]])
+
+
+def test_truncated_body_is_an_error():
+    with pytest.raises(ValueError):
+        list(ValueRangeDecoder([BATCH[:-40]]).value_ranges())
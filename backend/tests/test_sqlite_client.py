@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.db.sqlite_client import get_session
+from src.rules.crud import RuleCRUD
+from src.rules.models import RuleCreate
+
+pytestmark = pytest.mark.anyio
+
+INSERT_GENERATION = text("INSERT INTO user_token_generations (user_id, generation, updated_at) VALUES (:user, 1, 0)")
+
+
+async def count_generations() -> int:
+    async with get_session(readonly=True) as session:
+        return (await session.execute(text("SELECT count(*) FROM user_token_generations"))).scalar_one()
+
+
+async def test_connections_use_wal(sqlite):
+    for readonly in (False, True):
+        async with get_session(readonly=readonly) as session:
+            assert (await session.execute(text("PRAGMA journal_mode"))).scalar_one() == "wal"
+
+
+async def test_read_sessions_cannot_write(sqlite):
+    async with get_session(readonly=True) as session:
+        with pytest.raises(OperationalError, match="readonly"):
+            await session.execute(INSERT_GENERATION, {"user": "user"})
+
+
+async def test_reads_do_not_wait_for_an_open_write(sqlite):
+    async with get_session() as writer:
+        await writer.execute(INSERT_GENERATION, {"user": "user"})
+
+        # The writer holds the write lock until it commits, readers see the last committed state
+        before_commit = await asyncio.wait_for(count_generations(), timeout=1)
+        await writer.commit()
+
+    assert before_commit == 0
+    assert await count_generations() == 1
+
+
+async def test_concurrent_writes_queue_for_the_writer(sqlite):
+    rules = [RuleCreate(name="rule", error_message="rule failed", query="SELECT * FROM orders")]
+
+    await asyncio.gather(*(RuleCRUD.upsert_many("orders", rules) for _ in range(20)))
+
+    assert sqlite.write_engine.pool.size() == 1
+    assert await RuleCRUD.get_version("orders") == 20
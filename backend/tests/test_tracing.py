@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+from prometheus_client import REGISTRY
+
+from src.services.rule_executor import RuleResult
+from src.services.tracing import Trace
+from tests.helpers.rules import make_plan
+
+BACKEND = Path(__file__).parent.parent
+
+RECORD = """
+from src.services.tracing import Trace
+
+with Trace("multiprocess").span("fetch") as fetch:
+    fetch.rows = 3
+"""
+
+COLLECT = """
+from prometheus_client import generate_latest
+from src.metrics import registry
+
+print(generate_latest(registry()).decode())
+"""
+
+
+def run(script: str, multiprocess_dir: Path) -> str:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiprocess_dir)}
+    return subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def test_rules_are_exported_by_cost_class_and_timed_in_the_trace():
+    plan = make_plan("SELECT * FROM orders", "SELECT id FROM orders WHERE amount < 0", event_type="tracing")
+    results = [RuleResult(rule=compiled.rule, failed=False, elapsed=0.5) for compiled in plan.rules]
+    trace = Trace("tracing")
+
+    trace.record_rules(plan, results, {"orders": pa.table({"id": [1, 2], "amount": [1, -1]})})
+
+    assert [rule.rule for rule in trace.rules] == ["rule_0", "rule_1"]
+    labels = {"event_type": "tracing", "cost_class": plan.rules[0].cost_class}
+    assert REGISTRY.get_sample_value("validation_rule_seconds_count", labels) >= 1
+    assert REGISTRY.get_sample_value("validation_rule_rows_total", labels) >= 2
+    assert not any("rule" in sample.labels for metric in REGISTRY.collect()
+                   if metric.name.startswith("validation_rule") for sample in metric.samples)
+
+
+def test_metrics_of_every_process_are_collected(tmp_path):
+    run(RECORD, tmp_path)
+    run(RECORD, tmp_path)
+
+    exported = run(COLLECT, tmp_path)
+
+    assert 'validation_stage_seconds_count{event_type="multiprocess",stage="fetch"} 2.0' in exported
+    assert 'validation_stage_rows_total{event_type="multiprocess",stage="fetch"} 6.0' in exported
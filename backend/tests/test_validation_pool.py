@@ -0,0 +1,87 @@
+import asyncio
+
+import pyarrow as pa
+import pytest
+
+from src.services import validation_pool
+from src.services.validation_pool import ValidationPool
+from tests.helpers.rules import make_plan
+
+pytestmark = pytest.mark.anyio
+
+ORDERS = pa.table({"id": [1, 2, 3, 4], "amount": [10.0, -5.0, 20.0, -1.0]})
+
+SLOW_RULE = "SELECT * FROM orders, range(60000000) r WHERE hash(r.range + orders.id) = 0"
+
+
+@pytest.fixture
+async def pool():
+    pool = ValidationPool(processes=1, tasks_per_worker=1)
+    yield pool
+    pool.close()
+
+
+async def settle(pool: ValidationPool, timeout: float = 30) -> None:
+    """Wait for the workers to answer every task they were given."""
+    async with asyncio.timeout(timeout):
+        while pool._blocks or any(worker.in_flight for worker in pool._workers):
+            await asyncio.sleep(0.05)
+
+
+async def test_rules_are_evaluated_in_a_worker(pool):
+    plan = make_plan("SELECT * FROM orders WHERE amount < 0", "SELECT * FROM orders WHERE amount > 100")
+
+    results = await pool.evaluate(plan, {"orders": ORDERS})
+
+    assert [result.failed for result in results] == [True, False]
+    assert [result.rule.name for result in results] == ["rule_0", "rule_1"]
+    assert pool._futures == {} and pool._blocks == {}
+    assert pool.stats().completed == 1
+
+
+async def test_cancelled_validation_keeps_its_tables_until_the_worker_answers(pool):
+    running = asyncio.create_task(pool.evaluate(make_plan(SLOW_RULE), {"orders": ORDERS}))
+    await asyncio.sleep(0.5)
+    waiting = asyncio.create_task(pool.evaluate(make_plan("SELECT * FROM orders"), {"orders": ORDERS}))
+    await asyncio.sleep(0.1)
+    assert pool.stats().queued == 1
+
+    running.cancel()
+    waiting.cancel()
+    await asyncio.gather(running, waiting, return_exceptions=True)
+
+    # The worker still reads the running validation's tables, the waiting one never got any
+    assert pool._futures == {}
+    assert len(pool._blocks) == 1
+    assert pool.stats().queued == 0
+    await settle(pool)
+
+    results = await pool.evaluate(make_plan("SELECT * FROM orders WHERE amount < 0"), {"orders": ORDERS})
+    assert results[0].failed
+
+
+async def test_dead_worker_is_replaced_and_its_validation_fails(pool):
+    running = asyncio.create_task(pool.evaluate(make_plan(SLOW_RULE), {"orders": ORDERS}))
+    await asyncio.sleep(0.5)
+    dead = pool._workers[0].process
+    dead.kill()
+
+    with pytest.raises(RuntimeError, match="worker exited"):
+        await asyncio.wait_for(running, timeout=30)
+
+    assert pool._workers[0].process is not dead
+    assert pool._blocks == {}
+    results = await pool.evaluate(make_plan("SELECT * FROM orders WHERE amount < 0"), {"orders": ORDERS})
+    assert results[0].failed
+
+
+def test_workers_split_the_cores(monkeypatch):
+    monkeypatch.setattr(validation_pool.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(validation_pool.settings.duckdb, "threads", 8)
+    monkeypatch.setattr(validation_pool.settings.validation, "rule_parallelism", 8)
+
+    environment = ValidationPool(processes=3, tasks_per_worker=2).worker_environment()
+
+    assert environment["DUCKDB_WORKERS"] == "2"
+    assert environment["DUCKDB_THREADS"] == "2"
+    assert environment["VALIDATION_RULE_PARALLELISM"] == "2"
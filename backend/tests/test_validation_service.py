@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pyarrow as pa
+import pytest
+
+from src.conf import settings
+from src.rules.cache import RulePlanCache
+from src.services import validation_service
+from src.services.google_sheets_service import GoogleSheetsService
+from src.services.ingestion_service import IngestionService, SchemaCache
+from src.services.result_cache import MemoryResultCache
+from src.services.rule_executor import RuleExecutor
+from src.services.sheet_cache import SheetCache
+from src.services.validation_service import ValidationService
+from tests.helpers.rules import make_plan
+
+pytestmark = pytest.mark.anyio
+
+URL = "https://docs.google.com/spreadsheets/d/spreadsheet/edit"
+
+SLOW_RULE = ("SELECT * FROM orders WHERE amount < 0 "
+             "AND (SELECT count(*) FROM range(10000000000) t(i) WHERE i % 7 = 100) = 0")
+
+
+@pytest.fixture
+async def service(tmp_path, monkeypatch, stand_in):
+    plans = RulePlanCache(max_size=8, ttl=3600, check_interval=3600)
+    monkeypatch.setattr(validation_service, "rule_plan_cache", plans)
+
+    async with httpx.AsyncClient() as client:
+        service = ValidationService()
+        service.google_sheets_service = GoogleSheetsService(
+            cache=SheetCache(tmp_path), client=client, ingestion=IngestionService(schemas=SchemaCache(max_size=8)),
+        )
+        service.result_cache = MemoryResultCache(max_entries=16, max_bytes=1 << 20)
+        service.rule_executor = RuleExecutor(timeout=0.2, fuse=False)
+        service.plans = plans
+        yield service
+
+
+async def test_result_is_answered_from_the_cache(service, stand_in):
+    service.plans.put(make_plan("SELECT * FROM orders WHERE amount > 15"))
+
+    first = await service.validate_async("orders", URL)
+    second = await service.validate_async("orders", URL)
+
+    assert first.status == second.status == "invalid"
+    assert service.result_cache.hits == 1
+    # The revision is read once per validation, for the result key and the fetch alike
+    assert [request for request in stand_in.requests if request[0] == "drive"] == [("drive", "spreadsheet", 200)] * 2
+
+
+async def test_timed_out_rule_is_not_cached(service):
+    service.plans.put(make_plan(SLOW_RULE))
+
+    first = await service.validate_async("orders", URL)
+    second = await service.validate_async("orders", URL)
+
+    assert "timed out" in first.errors[0]
+    assert "timed out" in second.errors[0]
+    assert service.result_cache.hits == 0
+    assert await service.result_cache.size() == (0, 0)
+
+
+async def test_debug_timings_report_the_sizes_of_each_table_once(service):
+    service.plans.put(make_plan("SELECT * FROM orders WHERE amount > 15"))
+
+    response = await service.validate_async("orders", URL, debug=True)
+
+    stages = {stage.stage: stage for stage in response.timings.stages}
+    assert stages["fetch"].rows == stages["fetch.sheets"].rows == 2
+    assert stages["evaluate"].rows is None and stages["evaluate"].bytes is None
+    assert [rule.rule for rule in response.timings.rules] == ["rule_0"]
+
+
+class SlowDbService(object):
+    """Loads tables in 0.05s each, recording how many loads overlap."""
+
+    def __init__(self) -> None:
+        self.loaded: list[str] = []
+        self.running = 0
+        self.most_running = 0
+
+    async def get_all(self, table: str, projection=None) -> pa.Table:
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        self.loaded.append(table)
+        return pa.table({"table": [table]})
+
+
+async def test_db_tables_load_concurrently_within_the_pool_size(monkeypatch):
+    monkeypatch.setattr(settings.mysql, "pool_size", 2)
+    service = ValidationService()
+    service.db_service = SlowDbService()
+
+    tables = await service.fetch_db_data(["customers", "products", "customers", "stores"])
+
+    assert list(tables) == ["customers", "products", "stores"]
+    assert tables["stores"].column("table").to_pylist() == ["stores"]
+    assert sorted(service.db_service.loaded) == ["customers", "products", "stores"]
+    assert service.db_service.most_running == 2